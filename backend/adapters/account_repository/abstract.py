@@ -24,15 +24,11 @@ class AbstractAccountRepository(ABC):
         pass
 
     @abstractmethod
-    async def update_actual_size(self, name: str, size: int):
+    async def reconcile_actual_sizes(self) -> list[str]:
         pass
 
     @abstractmethod
-    async def set_actual_size_for_excluded(
-        self, excluded_names: list[str], size: int = 0
+    async def verify_ready_to_add(
+        self, account_name: str, tag: str, size: int = 0
     ):
         pass
-
-    @abstractmethod
-    async def verify_ready_to_add(self, account_name: str, tag: str):
-        pass
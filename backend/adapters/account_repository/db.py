@@ -23,14 +23,38 @@ class DatabaseAccountRepository(AbstractAccountRepository):
                     WHERE auth_token = $1;
                     """
 
-    UPDATE_ACTUAL_SIZE_BY_NAME_QUERY = f"""
+    RESERVE_QUERY = f"""
                     UPDATE {settings.accounts_table}
-                    SET actual_size = $2 WHERE name = $1;
+                    SET reserved_size = reserved_size + $2
+                    WHERE
+                        name = $1 AND
+                        actual_size + reserved_size + $2 <= total_size
+                    RETURNING name;
                     """
 
-    UPDATE_ACTUAL_SIZE_BY_EXCLUDED_NAMES_QUERY = f"""
-                    UPDATE {settings.accounts_table}
-                    SET actual_size = $2 WHERE NOT ( name = ANY($1::text[]));
+    LOCK_ALL_QUERY = f"""
+                    SELECT name FROM {settings.accounts_table}
+                    ORDER BY name
+                    FOR UPDATE;
+                    """
+
+    RECONCILE_ACTUAL_SIZES_QUERY = f"""
+                    UPDATE {settings.accounts_table} AS a
+                    SET actual_size = s.size
+                    FROM (
+                        SELECT
+                            accounts.name,
+                            COALESCE(SUM(files.size), 0) AS size
+                        FROM {settings.accounts_table} AS accounts
+                        LEFT JOIN {settings.files_table} AS files
+                        ON
+                            files.account_name = accounts.name AND
+                            files.has_stored = TRUE AND
+                            files.has_erased = FALSE
+                        GROUP BY accounts.name
+                    ) AS s
+                    WHERE a.name = s.name AND a.actual_size <> s.size
+                    RETURNING a.name;
                     """
 
     def __init__(self, conn):
@@ -56,29 +80,30 @@ class DatabaseAccountRepository(AbstractAccountRepository):
         logger.debug(f"Get account with token {auth_token}")
         return await self._get(self.GET_BY_TOKEN_QUERY, auth_token)
 
-    async def update_actual_size(self, name: str, size: int):
-        logger.debug(f"Set actual size {size} for account {name}")
-        return await self._conn.execute(
-            self.UPDATE_ACTUAL_SIZE_BY_NAME_QUERY, name, size
-        )
+    async def reconcile_actual_sizes(self) -> list[str]:
+        """
+        Занятое место поддерживается триггером на таблице файлов.
+        Пересчитывает его для всех аккаунтов и возвращает имена тех,
+        у которых оно расходилось с фактическим.
 
-    async def set_actual_size_for_excluded(
-        self, excluded_names: list[str], size: int = 0
-    ):
-        logger.debug(
-            f"Set actual size {size} for accounts where"
-            f" name isn't included in {excluded_names}"
-        )
-        await self._conn.execute(
-            self.UPDATE_ACTUAL_SIZE_BY_EXCLUDED_NAMES_QUERY,
-            excluded_names,
-            size,
-        )
+        """
+
+        logger.debug(f"Reconcile actual sizes of accounts")
+
+        #  Изменения файлов, зафиксированные после начала пересчета, уже
+        #  учтены триггером, и сумма их потеряла бы. Блокировка аккаунтов
+        #  дожидается таких изменений, а сумма считается отдельным запросом
+        #  уже после них. Должно выполняться внутри транзакции
+        await self._conn.execute(self.LOCK_ALL_QUERY)
+        rows = await self._conn.fetch(self.RECONCILE_ACTUAL_SIZES_QUERY)
+        return [x["name"] for x in rows]
 
     async def verify_ready_to_add(
-        self, account_name: str, tag: str
+        self, account_name: str, tag: str, size: int = 0
     ) -> Account:
-        logger.debug(f"Verify tag {tag} for account {account_name}")
+        logger.debug(
+            f"Verify tag {tag} and size {size} for account {account_name}"
+        )
         account_model: Account = await self.get_by_name(account_name)
 
         if not account_model.is_active:
@@ -87,7 +112,18 @@ class DatabaseAccountRepository(AbstractAccountRepository):
         if tag not in account_model.tags:
             raise exceptions.TagNotFoundInAccount
 
-        if account_model.actual_size >= account_model.total_size:
+        if size == 0:
+            if (
+                account_model.actual_size + account_model.reserved_size
+                >= account_model.total_size
+            ):
+                raise exceptions.NoSpaceInAccount
+
+        #  Проверка и резервирование одним запросом, чтобы параллельные
+        #  загрузки не превысили квоту
+        elif not await self._conn.fetchval(
+            self.RESERVE_QUERY, account_name, size
+        ):
             raise exceptions.NoSpaceInAccount
 
         return account_model
@@ -1,18 +1,34 @@
 import asyncio
 import hashlib
-import json
 import logging
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from typing import Awaitable, Callable
 from uuid import UUID
 
 import aioamqp
 from aioamqp.protocol import CONNECTING, OPEN
 
+from backend.adapters.cache import TTLCache
+from backend.tools import serialization
 from backend.tools.delay import DelayCalculator
 
 logger = logging.getLogger(__name__)
 
+#  Количество сообщений, ожидающих подтверждения от брокера одновременно
+PUBLISH_WINDOW_SIZE = 100
+PUBLISH_CONFIRM_TIMEOUT = 30
+
+#  Количество сообщений, получаемых от брокера без подтверждения
+CONSUME_PREFETCH_COUNT = 100
+CONSUME_CONCURRENCY = 4
+CONSUME_BATCH_SIZE = 50
+
+#  Количество и время хранения message_id последних обработанных
+#  сообщений. Более старые повторы отбрасываются базой данных
+IDEMPOTENCY_WINDOW_SIZE = 100000
+IDEMPOTENCY_WINDOW_TTL = 3600
+
 
 class AbstractRabbitExchangeConnector(ABC):
     def __init__(
@@ -125,6 +141,60 @@ class AbstractRabbitExchangeConnector(ABC):
         self._delay_calculator.done()
 
 
+class PublisherConfirms:
+    """
+    Ожидание подтверждений публикации (publisher confirms) канала.
+
+    aioamqp 0.15 ждет подтверждение каждого сообщения по отдельности и не
+    учитывает флаг multiple, которым брокер подтверждает сразу все
+    сообщения до delivery tag включительно. Поэтому delivery tag
+    считаются здесь, а ack/nack канала обрабатываются on_ack/on_nack.
+
+    """
+
+    def __init__(self):
+        self._next_tag = 1
+        self._waiters: OrderedDict[int, asyncio.Future] = OrderedDict()
+
+    def add(self) -> tuple[int, asyncio.Future]:
+        """
+        Регистрация сообщения. Вызывается непосредственно перед
+        публикацией, без переключения задач между ними, чтобы порядок
+        delivery tag совпадал с порядком отправки.
+
+        """
+
+        tag = self._next_tag
+        self._next_tag += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[tag] = waiter
+        return tag, waiter
+
+    def discard(self, tag: int):
+        self._waiters.pop(tag, None)
+
+    def settle(self, delivery_tag: int, multiple: bool, is_ok: bool):
+        if multiple:
+            tags = []
+            for tag in self._waiters:
+                if tag > delivery_tag:
+                    break
+                tags.append(tag)
+        else:
+            tags = [delivery_tag]
+
+        for tag in tags:
+            waiter = self._waiters.pop(tag, None)
+            if waiter is not None and not waiter.done():
+                waiter.set_result(is_ok)
+
+    async def on_ack(self, frame):
+        self.settle(frame.delivery_tag, frame.multiple, True)
+
+    async def on_nack(self, frame):
+        self.settle(frame.delivery_tag, frame.multiple, False)
+
+
 class RabbitPublisher(AbstractRabbitExchangeConnector):
     def __init__(
         self,
@@ -133,6 +203,8 @@ class RabbitPublisher(AbstractRabbitExchangeConnector):
         exchange_type="topic",
         exchange_durability=True,
         delay_calculator=DelayCalculator(limit=1),
+        window_size=PUBLISH_WINDOW_SIZE,
+        confirm_timeout=PUBLISH_CONFIRM_TIMEOUT,
     ):
         super().__init__(
             ampq_url,
@@ -142,6 +214,9 @@ class RabbitPublisher(AbstractRabbitExchangeConnector):
             delay_calculator=delay_calculator,
         )
         self._content_type = "application/json"
+        self._window_size = window_size
+        self._confirm_timeout = confirm_timeout
+        self._confirms = PublisherConfirms()
 
     async def _actions(self):
         await self._setup_exchange(self._exchange, self._exchange_type)
@@ -151,6 +226,13 @@ class RabbitPublisher(AbstractRabbitExchangeConnector):
         logger.info("Issuing consumer related RPC commands")
         await self._channel.confirm_select()
 
+        #  Подтверждения нового канала нумеруются с 1. Собственное
+        #  ожидание aioamqp в publish отключается, ack/nack приходят сюда
+        self._confirms = PublisherConfirms()
+        self._channel.publisher_confirms = False
+        self._channel.basic_server_ack = self._confirms.on_ack
+        self._channel.basic_server_nack = self._confirms.on_nack
+
     async def push_message(self, app, key, body, id: UUID | None = None):
         logger.info("Push new message")
 
@@ -161,7 +243,48 @@ class RabbitPublisher(AbstractRabbitExchangeConnector):
         logger.info(f"Sleep {self._interval_in_sec} before push message")
         await asyncio.sleep(self._interval_in_sec)
 
-        json_body = json.dumps(body, default=str).encode()
+        is_ok = await self._publish(app, key, body, id)
+        if is_ok:
+            self._reset_delay()
+
+        return is_ok
+
+    async def push_messages(
+        self, messages: list[tuple[str, str, dict, UUID | None]]
+    ) -> list[bool]:
+        """
+        Конвейерная отправка сообщений (app, key, body, id).
+
+        Одновременно ожидают подтверждения не более window_size сообщений,
+        подтверждения сопоставляются с сообщениями по delivery tag
+        (см. PublisherConfirms).
+        Возвращает признак подтверждения для каждого сообщения.
+
+        """
+
+        logger.info(f"Push {len(messages)} messages")
+
+        if self._channel is None or not self._channel.is_open:
+            self._should_reconnect = True
+            return [False] * len(messages)
+
+        logger.info(f"Sleep {self._interval_in_sec} before push messages")
+        await asyncio.sleep(self._interval_in_sec)
+
+        window = asyncio.Semaphore(self._window_size)
+
+        async def publish(app, key, body, id):
+            async with window:
+                return await self._publish(app, key, body, id)
+
+        results = await asyncio.gather(*(publish(*x) for x in messages))
+        if any(results):
+            self._reset_delay()
+
+        return results
+
+    async def _publish(self, app, key, body, id: UUID | None) -> bool:
+        json_body = serialization.dumps(body)
 
         uid = (
             str(id)
@@ -175,6 +298,8 @@ class RabbitPublisher(AbstractRabbitExchangeConnector):
             "content_type": self._content_type,
         }
 
+        confirms = self._confirms
+        tag, confirmed = confirms.add()
         try:
             await self._channel.publish(
                 json_body,
@@ -182,8 +307,11 @@ class RabbitPublisher(AbstractRabbitExchangeConnector):
                 routing_key=key,
                 properties=properties,
             )
+            if not await asyncio.wait_for(confirmed, self._confirm_timeout):
+                logger.error(f"Rejected by broker: {uid}")
+                return False
+
             logger.info(f"Published message uid: {uid}")
-            self._reset_delay()
             return True
 
         except Exception as e:
@@ -191,6 +319,9 @@ class RabbitPublisher(AbstractRabbitExchangeConnector):
             logger.info(e)
             return False
 
+        finally:
+            confirms.discard(tag)
+
     def _make_hash(self, app, key, content):
         h = hashlib.md5()  # noqa: S324
 
@@ -210,15 +341,18 @@ class RabbitConsumer(AbstractRabbitExchangeConnector):
         ampq_url,
         exchange,
         queue,
-        on_consume_message_callback: Callable[
-            [str, str, str, dict], Awaitable[bool]
+        on_consume_messages_callback: Callable[
+            [list[tuple[str, str, str, dict]]], Awaitable[bool]
         ],
         routing_key="#",
         exchange_type="topic",
         exchange_durability=True,
         queue_durability=True,
         delay_calculator=DelayCalculator(limit=1),
-        cache=None,
+        idempotency_window_size=IDEMPOTENCY_WINDOW_SIZE,
+        prefetch_count=CONSUME_PREFETCH_COUNT,
+        concurrency=CONSUME_CONCURRENCY,
+        batch_size=CONSUME_BATCH_SIZE,
     ):
         super().__init__(
             ampq_url,
@@ -231,12 +365,21 @@ class RabbitConsumer(AbstractRabbitExchangeConnector):
         self._dead_letter_exchange = f"{exchange}-dead-letter"
         self._queue_durability = queue_durability
         self._queue = queue
-        self._callback = on_consume_message_callback
+        self._callback = on_consume_messages_callback
         self._routing_key = routing_key
 
-        self._cache = cache
+        self._processed = TTLCache(
+            idempotency_window_size, IDEMPOTENCY_WINDOW_TTL
+        )
         self._consumer_tag = None
-        self._prefetch_count = 1
+        self._prefetch_count = prefetch_count
+        self._concurrency = concurrency
+        self._batch_size = batch_size
+
+        self._deliveries: asyncio.Queue | None = None
+        #  delivery tag -> None (обрабатывается), True (ack), False (nack)
+        self._unsettled: OrderedDict[int, bool | None] = OrderedDict()
+        self._workers: list[asyncio.Task] = []
 
     async def _actions(self):
         await self._setup_exchange(self._exchange, self._exchange_type)
@@ -288,6 +431,7 @@ class RabbitConsumer(AbstractRabbitExchangeConnector):
         logger.warning("Adding consumer cancellation callback")
         self._channel.add_cancellation_callback(self._on_consumer_cancelled)
 
+        self._start_workers()
         response = await self._channel.basic_consume(
             self._on_message,
             self._queue,
@@ -296,6 +440,24 @@ class RabbitConsumer(AbstractRabbitExchangeConnector):
         self._consumer_tag = response["consumer_tag"]
         self._delay_calculator.done()
 
+    def _start_workers(self):
+        #  Delivery tag уникален в пределах канала, поэтому при
+        #  переподключении очередь и неподтвержденные сообщения сбрасываются
+        self._stop_workers()
+        self._deliveries = asyncio.Queue()
+        self._unsettled = OrderedDict()
+        self._workers = [
+            asyncio.create_task(self._process(self._channel))
+            for _ in range(self._concurrency)
+        ]
+        logger.info("Started %d consumer workers", self._concurrency)
+
+    def _stop_workers(self):
+        for worker in self._workers:
+            worker.cancel()
+
+        self._workers = []
+
     async def _on_consumer_cancelled(self, _unused_channel, consumer_tag):
         logger.info(
             "Consumer was cancelled remotely, shutting down: %r",
@@ -313,67 +475,124 @@ class RabbitConsumer(AbstractRabbitExchangeConnector):
             envelope.routing_key,
         )
 
-        logger.info(f"Sleep {self._interval_in_sec} before consume message")
+        #  aioamqp не читает следующие кадры, пока выполняется callback,
+        #  поэтому сообщение только ставится в очередь обработчиков
+        self._unsettled[envelope.delivery_tag] = None
+        self._deliveries.put_nowait((envelope, properties, body))
+
+    async def _process(self, channel):
+        while True:
+            batch = [await self._deliveries.get()]
+            while (
+                len(batch) < self._batch_size and not self._deliveries.empty()
+            ):
+                batch.append(self._deliveries.get_nowait())
+
+            try:
+                await self._process_batch(channel, batch)
+            except Exception as e:
+                logger.error("Error during processing of RabbitMQ messages")
+                logger.info(e)
+
+    async def _process_batch(self, channel, batch):
+        logger.info(f"Sleep {self._interval_in_sec} before consume messages")
         await asyncio.sleep(self._interval_in_sec)
 
-        is_new_message = True
-        if self._cache and properties.message_id:
-            # Проверяем установлен message_id в кэше,
-            # чтобы исключить повторную обработку сообщения
-            is_new_message = (
-                not await self._cache.get(properties.message_id) == 1
-            )
+        results = {}
+        to_execute = []
+        for envelope, properties, body in batch:
+            if self._is_processed(properties.message_id):
+                logger.warning(
+                    f"Message with {properties.message_id}"
+                    f" has been already processed.",
+                )
+                results[envelope.delivery_tag] = True
+                continue
+
+            data = self._parse(properties, envelope, body)
+            results[envelope.delivery_tag] = data is not None
+            if data is not None:
+                to_execute.append((envelope.delivery_tag, data))
+
+        if to_execute:
+            # Обрабатываем полученные сообщения одной транзакцией
+            is_ok = await self._callback([x for _, x in to_execute])
+
+            for tag, data in to_execute:
+                # Если пакет не выполнен, повторяем сообщения по одному,
+                # чтобы в Dead Letter Exchange попали только ошибочные
+                results[tag] = is_ok or (
+                    len(to_execute) > 1 and await self._callback([data])
+                )
+
+                if results[tag] and data[0]:
+                    # Запоминаем message_id,
+                    # чтобы исключить повторную обработку сообщения
+                    self._processed.set(data[0], True)
+
+        await self._settle(channel, results)
+
+    def _is_processed(self, message_id: str | None) -> bool:
+        if not message_id:
+            return False
 
-        if not is_new_message:
-            logger.warning(
-                f"Message with {properties.message_id}"
-                f" has been already processed.",
-            )
-            await self._channel.basic_client_ack(envelope.delivery_tag)
-            return
+        # Проверяем, обрабатывалось ли сообщение недавно,
+        # чтобы не обращаться к базе данных повторно
+        return self._processed.get(message_id, False)
 
+    def _parse(
+        self, properties, envelope, body
+    ) -> tuple[str, str, str, dict] | None:
         try:
-            # Обрабатываем полученное сообщение
-            data = (
+            return (
                 properties.message_id,
                 properties.app_id,
                 envelope.routing_key,
-                json.loads(body),
+                serialization.loads(body),
             )
-        except json.decoder.JSONDecodeError:
+        except serialization.DecodeError:
             logger.info(
                 f"JSONDecodeError during parsing of body"
                 f" of RabbitMQ message {properties.message_id}",
             )
-            return
         except Exception as e:
             logger.info(
                 f"Unknown exception {e} during parsing of body"
                 f" of RabbitMQ message {properties.message_id}",
             )
+
+        return None
+
+    async def _settle(self, channel, results: dict[int, bool]):
+        if channel is not self._channel:
             return
 
-        is_executed_successfully = await self._callback(*data)
+        for tag, is_ok in results.items():
+            if not is_ok:
+                logger.info("Send message %s to Dead Letter Exchange", tag)
+                await channel.basic_client_nack(tag, requeue=False)
 
-        if is_executed_successfully:
-            logger.info("Acknowledging message %s", envelope.delivery_tag)
-            await self._channel.basic_client_ack(envelope.delivery_tag)
+            self._unsettled[tag] = is_ok
 
-            if self._cache and properties.message_id:
-                # Устанавливаем message_id в кэш,
-                # чтобы исключить повторную обработку сообщения
-                await self._cache.set(properties.message_id, 1)
-        else:
-            logger.info(
-                "Send message %s to Dead Letter Exchange",
-                envelope.delivery_tag,
-            )
-            await self._channel.basic_client_nack(
-                envelope.delivery_tag,
-                requeue=False,
-            )
+        #  Подтверждаем одним ack (multiple) все сообщения до первого,
+        #  которое еще обрабатывается
+        ack_tag = None
+        while self._unsettled:
+            tag, is_ok = next(iter(self._unsettled.items()))
+            if is_ok is None:
+                break
+
+            self._unsettled.popitem(last=False)
+            if is_ok:
+                ack_tag = tag
+
+        if ack_tag is not None:
+            logger.info("Acknowledging messages up to %s", ack_tag)
+            await channel.basic_client_ack(ack_tag, multiple=True)
 
     async def _stop(self):
+        self._stop_workers()
+
         if self._channel:
             logger.info("Sending a Basic.Cancel RPC command to RabbitMQ")
             await self._channel.basic_cancel(self._consumer_tag)
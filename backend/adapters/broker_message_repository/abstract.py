@@ -39,16 +39,32 @@ class AbstractBrokerMessageRepository(ABC):
     ) -> BrokerMessage:
         pass
 
+    @abstractmethod
+    async def add_outgoing_many(
+        self, messages: list[tuple[str, dict]], delay_in_seconds: int = 0
+    ) -> list[UUID]:
+        pass
+
     @abstractmethod
     async def add_incoming(
-        self, app: str, key: str, body: dict, delay_in_seconds: int = 0
-    ) -> BrokerMessage:
+        self, id: UUID, app: str, key: str, body: dict
+    ) -> BrokerMessage | None:
+        pass
+
+    @abstractmethod
+    async def add_incoming_many(
+        self, messages: list[tuple[UUID, str, str, dict]]
+    ) -> list[UUID]:
         pass
 
     @abstractmethod
     async def mark_as_executed(self, ids: list[UUID]):
         pass
 
+    @abstractmethod
+    async def renew_lease(self, ids: list[UUID]):
+        pass
+
     @abstractmethod
     async def schedule_next_retry(self, ids: list[UUID]):
         pass
@@ -1,4 +1,5 @@
 import logging
+import os
 from uuid import UUID, uuid4
 
 from backend.core import exceptions
@@ -11,20 +12,38 @@ logger = logging.getLogger(__name__)
 
 
 class DatabaseBrokerMessageRepository(AbstractBrokerMessageRepository):
+    LEASE_OWNER = f"{settings.server_name}:{os.getpid()}"
+
     GET_BY_ID_QUERY = (
         f"SELECT * FROM {settings.broker_messages_table} WHERE id = $1;"
     )
 
     GET_DIRECTIONAL_BY_ID_QUERY = f"SELECT * FROM {settings.broker_messages_table} WHERE id = $1 AND direction = $2;"
 
-    GET_NOT_EXECUTED_MESSAGES_QUERY = f"""
-                        SELECT * FROM {settings.broker_messages_table}
-                        WHERE
-                            direction = $1 AND
-                            has_executed = FALSE AND
-                            has_execution_stopped = FALSE AND
-                            next_retry_at < $2
-                        LIMIT $3;
+    #  Сообщения, выбранные другим обработчиком, пропускаются (SKIP LOCKED)
+    #  до окончания срока аренды. UPDATE ... RETURNING не сохраняет
+    #  порядок, поэтому сообщения сортируются внешним запросом
+    CLAIM_NOT_EXECUTED_MESSAGES_QUERY = f"""
+                        WITH claimed AS (
+                        UPDATE {settings.broker_messages_table}
+                        SET
+                            leased_until = $2::timestamptz + INTERVAL '1 second' * $5,
+                            leased_by = $4
+                        WHERE id = ANY(ARRAY(
+                            SELECT id FROM {settings.broker_messages_table}
+                            WHERE
+                                direction = $1 AND
+                                has_executed = FALSE AND
+                                has_execution_stopped = FALSE AND
+                                next_retry_at < $2 AND
+                                (leased_until IS NULL OR leased_until < $2)
+                            ORDER BY next_retry_at
+                            LIMIT $3
+                            FOR UPDATE SKIP LOCKED
+                        ))
+                        RETURNING *
+                        )
+                        SELECT * FROM claimed ORDER BY next_retry_at, created;
                         """
 
     ADD_QUERY = f"""
@@ -44,13 +63,69 @@ class DatabaseBrokerMessageRepository(AbstractBrokerMessageRepository):
                             seconds_to_next_retry
                         )
                     VALUES
-                        ($1, $2, $3, $4, $5::jsonb, $6, $7, $8, $9, $10, $11, $12);
+                        ($1, $2, $3, $4, $5::jsonb, $6, $7, $8, $9, $10, $11, $12)
+                    RETURNING *;
                     """
 
+    #  Повторно полученные сообщения отбрасываются по первичному ключу
+    ADD_INCOMING_QUERY = f"""
+                    INSERT INTO {settings.broker_messages_table}
+                        (
+                            id,
+                            direction,
+                            app,
+                            "key",
+                            body,
+                            has_executed,
+                            created,
+                            updated,
+                            has_execution_stopped,
+                            count_of_retries,
+                            next_retry_at,
+                            seconds_to_next_retry
+                        )
+                    SELECT
+                        m.id, 'I', m.app, m.key, m.body, FALSE,
+                        $5, $5, FALSE, 0, $5, 1
+                    FROM unnest(
+                        $1::uuid[], $2::text[], $3::text[], $4::jsonb[]
+                    ) AS m(id, app, key, body)
+                    ON CONFLICT (id) DO NOTHING
+                    RETURNING *;
+                    """
+
+    ADD_MANY_COLUMNS = [
+        "id",
+        "direction",
+        "app",
+        "key",
+        "body",
+        "has_executed",
+        "created",
+        "updated",
+        "has_execution_stopped",
+        "count_of_retries",
+        "next_retry_at",
+        "seconds_to_next_retry",
+    ]
+
+    #  Изменяются только сообщения, арендованные этим обработчиком. Если
+    #  аренда истекла и перешла к другому, его состояние не перезаписывается
     MARK_AS_EXECUTED_QUERY = f"""
                             UPDATE {settings.broker_messages_table}
-                            SET updated = $2, has_executed = TRUE
-                            WHERE id = ANY($1::uuid[]);
+                            SET
+                                updated = $2,
+                                has_executed = TRUE,
+                                leased_until = NULL,
+                                leased_by = NULL
+                            WHERE id = ANY($1::uuid[]) AND leased_by = $3;
+                        """
+
+    #  Аренда продлевается, пока пачка выполняется дольше срока аренды
+    RENEW_LEASE_QUERY = f"""
+                            UPDATE {settings.broker_messages_table}
+                            SET leased_until = $2::timestamptz + INTERVAL '1 second' * $4
+                            WHERE id = ANY($1::uuid[]) AND leased_by = $3;
                         """
 
     SCHEDULE_NEXT_RETRY_QUERY = f"""
@@ -59,8 +134,11 @@ class DatabaseBrokerMessageRepository(AbstractBrokerMessageRepository):
                                 updated = $2,
                                 count_of_retries = count_of_retries + 1,
                                 next_retry_at = $2::timestamptz + INTERVAL '1 second' * seconds_to_next_retry,
-                                seconds_to_next_retry = seconds_to_next_retry * 2
-                            WHERE id = ANY($1::uuid[]);
+                                seconds_to_next_retry = seconds_to_next_retry * 2,
+                                leased_until = NULL,
+                                leased_by = NULL
+                            WHERE id = ANY($1::uuid[]) AND leased_by = $3
+                            RETURNING id;
                         """
 
     MARK_AS_FAILED_QUERY = f"""
@@ -93,12 +171,14 @@ class DatabaseBrokerMessageRepository(AbstractBrokerMessageRepository):
     async def _get_not_executed(
         self, direction: str, chunk_size: int
     ) -> list[BrokerMessage]:
-        logger.debug(f"Get not executed {direction} broker messages.")
+        logger.debug(f"Claim not executed {direction} broker messages.")
         rows = await self._conn.fetch(
-            self.GET_NOT_EXECUTED_MESSAGES_QUERY,
+            self.CLAIM_NOT_EXECUTED_MESSAGES_QUERY,
             direction,
             tz_now(),
             chunk_size,
+            self.LEASE_OWNER,
+            settings.broker_messages_lease_time,
         )
         return [self._convert_row_to_obj(x) for x in rows]
 
@@ -128,7 +208,7 @@ class DatabaseBrokerMessageRepository(AbstractBrokerMessageRepository):
             """
         )
 
-        await self._conn.execute(
+        row = await self._conn.fetchrow(
             self.ADD_QUERY,
             id,
             direction,
@@ -143,8 +223,7 @@ class DatabaseBrokerMessageRepository(AbstractBrokerMessageRepository):
             tz_now(delay_in_seconds),
             1,
         )
-
-        return await self.get_by_id(id)
+        return self._convert_row_to_obj(row)
 
     async def add_outgoing(
         self, key: str, body: dict, delay_in_seconds: int
@@ -153,27 +232,84 @@ class DatabaseBrokerMessageRepository(AbstractBrokerMessageRepository):
             self.OUT_DIRECTION, settings.app_name, key, body, delay_in_seconds
         )
 
+    async def add_outgoing_many(
+        self, messages: list[tuple[str, dict]], delay_in_seconds: int = 0
+    ) -> list[UUID]:
+        logger.debug(f"Add {len(messages)} outgoing broker messages")
+        now, next_retry_at = tz_now(), tz_now(delay_in_seconds)
+        records = [
+            (
+                uuid4(),
+                self.OUT_DIRECTION,
+                settings.app_name,
+                key,
+                body,
+                False,
+                now,
+                now,
+                False,
+                0,
+                next_retry_at,
+                1,
+            )
+            for key, body in messages
+        ]
+
+        #  COPY вместо INSERT на каждое сообщение
+        await self._conn.copy_records_to_table(
+            settings.broker_messages_table,
+            records=records,
+            columns=self.ADD_MANY_COLUMNS,
+        )
+        return [x[0] for x in records]
+
     async def add_incoming(
         self, id: UUID, app: str, key: str, body: dict
-    ) -> BrokerMessage:
-        try:
-            return await self.get_by_id(id, self.IN_DIRECTION)
-        except exceptions.FileNotFound:
-            return await self._add(self.IN_DIRECTION, app, key, body, 0)
+    ) -> BrokerMessage | None:
+        rows = await self._add_incoming([(id, app, key, body)])
+        return self._convert_row_to_obj(rows[0]) if rows else None
+
+    async def add_incoming_many(
+        self, messages: list[tuple[UUID, str, str, dict]]
+    ) -> list[UUID]:
+        rows = await self._add_incoming(messages)
+        return [x["id"] for x in rows]
+
+    async def _add_incoming(self, messages: list[tuple[UUID, str, str, dict]]):
+        logger.debug(f"Add {len(messages)} incoming broker messages")
+        ids, apps, keys, bodies = zip(*messages) if messages else ([],) * 4
+        return await self._conn.fetch(
+            self.ADD_INCOMING_QUERY, ids, apps, keys, bodies, tz_now()
+        )
 
     async def mark_as_executed(self, ids: list[UUID]):
         logger.debug(f"Mark broker messages as executed. IDs: {ids}")
-        await self._conn.execute(self.MARK_AS_EXECUTED_QUERY, ids, tz_now())
+        await self._conn.execute(
+            self.MARK_AS_EXECUTED_QUERY, ids, tz_now(), self.LEASE_OWNER
+        )
+
+    async def renew_lease(self, ids: list[UUID]):
+        logger.debug(f"Renew lease of broker messages. IDs: {ids}")
+        await self._conn.execute(
+            self.RENEW_LEASE_QUERY,
+            ids,
+            tz_now(),
+            self.LEASE_OWNER,
+            settings.broker_messages_lease_time,
+        )
 
     async def schedule_next_retry(self, ids: list[UUID]):
         logger.debug(f"Schedule next retry for broker messages. IDs: {ids} ")
-        await self._conn.execute(
+        rows = await self._conn.fetch(
             self.SCHEDULE_NEXT_RETRY_QUERY,
             ids,
             tz_now(),
+            self.LEASE_OWNER,
         )
         await self._conn.execute(
-            self.MARK_AS_FAILED_QUERY, ids, settings.broker.publish_retry_count
+            self.MARK_AS_FAILED_QUERY,
+            [x["id"] for x in rows],
+            settings.broker.publish_retry_count,
         )
 
     async def delete_executed(self):
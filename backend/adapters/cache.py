@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from typing import Any, Hashable
+from uuid import UUID
+
+from asyncpg import Connection
+
+from backend.adapters.db import listen, unlisten
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Кэш ограниченного размера: записи вытесняются по давности
+    использования (LRU) и истекают через заданное время.
+
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._generation = 0
+        self._enabled = True
+
+    @property
+    def generation(self) -> int:
+        """
+        Номер поколения, увеличивается при каждой инвалидации. Значение,
+        прочитанное из источника, можно записать в кэш, только если
+        поколение не изменилось за время чтения.
+
+        """
+
+        return self._generation
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        if not self._enabled:
+            return default
+
+        item = self._data.get(key)
+        if item is None:
+            return default
+
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        if not self._enabled:
+            return
+
+        expires = time.monotonic() + (self._ttl if ttl is None else ttl)
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._generation += 1
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._generation += 1
+        self._data.clear()
+
+    def disable(self):
+        """
+        Очистка кэша. До вызова enable записи не сохраняются.
+
+        """
+
+        self._enabled = False
+        self.clear()
+
+    def enable(self):
+        #  Значения, прочитанные до включения, не записываются
+        self._generation += 1
+        self._enabled = True
+
+
+auth_token_cache: TTLCache | None = None
+listener: Connection | None = None
+listener_task: asyncio.Task | None = None
+
+
+async def init_auth_token_cache(
+    maxsize: int, ttl: float, channel: str, check_interval: float, **dsl
+) -> TTLCache:
+    global auth_token_cache, listener_task
+    if not auth_token_cache:
+        logger.info("Creating auth token cache ..")
+        auth_token_cache = TTLCache(maxsize, ttl)
+
+        #  Записи сбрасываются при изменении аккаунтов в БД. Пока подписки
+        #  нет, кэш не используется
+        await _listen_accounts(channel, **dsl)
+        listener_task = asyncio.create_task(
+            _keep_listening_accounts(channel, check_interval, **dsl)
+        )
+
+    return auth_token_cache
+
+
+async def _listen_accounts(channel: str, **dsl):
+    global listener
+    listener = await listen(
+        channel,
+        invalidate_auth_token_cache,
+        on_lost=_on_listener_lost,
+        **dsl,
+    )
+    auth_token_cache.enable()
+
+
+def _on_listener_lost():
+    if auth_token_cache is not None:
+        auth_token_cache.disable()
+
+
+async def _keep_listening_accounts(channel: str, interval: float, **dsl):
+    """
+    Проверка подписки и ее восстановление. Потеря соединения без разрыва
+    (например, при разделении сети) обнаруживается по запросу с таймаутом.
+
+    """
+
+    global listener
+    while True:
+        await asyncio.sleep(interval)
+
+        if listener is not None and not listener.is_closed():
+            try:
+                await asyncio.wait_for(listener.fetchval("SELECT 1"), interval)
+                continue
+            except Exception as e:
+                logger.warning("Listener of auth token cache is not alive")
+                logger.info(e)
+                listener.terminate()
+
+        _on_listener_lost()
+        listener = None
+
+        try:
+            await _listen_accounts(channel, **dsl)
+        except Exception as e:
+            logger.error("Error during listening changes of accounts")
+            logger.info(e)
+
+
+async def get_auth_token_cache() -> TTLCache | None:
+    return auth_token_cache
+
+
+def invalidate_auth_token_cache(payload: str):
+    if auth_token_cache is None:
+        return
+
+    #  Пустое сообщение - сбросить весь кэш
+    if not payload:
+        logger.info("Auth token cache has been cleared")
+        auth_token_cache.clear()
+        return
+
+    try:
+        auth_token_cache.delete(UUID(payload))
+    except ValueError:
+        auth_token_cache.clear()
+
+
+async def close_auth_token_cache():
+    global auth_token_cache, listener, listener_task
+    if listener_task:
+        listener_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await listener_task
+        listener_task = None
+
+    if listener:
+        await unlisten(listener)
+        listener = None
+
+    auth_token_cache = None
@@ -1,18 +1,48 @@
-import json
 import logging
+from typing import Callable
 
 import asyncpg
-from asyncpg import Pool
+from asyncpg import Connection, Pool
 
+from backend.tools import serialization
 from backend.tools.decorators import backoff
 
 logger = logging.getLogger(__name__)
 pool: Pool | None = None
 
 
+JSONB_VERSION = b"\x01"
+
+
+def _encode_jsonb(value) -> bytes:
+    return JSONB_VERSION + serialization.dumps(value)
+
+
+def _decode_jsonb(data: bytes):
+    return serialization.loads(data[1:])
+
+
+async def init_connection(conn: Connection):
+    """
+    Настройка нового физического соединения пула. Вызывается один раз
+    на соединение, а не на каждый acquire.
+
+    """
+
+    #  Двоичный формат jsonb: номер версии и текст JSON. Он нужен и для
+    #  COPY, который передает данные только в двоичном виде
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=_encode_jsonb,
+        decoder=_decode_jsonb,
+        schema="pg_catalog",
+        format="binary",
+    )
+
+
 @backoff()
 async def create_pool(**dsl):
-    return await asyncpg.create_pool(**dsl)
+    return await asyncpg.create_pool(init=init_connection, **dsl)
 
 
 async def init_db(**dsl):
@@ -27,14 +57,6 @@ async def init_db(**dsl):
 async def get_db_conn(**dsl):
     pool = await init_db(**dsl)
     conn = await pool.acquire()
-
-    await conn.set_type_codec(
-        "jsonb",
-        encoder=lambda x: json.dumps(x, default=str),
-        decoder=json.loads,
-        schema="pg_catalog",
-    )
-
     logger.debug(
         f"DB connection {id(conn)} for pool {id(pool)} has been acquired",
     )
@@ -55,3 +77,51 @@ async def close_db():
         logger.info(f"Closing DB pool {id(pool)} ... ")
         await pool.close()
         logger.info("DB pool has been closed")
+
+
+async def connect(**dsl) -> Connection:
+    """
+    Отдельное соединение вне пула для служебных запросов, которые
+    не должны ждать освобождения соединения пула.
+
+    """
+
+    conn = await asyncpg.connect(**dsl)
+    await init_connection(conn)
+    return conn
+
+
+@backoff()
+async def listen(
+    channel: str,
+    callback: Callable[[str], None],
+    on_lost: Callable[[], None] | None = None,
+    **dsl,
+) -> Connection:
+    """
+    Подписка на уведомления (LISTEN) канала. Для подписки открывается
+    отдельное соединение, чтобы не занимать соединение пула.
+    При потере соединения вызывается on_lost: уведомления, отправленные
+    после этого, получены не будут.
+
+    """
+
+    conn = await asyncpg.connect(**dsl)
+
+    def on_notification(conn, pid, channel, payload):
+        callback(payload)
+
+    def on_termination(conn):
+        logger.warning(f"Listener of channel {channel} has been terminated")
+        if on_lost is not None:
+            on_lost()
+
+    conn.add_termination_listener(on_termination)
+    await conn.add_listener(channel, on_notification)
+    logger.info(f"Listening channel {channel} on connection {id(conn)}")
+    return conn
+
+
+async def unlisten(conn: Connection):
+    if not conn.is_closed():
+        await conn.close()
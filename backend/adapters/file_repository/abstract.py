@@ -1,9 +1,11 @@
 import logging
 from abc import ABC, abstractmethod
-from typing import AsyncGenerator, Awaitable, Callable, Coroutine
+from typing import (AsyncGenerator, AsyncIterator, Awaitable, Callable,
+                    Coroutine)
 from uuid import UUID
 
-from backend.adapters.file_storage.abstract import AbstractFileStorage
+from backend.adapters.file_storage.abstract import (AbstractFileStorage,
+                                                    SavedFile)
 from backend.domain.models import File
 
 logger = logging.getLogger(__name__)
@@ -22,48 +24,110 @@ class AbstractFileRepository(ABC):
 
     @abstractmethod
     async def get_stored_and_not_deleted(
-        self, chunk_size: int, offset: int
+        self, chunk_size: int, after: UUID | None = None
     ) -> list[File]:
         pass
 
+    @abstractmethod
+    def iterate_stored_and_not_deleted(
+        self, prefetch: int
+    ) -> AsyncIterator[File]:
+        pass
+
     @abstractmethod
     async def get_not_stored(self, id: UUID) -> File:
         pass
 
     @abstractmethod
     async def add(
-        self, account_name: str, file_id: UUID | None = None
+        self,
+        account_name: str,
+        tag: str,
+        file_id: UUID | None = None,
+        reserved_size: int = 0,
     ) -> File:
         pass
 
     @abstractmethod
     async def take(
-        self, file_id: UUID
+        self, file_id: UUID, offset: int = 0, length: int | None = None
     ) -> Coroutine[None, None, AsyncGenerator[bytes, None]]:
         pass
 
+    @abstractmethod
+    async def take_encoded(
+        self, file_id: UUID, encodings: list[str]
+    ) -> tuple[str, AsyncGenerator[bytes, None]] | None:
+        pass
+
+    @abstractmethod
+    async def take_path(self, file_id: UUID) -> str | None:
+        pass
+
     @abstractmethod
     async def store(
         self,
         file_id: UUID,
         get_coro_with_bytes_func: Callable[[int], Awaitable[bytearray]],
+    ) -> SavedFile:
+        pass
+
+    @abstractmethod
+    async def claim(self, file_id: UUID, saved: SavedFile):
+        pass
+
+    @abstractmethod
+    async def store_by_checksum(
+        self, file_id: UUID, checksum: str
+    ) -> SavedFile | None:
+        pass
+
+    @abstractmethod
+    async def store_part(
+        self,
+        file_id: UUID,
+        offset: int,
+        get_coro_with_bytes_func: Callable[[int], Awaitable[bytearray]],
     ) -> int:
         pass
 
+    @abstractmethod
+    async def commit_parts(self, file_id: UUID, size: int) -> SavedFile:
+        pass
+
     @abstractmethod
     async def mark_as_stored(
-        self, file_id: UUID, name: str, size: int
+        self, file_id: UUID, name: str, size: int, checksum: str = ""
     ) -> File:
         pass
 
+    @abstractmethod
+    async def release_reserved(self, file_id: UUID):
+        pass
+
+    @abstractmethod
+    async def release_expired_reserved(self):
+        pass
+
     @abstractmethod
     async def delete(self, account_name: str, file_id: UUID) -> File:
         pass
 
     @abstractmethod
-    async def erase(self, file_id: UUID):
+    async def erase(self, file_id: UUID) -> list[UUID]:
         pass
 
     @abstractmethod
-    async def get_actual_account_sizes(self) -> list[tuple[str, int]]:
+    async def erase_many(
+        self, file_ids: list[UUID]
+    ) -> tuple[list[UUID], list[UUID]]:
+        pass
+
+    @abstractmethod
+    async def get_deleted_and_not_erased(
+        self,
+        storage_time_in_sec: int,
+        chunk_size: int,
+        after: File | None = None,
+    ) -> list[File]:
         pass
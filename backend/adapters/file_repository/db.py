@@ -1,9 +1,11 @@
 import logging
+from collections import Counter
 from collections.abc import AsyncIterator
 from typing import AsyncGenerator, Awaitable, Callable, Coroutine
 from uuid import UUID, uuid4
 
-from backend.adapters.file_storage.abstract import AbstractFileStorage
+from backend.adapters.file_storage.abstract import (AbstractFileStorage,
+                                                    ClaimCallback, SavedFile)
 from backend.core import exceptions
 from backend.core.config import settings, tz_now
 from backend.domain.models import File
@@ -24,7 +26,17 @@ class DatabaseFileRepository(AbstractFileRepository):
     GET_ALL_STORED_AND_NOT_DELETED_QUERY = f"""
                     SELECT * FROM {settings.files_table}
                     WHERE has_stored = TRUE AND has_deleted = FALSE
-                    LIMIT $1 OFFSET $2;
+                    ORDER BY id;
+                    """
+
+    GET_STORED_AND_NOT_DELETED_AFTER_QUERY = f"""
+                    SELECT * FROM {settings.files_table}
+                    WHERE
+                        has_stored = TRUE AND
+                        has_deleted = FALSE AND
+                        ($2::uuid IS NULL OR id > $2)
+                    ORDER BY id
+                    LIMIT $1;
                     """
 
     GET_DELETED_BY_ID_QUERY = f"""
@@ -35,11 +47,25 @@ class DatabaseFileRepository(AbstractFileRepository):
                     AND has_erased = FALSE;
                     """
 
-    GET_ALL_DELETED_AND_NOT_ERASED_QUERY = f"""
+    GET_DELETED_AND_NOT_ERASED_AFTER_QUERY = f"""
                     SELECT * FROM {settings.files_table}
                     WHERE has_deleted = TRUE
                     AND has_erased = FALSE
-                    AND deleted < $1;
+                    AND deleted < $1
+                    AND ($2::timestamptz IS NULL OR (deleted, id) > ($2, $3))
+                    ORDER BY deleted, id
+                    LIMIT $4;
+                    """
+
+    LOCK_DELETED_QUERY = f"""
+                    SELECT id, stored_id FROM {settings.files_table}
+                    WHERE
+                        id = ANY($1::uuid[]) AND
+                        has_stored = TRUE AND
+                        has_deleted = TRUE AND
+                        has_erased = FALSE
+                    ORDER BY id
+                    FOR UPDATE;
                     """
 
     ADD_QUERY = f"""
@@ -51,10 +77,12 @@ class DatabaseFileRepository(AbstractFileRepository):
                             name,
                             size,
                             tag,
-                            created
+                            created,
+                            reserved_size
                         )
                     VALUES
-                        ($1, $2, $3, $4, $5, $6, $7);
+                        ($1, $2, $3, $4, $5, $6, $7, $8)
+                    RETURNING *;
                     """
 
     STORE_QUERY = f"""
@@ -62,9 +90,11 @@ class DatabaseFileRepository(AbstractFileRepository):
                     SET
                         name = $2,
                         size = $3,
+                        checksum = $4,
                         has_stored = TRUE,
-                        stored = $4
-                    WHERE id = $1 AND has_stored = FALSE;
+                        stored = $5
+                    WHERE id = $1 AND has_stored = FALSE
+                    RETURNING *;
                     """
 
     DELETE_QUERY = f"""
@@ -74,22 +104,114 @@ class DatabaseFileRepository(AbstractFileRepository):
                         account_name = $1 AND
                         id = $2 AND
                         has_stored = TRUE AND
-                        has_deleted = FALSE;
+                        has_deleted = FALSE
+                    RETURNING *;
                     """
 
     ERASE_QUERY = f"""
                     UPDATE {settings.files_table}
                     SET has_erased = TRUE, erased = $2
-                    WHERE id = $1 AND has_deleted = TRUE AND has_erased = FALSE;
+                    WHERE
+                        id = ANY($1::uuid[]) AND
+                        has_deleted = TRUE AND
+                        has_erased = FALSE
+                    RETURNING id;
                     """
 
-    GET_ACTUAL_SIZE_BY_ACCOUNT_QUERY = f"""
-                    SELECT account_name, SUM(size) as size
-                    FROM {settings.files_table}
-                    WHERE 
-                        has_stored = TRUE AND
-                        has_erased = FALSE
-                    GROUP BY account_name;
+    RELEASE_RESERVED_QUERY = f"""
+                    WITH released AS (
+                        SELECT id, account_name, reserved_size
+                        FROM {settings.files_table}
+                        WHERE id = $1 AND reserved_size > 0
+                        FOR UPDATE
+                    ), cleared AS (
+                        UPDATE {settings.files_table} AS files
+                        SET reserved_size = 0
+                        FROM released WHERE files.id = released.id
+                    )
+                    UPDATE {settings.accounts_table} AS accounts
+                    SET reserved_size = GREATEST(
+                        accounts.reserved_size - released.reserved_size, 0
+                    )
+                    FROM released
+                    WHERE accounts.name = released.account_name;
+                    """
+
+    RELEASE_EXPIRED_RESERVED_QUERY = f"""
+                    WITH released AS (
+                        SELECT id, account_name, reserved_size
+                        FROM {settings.files_table} AS files
+                        WHERE
+                            reserved_size > 0 AND
+                            has_stored = FALSE AND
+                            NOT EXISTS (
+                                SELECT 1 FROM {settings.links_table} AS links
+                                WHERE
+                                    links.file_id = files.id AND
+                                    links.expired > now()
+                            )
+                        FOR UPDATE
+                    ), cleared AS (
+                        UPDATE {settings.files_table} AS files
+                        SET reserved_size = 0
+                        FROM released WHERE files.id = released.id
+                    ), delta AS (
+                        SELECT account_name, SUM(reserved_size) AS size
+                        FROM released
+                        GROUP BY account_name
+                    )
+                    UPDATE {settings.accounts_table} AS accounts
+                    SET reserved_size = GREATEST(
+                        accounts.reserved_size - delta.size, 0
+                    )
+                    FROM delta
+                    WHERE accounts.name = delta.account_name;
+                    """
+
+    SET_STORED_ID_QUERY = f"""
+                    UPDATE {settings.files_table}
+                    SET stored_id = $2
+                    WHERE id = $1 AND has_stored = FALSE;
+                    """
+
+    ACQUIRE_BLOB_QUERY = f"""
+                    INSERT INTO {settings.blobs_table}
+                        (id, checksum, size, refs, created)
+                    VALUES
+                        ($1, $2, $3, 1, $4)
+                    ON CONFLICT (id) DO UPDATE
+                    SET refs = {settings.blobs_table}.refs + 1;
+                    """
+
+    ACQUIRE_BLOB_BY_CHECKSUM_QUERY = f"""
+                    UPDATE {settings.blobs_table}
+                    SET refs = refs + 1
+                    WHERE id = (
+                        SELECT id FROM {settings.blobs_table}
+                        WHERE checksum = $1 AND refs > 0
+                        LIMIT 1
+                        FOR UPDATE
+                    )
+                    RETURNING *;
+                    """
+
+    GET_BLOBS_REFS_FOR_UPDATE_QUERY = f"""
+                    SELECT id, refs FROM {settings.blobs_table}
+                    WHERE id = ANY($1::uuid[])
+                    ORDER BY id
+                    FOR UPDATE;
+                    """
+
+    RELEASE_BLOBS_QUERY = f"""
+                    UPDATE {settings.blobs_table} AS blobs
+                    SET refs = blobs.refs - released.count
+                    FROM unnest($1::uuid[], $2::int[]) AS released (id, count)
+                    WHERE blobs.id = released.id;
+                    """
+
+    DELETE_BLOBS_QUERY = f"""
+                    DELETE FROM {settings.blobs_table}
+                    WHERE id = ANY($1::uuid[]);
                     """
 
     def __init__(self, storage: AbstractFileStorage, conn):
@@ -111,31 +233,54 @@ class DatabaseFileRepository(AbstractFileRepository):
         return await self._get(self.GET_BY_ID_QUERY, id)
 
     async def get_stored_and_not_deleted(
-        self, chunk_size: int, offset: int
+        self, chunk_size: int, after: UUID | None = None
     ) -> list[File]:
-        logger.debug(f"Get stored and not deleted files.")
+        logger.debug(f"Get stored and not deleted files after {after}.")
         rows = await self._conn.fetch(
-            self.GET_ALL_STORED_AND_NOT_DELETED_QUERY, chunk_size, offset
+            self.GET_STORED_AND_NOT_DELETED_AFTER_QUERY, chunk_size, after
         )
         return [self._convert_row_to_obj(x) for x in rows]
 
+    async def iterate_stored_and_not_deleted(
+        self, prefetch: int
+    ) -> AsyncIterator[File]:
+        """
+        Все сохраненные и не удаленные файлы через курсор на стороне БД.
+        Должен использоваться внутри транзакции.
+
+        """
+
+        logger.debug(f"Iterate stored and not deleted files.")
+        async for row in self._conn.cursor(
+            self.GET_ALL_STORED_AND_NOT_DELETED_QUERY, prefetch=prefetch
+        ):
+            yield self._convert_row_to_obj(row)
+
     async def get_deleted(self, id: UUID) -> File:
         return await self._get(self.GET_DELETED_BY_ID_QUERY, id)
 
     async def get_deleted_and_not_erased(
-        self, storage_time_in_sec: int
+        self,
+        storage_time_in_sec: int,
+        chunk_size: int,
+        after: File | None = None,
     ) -> list[File]:
-        logger.info(f"Get deleted and not erased files.")
-        print(tz_now(-1 * storage_time_in_sec))
-
+        logger.debug(f"Get deleted and not erased files after {after}.")
         rows = await self._conn.fetch(
-            self.GET_ALL_DELETED_AND_NOT_ERASED_QUERY,
+            self.GET_DELETED_AND_NOT_ERASED_AFTER_QUERY,
             tz_now(-1 * storage_time_in_sec),
+            after.deleted if after else None,
+            after.id if after else None,
+            chunk_size,
         )
         return [self._convert_row_to_obj(x) for x in rows]
 
     async def add(
-        self, account_name: str, tag: str, file_id: UUID | None = None
+        self,
+        account_name: str,
+        tag: str,
+        file_id: UUID | None = None,
+        reserved_size: int = 0,
     ) -> File:
         if file_id is None:
             file_id = uuid4()
@@ -145,7 +290,7 @@ class DatabaseFileRepository(AbstractFileRepository):
             f"Add empty file with account name {account_name}, "
             f"id {file_id}, stored_id {stored_id}"
         )
-        await self._conn.execute(
+        row = await self._conn.fetchrow(
             self.ADD_QUERY,
             account_name,
             file_id,
@@ -154,61 +299,185 @@ class DatabaseFileRepository(AbstractFileRepository):
             0,
             tag,
             tz_now(),
+            reserved_size,
         )
-        return await self.get_not_stored(file_id)
+        return self._convert_row_to_obj(row)
 
     async def take(
-        self, file_id: UUID
+        self, file_id: UUID, offset: int = 0, length: int | None = None
     ) -> Coroutine[None, None, AsyncGenerator[bytes, None]]:
-        logger.debug(f"Reading file {file_id}")
+        logger.debug(f"Reading file {file_id} from {offset}, length {length}")
+        model = await self.get(file_id)
+        return self._storage.get(model.stored_id, offset, length)
+
+    async def take_encoded(
+        self, file_id: UUID, encodings: list[str]
+    ) -> tuple[str, AsyncGenerator[bytes, None]] | None:
+        model = await self.get(file_id)
+        encoding = await self._storage.get_encoding(model.stored_id)
+        if encoding not in encodings:
+            return None
+
+        logger.debug(f"Reading file {file_id} encoded with {encoding}")
+        return encoding, self._storage.get_encoded(model.stored_id)
+
+    async def take_path(self, file_id: UUID) -> str | None:
+        logger.debug(f"Locating file {file_id}")
         model = await self.get(file_id)
-        return self._storage.get(model.stored_id)
+        return await self._storage.get_path(model.stored_id)
 
     async def store(
         self,
         file_id: UUID,
         get_bytes: Callable[[int], Awaitable[bytearray]]
         | Callable[[int], AsyncIterator[bytes]],
-    ) -> int:
+    ) -> SavedFile:
         logger.debug(f"Storing file {file_id}")
         model = await self.get_not_stored(file_id)
-        return await self._storage.save(model.stored_id, get_bytes)
+        return await self._storage.save(
+            model.stored_id, get_bytes, self._make_claim(file_id), model.tag
+        )
+
+    def _make_claim(self, file_id: UUID) -> ClaimCallback:
+        async def claim(saved: SavedFile):
+            await self.claim(file_id, saved)
+
+        return claim
+
+    async def claim(self, file_id: UUID, saved: SavedFile):
+        """
+        Учет ссылки файла на сохраненное содержимое. Вызывается хранилищем
+        перед тем, как поместить файл по итоговому пути.
+
+        """
+
+        logger.debug(f"Claim content {saved.stored_id} for file {file_id}")
+        await self._conn.execute(
+            self.ACQUIRE_BLOB_QUERY,
+            saved.stored_id,
+            saved.checksum,
+            saved.size,
+            tz_now(),
+        )
+        await self._conn.execute(
+            self.SET_STORED_ID_QUERY, file_id, saved.stored_id
+        )
+
+    async def store_by_checksum(
+        self, file_id: UUID, checksum: str
+    ) -> SavedFile | None:
+        logger.debug(f"Storing file {file_id} by checksum '{checksum}'")
+        row = await self._conn.fetchrow(
+            self.ACQUIRE_BLOB_BY_CHECKSUM_QUERY, checksum
+        )
+        if not row:
+            return None
+
+        await self._conn.execute(self.SET_STORED_ID_QUERY, file_id, row["id"])
+        return SavedFile(
+            stored_id=row["id"], size=row["size"], checksum=row["checksum"]
+        )
+
+    async def store_part(
+        self,
+        file_id: UUID,
+        offset: int,
+        get_bytes: Callable[[int], Awaitable[bytearray]]
+        | Callable[[int], AsyncIterator[bytes]],
+    ) -> int:
+        logger.debug(f"Storing part of file {file_id} from {offset}")
+        model = await self.get_not_stored(file_id)
+        return await self._storage.save_part(
+            model.stored_id, offset, get_bytes
+        )
+
+    async def commit_parts(self, file_id: UUID, size: int) -> SavedFile:
+        logger.debug(f"Assembling file {file_id} of size {size} from parts")
+        model = await self.get_not_stored(file_id)
+        return await self._storage.commit_parts(
+            model.stored_id, size, self._make_claim(file_id)
+        )
 
     async def mark_as_stored(
-        self, file_id: UUID, name: str, size: int
+        self, file_id: UUID, name: str, size: int, checksum: str = ""
     ) -> File:
         logger.debug(
-            f"Mark file {file_id} as stored with name '{name}', size {size}"
+            f"Mark file {file_id} as stored with name '{name}', size {size}, "
+            f"checksum '{checksum}'"
         )
-        await self._conn.execute(
-            self.STORE_QUERY, file_id, name, size, tz_now()
+        row = await self._conn.fetchrow(
+            self.STORE_QUERY, file_id, name, size, checksum, tz_now()
         )
-        return await self.get_not_stored(file_id)
+        if not row:
+            #  Файл уже сохранен ранее
+            return await self.get_not_stored(file_id)
+
+        return self._convert_row_to_obj(row)
+
+    async def release_reserved(self, file_id: UUID):
+        logger.debug(f"Release space reserved for file {file_id}")
+        await self._conn.execute(self.RELEASE_RESERVED_QUERY, file_id)
+
+    async def release_expired_reserved(self):
+        logger.info(f"Release space reserved for not uploaded files")
+        await self._conn.execute(self.RELEASE_EXPIRED_RESERVED_QUERY)
 
     async def delete(self, account_name: UUID, file_id: UUID) -> File:
         logger.info(f"Delete file with id {file_id} by account {account_name}")
-        await self._conn.execute(
+        row = await self._conn.fetchrow(
             self.DELETE_QUERY, account_name, file_id, tz_now()
         )
-        return await self.get_deleted(file_id)
+        if not row:
+            #  Файл уже удален ранее
+            return await self.get_deleted(file_id)
+
+        return self._convert_row_to_obj(row)
 
-    async def erase(self, file_id: UUID):
+    async def erase(self, file_id: UUID) -> list[UUID]:
         logger.debug(f"Erase file with id {file_id}")
-        model = await self.get_deleted(file_id)
-        success = await self._storage.erase(model.stored_id)
-        if success:
-            await self._conn.execute(self.ERASE_QUERY, file_id, tz_now())
-
-    async def get_actual_account_sizes(self) -> list[tuple[str, int]]:
-        logger.info(f"Get actual account sizes.")
-        rows = await self._conn.fetch(self.GET_ACTUAL_SIZE_BY_ACCOUNT_QUERY)
-        return [
-            (
-                x["account_name"],
-                x["size"],
+        await self.get_deleted(file_id)
+        _, unreferenced = await self.erase_many([file_id])
+        return unreferenced
+
+    async def erase_many(
+        self, file_ids: list[UUID]
+    ) -> tuple[list[UUID], list[UUID]]:
+        """
+        Отметка файлов стертыми. Возвращает id стертых файлов и id
+        содержимого, на которое больше нет ссылок. Содержимое удаляется
+        из хранилища после фиксации транзакции: иначе при ее откате
+        запись о содержимом осталась бы без файла.
+
+        """
+
+        logger.debug(f"Erase {len(file_ids)} files")
+        rows = await self._conn.fetch(self.LOCK_DELETED_QUERY, file_ids)
+        counts = Counter(x["stored_id"] for x in rows)
+
+        #  Содержимое может использоваться несколькими файлами и удаляется
+        #  вместе с последней ссылкой на него. Для файлов, сохраненных до
+        #  учета ссылок, записи нет
+        refs = {
+            x["id"]: x["refs"]
+            for x in await self._conn.fetch(
+                self.GET_BLOBS_REFS_FOR_UPDATE_QUERY, list(counts)
             )
-            for x in rows
+        }
+        unreferenced = [
+            x for x, count in counts.items() if refs.get(x, 0) <= count
         ]
+        to_release = [x for x in counts if x not in unreferenced]
+
+        await self._conn.execute(self.DELETE_BLOBS_QUERY, unreferenced)
+        await self._conn.execute(
+            self.RELEASE_BLOBS_QUERY,
+            to_release,
+            [counts[x] for x in to_release],
+        )
+        rows = await self._conn.fetch(
+            self.ERASE_QUERY, [x["id"] for x in rows], tz_now()
+        )
+        return [x["id"] for x in rows], unreferenced
 
 
 async def get_db_file_repository(
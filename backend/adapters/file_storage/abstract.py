@@ -1,27 +1,109 @@
 import logging
 from abc import ABC, abstractmethod
-from typing import AsyncGenerator
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import AsyncGenerator, Awaitable, Callable
 from uuid import UUID
 
 logger = logging.getLogger(__name__)
 
+IDENTITY = "identity"
+
+
+@dataclass
+class SavedFile:
+    stored_id: UUID
+    size: int
+    checksum: str
+
+
+#  Вызывается хранилищем перед тем, как поместить файл по итоговому пути.
+#  Позволяет учесть ссылку на содержимое в той же транзакции БД
+ClaimCallback = Callable[[SavedFile], Awaitable[None]]
+
 
 class AbstractFileStorage(ABC):
+    #  Одинаковое содержимое хранится в одном экземпляре, поэтому новый
+    #  файл можно сослать на уже сохраненное содержимое
+    deduplicates: bool = False
+
     @abstractmethod
-    async def get(self, id: UUID) -> AsyncGenerator[bytes, None]:
+    async def get(
+        self, id: UUID, offset: int = 0, length: int | None = None
+    ) -> AsyncGenerator[bytes, None]:
         pass
 
+    async def get_path(self, id: UUID) -> str | None:
+        """
+        Путь к файлу в локальной файловой системе, если хранилище позволяет
+        отдавать файл напрямую (sendfile). Иначе None.
+
+        """
+        return None
+
+    async def get_encoding(self, id: UUID) -> str:
+        """
+        Кодирование (сжатие), в котором файл хранится.
+
+        """
+        return IDENTITY
+
+    def get_encoded(self, id: UUID) -> AsyncGenerator[bytes, None]:
+        """
+        Содержимое файла в том кодировании, в котором он хранится,
+        без распаковки.
+
+        """
+        return self.get(id)
+
     @abstractmethod
     async def save(
         self,
         id: UUID,
         bytes_gen: AsyncGenerator[bytes, None],
+        claim: ClaimCallback | None = None,
+        tag: str | None = None,
+    ) -> SavedFile:
+        pass
+
+    @abstractmethod
+    async def save_part(
+        self,
+        id: UUID,
+        offset: int,
+        get_bytes: Callable[[int], Awaitable[bytearray]]
+        | Callable[[int], AsyncIterator[bytes]],
     ) -> int:
         pass
 
+    @abstractmethod
+    async def commit_parts(
+        self, id: UUID, size: int, claim: ClaimCallback | None = None
+    ) -> SavedFile:
+        pass
+
+    async def sweep(
+        self, temp_lifetime_in_sec: int, part_lifetime_in_sec: int
+    ) -> int:
+        """
+        Удаление брошенных временных файлов (недописанных файлов и частей
+        загрузок), которые старше указанного времени. Возвращает количество
+        удаленных файлов.
+
+        """
+        return 0
+
     @abstractmethod
     async def erase(
         self,
         id: UUID,
     ) -> bool:
         pass
+
+    async def erase_many(self, ids: list[UUID]) -> list[bool]:
+        """
+        Удаление нескольких файлов. Возвращает результат erase
+        для каждого id в том же порядке.
+
+        """
+        return [await self.erase(x) for x in ids]
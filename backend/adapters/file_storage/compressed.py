@@ -0,0 +1,263 @@
+import asyncio
+import inspect
+import logging
+import zlib
+from collections.abc import AsyncIterator
+from typing import AsyncGenerator, Awaitable, Callable
+from uuid import UUID
+
+from backend.adapters.file_storage.abstract import (IDENTITY,
+                                                    AbstractFileStorage,
+                                                    ClaimCallback, SavedFile)
+from backend.tools.checksums import make_checksum, make_hasher
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+#  Заголовок сжатого файла: сигнатура и код кодирования. Файлы без заголовка
+#  хранятся как есть
+MAGIC = b"\x89FSC\r\n\x1a\n"
+ENCODING_CODES = {IDENTITY: 0, GZIP: 1, ZSTD: 2}
+ENCODINGS = {v: k for k, v in ENCODING_CODES.items()}
+HEADER_SIZE = len(MAGIC) + 1
+
+#  Если первый кусок сжимается хуже, файл сохраняется без сжатия
+PROBE_SIZE = 2**16
+MIN_COMPRESSION_RATIO = 0.9
+
+
+def _make_header(encoding: str) -> bytes:
+    return MAGIC + bytes([ENCODING_CODES[encoding]])
+
+
+def _make_compressor(encoding: str):
+    if encoding == GZIP:
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    return zstandard.ZstdCompressor(level=3).compressobj()
+
+
+def _make_decompressor(encoding: str):
+    if encoding == GZIP:
+        return zlib.decompressobj(31)
+
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+class CompressedFileStorage(AbstractFileStorage):
+    """
+    Обертка над хранилищем, сжимающая файлы при сохранении и распаковывающая
+    их при чтении. Размер и контрольная сумма считаются по исходным данным.
+
+    """
+
+    def __init__(
+        self,
+        storage: AbstractFileStorage,
+        encoding: str = GZIP,
+        encodings_by_tag: dict[str, str] | None = None,
+        hash_algorithm: str = "sha256",
+    ) -> None:
+        self._storage = storage
+        self._encoding = encoding
+        self._encodings_by_tag = encodings_by_tag or {}
+        self._hash_algorithm = hash_algorithm
+
+        if zstandard is None and ZSTD in (
+            encoding,
+            *self._encodings_by_tag.values(),
+        ):
+            raise ValueError("zstd compression requires zstandard package")
+
+    @property
+    def deduplicates(self) -> bool:
+        return self._storage.deduplicates
+
+    async def _read_header(self, id: UUID) -> str | None:
+        header = b"".join(
+            [bytes(x) async for x in self._storage.get(id, 0, HEADER_SIZE)]
+        )
+        if len(header) < HEADER_SIZE or not header.startswith(MAGIC):
+            return None
+
+        return ENCODINGS[header[-1]]
+
+    async def get_encoding(self, id: UUID) -> str:
+        return await self._read_header(id) or IDENTITY
+
+    async def get_encoded(self, id: UUID) -> AsyncGenerator[bytes, None]:
+        offset = HEADER_SIZE if await self._read_header(id) else 0
+        async for chunk in self._storage.get(id, offset):
+            yield chunk
+
+    async def get_path(self, id: UUID) -> str | None:
+        if await self._read_header(id) is not None:
+            return None
+
+        return await self._storage.get_path(id)
+
+    async def get(
+        self, id: UUID, offset: int = 0, length: int | None = None
+    ) -> AsyncGenerator[bytes, None]:
+        encoding = await self._read_header(id)
+
+        if encoding is None:
+            gen = self._storage.get(id, offset, length)
+        elif encoding == IDENTITY:
+            gen = self._storage.get(id, HEADER_SIZE + offset, length)
+        else:
+            gen = self._decode(id, encoding, offset, length)
+
+        async for chunk in gen:
+            yield chunk
+
+    async def _decode(
+        self, id: UUID, encoding: str, offset: int, length: int | None
+    ) -> AsyncGenerator[bytes, None]:
+        #  Сжатые данные нельзя читать с произвольного места, поэтому
+        #  для диапазона распаковка идет с начала файла
+        decompressor = _make_decompressor(encoding)
+        loop = asyncio.get_running_loop()
+
+        async for chunk in self._storage.get(id, HEADER_SIZE):
+            data = await loop.run_in_executor(
+                None, decompressor.decompress, bytes(chunk)
+            )
+
+            if offset >= len(data):
+                offset -= len(data)
+                continue
+
+            data = data[offset:]
+            offset = 0
+
+            if length is not None:
+                data = data[:length]
+                length -= len(data)
+
+            if data:
+                yield data
+
+            if length == 0:
+                break
+
+    def _choose_encoding(self, tag: str | None) -> str:
+        return self._encodings_by_tag.get(tag, self._encoding)
+
+    async def save(
+        self,
+        id: UUID,
+        get_bytes: Callable[[int], Awaitable[bytearray]]
+        | Callable[[int], AsyncIterator[bytes]],
+        claim: ClaimCallback | None = None,
+        tag: str | None = None,
+    ) -> SavedFile:
+        encoding = self._choose_encoding(tag)
+        hasher = make_hasher(self._hash_algorithm)
+        size = 0
+
+        async def read(chunk_size: int) -> AsyncIterator[bytes]:
+            if inspect.iscoroutinefunction(get_bytes):
+                while chunk := await get_bytes(chunk_size):
+                    yield chunk
+            else:
+                async for chunk in get_bytes(chunk_size):
+                    yield chunk
+
+        async def encode(chunk_size: int) -> AsyncIterator[bytes]:
+            nonlocal encoding, size
+            loop = asyncio.get_running_loop()
+            compressor = None
+
+            async for chunk in read(chunk_size):
+                size += len(chunk)
+                hasher.update(chunk)
+
+                if compressor is None and encoding != IDENTITY:
+                    compressor = _make_compressor(encoding)
+                    probe = _make_compressor(encoding)
+                    compressed = probe.compress(bytes(chunk[:PROBE_SIZE]))
+                    compressed += probe.flush()
+
+                    if (
+                        len(compressed)
+                        > len(chunk[:PROBE_SIZE]) * MIN_COMPRESSION_RATIO
+                    ):
+                        encoding = IDENTITY
+                    else:
+                        yield _make_header(encoding)
+
+                if encoding == IDENTITY:
+                    if size == len(chunk) and chunk[: len(MAGIC)] == MAGIC:
+                        #  Данные без сжатия, похожие на заголовок,
+                        #  сохраняются с явным заголовком
+                        yield _make_header(IDENTITY)
+
+                    yield chunk
+                    continue
+
+                data = await loop.run_in_executor(
+                    None, compressor.compress, bytes(chunk)
+                )
+                if data:
+                    yield data
+
+            if compressor is not None and encoding != IDENTITY:
+                yield compressor.flush()
+
+        async def claim_with_source(saved: SavedFile):
+            if claim is not None:
+                await claim(
+                    SavedFile(
+                        stored_id=saved.stored_id,
+                        size=size,
+                        checksum=make_checksum(hasher),
+                    )
+                )
+
+        saved = await self._storage.save(id, encode, claim_with_source, tag)
+        logger.debug(
+            f"File {saved.stored_id} saved with encoding {encoding}, "
+            f"size {size}, stored size {saved.size}"
+        )
+        return SavedFile(
+            stored_id=saved.stored_id,
+            size=size,
+            checksum=make_checksum(hasher),
+        )
+
+    async def save_part(
+        self,
+        id: UUID,
+        offset: int,
+        get_bytes: Callable[[int], Awaitable[bytearray]]
+        | Callable[[int], AsyncIterator[bytes]],
+    ) -> int:
+        return await self._storage.save_part(id, offset, get_bytes)
+
+    async def commit_parts(
+        self, id: UUID, size: int, claim: ClaimCallback | None = None
+    ) -> SavedFile:
+        #  Файлы, собранные из частей, хранятся без сжатия: части пишутся
+        #  по смещениям, и сжать их потоком нельзя
+        return await self._storage.commit_parts(id, size, claim)
+
+    async def sweep(
+        self, temp_lifetime_in_sec: int, part_lifetime_in_sec: int
+    ) -> int:
+        return await self._storage.sweep(
+            temp_lifetime_in_sec, part_lifetime_in_sec
+        )
+
+    async def erase(self, id: UUID) -> bool:
+        return await self._storage.erase(id)
+
+    async def erase_many(self, ids: list[UUID]) -> list[bool]:
+        return await self._storage.erase_many(ids)
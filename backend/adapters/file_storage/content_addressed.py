@@ -0,0 +1,52 @@
+import asyncio
+import logging
+import os
+from pathlib import Path
+from uuid import UUID
+
+from backend.adapters.file_storage.abstract import ClaimCallback, SavedFile
+from backend.adapters.file_storage.local import LocalFileStorage
+from backend.tools.checksums import split_checksum
+
+logger = logging.getLogger(__name__)
+
+
+class ContentAddressedFileStorage(LocalFileStorage):
+    """
+    Хранилище, в котором путь к файлу определяется его содержимым.
+    Одинаковые файлы хранятся в одном экземпляре, учет ссылок на содержимое
+    ведется в БД через claim.
+
+    """
+
+    deduplicates = True
+
+    def make_stored_id(self, checksum: str) -> UUID:
+        _, hexdigest = split_checksum(checksum)
+        return UUID(hexdigest[:32], version=4)
+
+    async def _place(
+        self, path: str, saved: SavedFile, claim: ClaimCallback | None
+    ) -> SavedFile:
+        saved = SavedFile(
+            stored_id=self.make_stored_id(saved.checksum),
+            size=saved.size,
+            checksum=saved.checksum,
+        )
+
+        #  Ссылка на содержимое учитывается до проверки наличия файла,
+        #  чтобы параллельное удаление последней ссылки не удалило его
+        if claim is not None:
+            await claim(saved)
+
+        stored_path = self.generate_path(saved.stored_id)
+        loop = asyncio.get_running_loop()
+
+        if os.path.isfile(stored_path):
+            logger.info(f"{stored_path} - DEDUPLICATED")
+            await loop.run_in_executor(None, os.unlink, path)
+            return saved
+
+        Path(os.path.dirname(stored_path)).mkdir(parents=True, exist_ok=True)
+        await loop.run_in_executor(None, self._replace, path, stored_path)
+        return saved
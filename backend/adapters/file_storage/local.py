@@ -1,76 +1,312 @@
+import asyncio
 import inspect
 import logging
 import os
+import time
 from collections.abc import AsyncIterator
 from pathlib import Path
-from typing import AsyncGenerator, Awaitable, Callable
-from uuid import UUID
+from typing import AsyncGenerator, Awaitable, Callable, Iterator
+from uuid import UUID, uuid4
 
 from aiofiles import open as aopen
 
-from backend.adapters.file_storage.abstract import AbstractFileStorage
+from backend.adapters.file_storage.abstract import (IDENTITY,
+                                                    AbstractFileStorage,
+                                                    ClaimCallback, SavedFile)
 from backend.core import exceptions
 from backend.core.config import settings
+from backend.tools.checksums import make_checksum, make_hasher
 
 logger = logging.getLogger(__name__)
 
 CHUNK_SIZE = 2**16
+PART_SUFFIX = ".part"
+TEMP_SUFFIX = ".tmp"
+ERASE_CONCURRENCY = 16
+
+FSYNC_NONE = "none"
+FSYNC_FILE = "file"
+FSYNC_FILE_AND_DIR = "file+dir"
 
 
 class LocalFileStorage(AbstractFileStorage):
-    def __init__(self, path: str) -> None:
+    def __init__(
+        self,
+        path: str,
+        sendfile: bool = False,
+        fsync: str = FSYNC_NONE,
+        chunk_size: int = CHUNK_SIZE,
+        max_chunk_size: int | None = None,
+        hash_algorithm: str = "sha256",
+        erase_concurrency: int = ERASE_CONCURRENCY,
+    ) -> None:
         self._storage_path = path
+        self._hash_algorithm = hash_algorithm
+        self._sendfile = sendfile
+        self._fsync = fsync
+        self._chunk_size = chunk_size
+        self._max_chunk_size = max(max_chunk_size or 0, chunk_size)
+        self._erase_concurrency = erase_concurrency
+
+    def _chunk_sizes(self) -> Iterator[int]:
+        #  Адаптивный режим: размер куска удваивается с каждым чтением
+        #  до max_chunk_size, так что маленькие файлы читаются маленькими
+        #  кусками, а большие - за меньшее число обращений к пулу потоков
+        size = self._chunk_size
+        while True:
+            yield size
+            size = min(size * 2, self._max_chunk_size)
 
     def generate_path(self, id: UUID) -> str:
         return os.path.join(self._storage_path, str(id)[:2], str(id))
 
-    async def get(self, id: UUID) -> AsyncGenerator[bytes, None]:
+    def generate_part_path(self, id: UUID) -> str:
+        return f"{self.generate_path(id)}{PART_SUFFIX}"
+
+    def generate_temp_path(self, id: UUID) -> str:
+        #  Временный файл создается в той же директории, что и итоговый,
+        #  чтобы переименование было атомарным
+        return f"{self.generate_path(id)}.{uuid4().hex}{TEMP_SUFFIX}"
+
+    async def _sync_file(self, f):
+        if self._fsync == FSYNC_NONE:
+            return
+
+        await f.flush()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, os.fsync, f.fileno())
+
+    def _replace(self, src: str, dst: str):
+        os.replace(src, dst)
+
+        if self._fsync == FSYNC_FILE_AND_DIR:
+            #  Сохраняем на диск запись о новом имени файла в директории
+            fd = os.open(os.path.dirname(dst), os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    async def get_path(self, id: UUID) -> str | None:
+        if not self._sendfile:
+            return None
+
+        #  Наличие файла не проверяется, чтобы не блокировать цикл событий.
+        #  Отсутствующий файл обнаруживается при открытии перед отправкой
+        return self.generate_path(id)
+
+    async def get(
+        self, id: UUID, offset: int = 0, length: int | None = None
+    ) -> AsyncGenerator[memoryview, None]:
+        """
+        Чтение файла кусками в один переиспользуемый буфер.
+        Отдаваемый кусок действителен только до следующей итерации,
+        поэтому потребитель должен скопировать его, если хранит дольше.
+
+        """
+
         path = self.generate_path(id)
 
         if not os.path.isfile(path):
             raise exceptions.FileNotFound
 
+        buffer = memoryview(bytearray(0))
+
         async with aopen(path, "rb") as f:
-            while True:
-                chunk = await f.read(CHUNK_SIZE)
+            if offset:
+                await f.seek(offset)
 
-                if not chunk:
+            for size in self._chunk_sizes():
+                if length is not None:
+                    if length <= 0:
+                        break
+
+                    size = min(size, length)
+
+                if len(buffer) < size:
+                    buffer = memoryview(bytearray(size))
+
+                count = await f.readinto(buffer[:size])
+
+                if not count:
                     break
 
-                yield chunk
+                if length is not None:
+                    length -= count
 
-    async def save(
+                yield buffer[:count]
+
+    async def _write(
         self,
-        id: UUID,
+        f,
         get_bytes: Callable[[int], Awaitable[bytearray]]
         | Callable[[int], AsyncIterator[bytes]],
+        hasher=None,
     ) -> int:
         size = 0
-        path = self.generate_path(id)
-        Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
 
-        async with aopen(path, "wb") as f:
-            if inspect.iscoroutinefunction(get_bytes):
-                while True:
-                    chunk = await get_bytes(CHUNK_SIZE)
+        if inspect.iscoroutinefunction(get_bytes):
+            for chunk_size in self._chunk_sizes():
+                chunk = await get_bytes(chunk_size)
 
-                    if not chunk:
-                        break
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                await f.write(chunk)
+
+                if hasher is not None:
+                    hasher.update(chunk)
 
-                    size += len(chunk)
-                    await f.write(chunk)
+        else:
+            async for chunk in get_bytes(self._max_chunk_size):
+                size += len(chunk)
+                await f.write(chunk)
 
-            else:
-                async for chunk in get_bytes(CHUNK_SIZE):
-                    size += len(chunk)
-                    await f.write(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
 
         return size
 
-    async def erase(
+    def _hash_file(self, path: str) -> str:
+        hasher = make_hasher(self._hash_algorithm)
+        buffer = memoryview(bytearray(self._max_chunk_size))
+
+        with open(path, "rb") as f:
+            while count := f.readinto(buffer):
+                hasher.update(buffer[:count])
+
+        return make_checksum(hasher)
+
+    async def _place(
+        self, path: str, saved: SavedFile, claim: ClaimCallback | None
+    ) -> SavedFile:
+        """
+        Перемещение записанного временного файла по итоговому пути.
+
+        """
+
+        if claim is not None:
+            await claim(saved)
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None, self._replace, path, self.generate_path(saved.stored_id)
+        )
+        return saved
+
+    async def save(
         self,
         id: UUID,
-    ) -> bool:
+        get_bytes: Callable[[int], Awaitable[bytearray]]
+        | Callable[[int], AsyncIterator[bytes]],
+        claim: ClaimCallback | None = None,
+        tag: str | None = None,
+    ) -> SavedFile:
+        path = self.generate_path(id)
+        temp_path = self.generate_temp_path(id)
+        hasher = make_hasher(self._hash_algorithm)
+        Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
+
+        #  Файл записывается во временный и переименовывается по окончании
+        #  записи, поэтому по итоговому пути никогда не будет недописанного
+        #  файла
+        try:
+            async with aopen(temp_path, "wb") as f:
+                #  Контрольная сумма считается при записи, без повторного
+                #  чтения файла
+                size = await self._write(f, get_bytes, hasher)
+                await self._sync_file(f)
+
+            return await self._place(
+                temp_path,
+                SavedFile(
+                    stored_id=id, size=size, checksum=make_checksum(hasher)
+                ),
+                claim,
+            )
+
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+
+    async def save_part(
+        self,
+        id: UUID,
+        offset: int,
+        get_bytes: Callable[[int], Awaitable[bytearray]]
+        | Callable[[int], AsyncIterator[bytes]],
+    ) -> int:
+        #  Части файла записываются по своим смещениям во временный файл,
+        #  поэтому могут приходить в любом порядке и повторно
+        path = self.generate_part_path(id)
+        Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
+        Path(path).touch(exist_ok=True)
+
+        async with aopen(path, "r+b") as f:
+            await f.seek(offset)
+            return await self._write(f, get_bytes)
+
+    async def commit_parts(
+        self, id: UUID, size: int, claim: ClaimCallback | None = None
+    ) -> SavedFile:
+        path = self.generate_part_path(id)
+
+        if not os.path.isfile(path):
+            #  Пустой файл может быть загружен без единой части
+            if size > 0:
+                raise exceptions.FileNotFound
+
+            Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
+            Path(path).touch()
+
+        async with aopen(path, "r+b") as f:
+            await f.truncate(size)
+            await self._sync_file(f)
+
+        #  Части приходят в произвольном порядке, поэтому контрольная сумма
+        #  собранного файла считается отдельным чтением
+        loop = asyncio.get_running_loop()
+        checksum = await loop.run_in_executor(None, self._hash_file, path)
+        return await self._place(
+            path, SavedFile(stored_id=id, size=size, checksum=checksum), claim
+        )
+
+    def _sweep(self, suffixes: dict[str, float]) -> int:
+        count = 0
+
+        for root, _, filenames in os.walk(self._storage_path):
+            for filename in filenames:
+                suffix = os.path.splitext(filename)[1]
+                if suffix not in suffixes:
+                    continue
+
+                path = os.path.join(root, filename)
+                try:
+                    if os.path.getmtime(path) < suffixes[suffix]:
+                        os.unlink(path)
+                        logger.info(f"{path} - SWEPT")
+                        count += 1
+                except FileNotFoundError:
+                    pass
+
+        return count
+
+    async def sweep(
+        self, temp_lifetime_in_sec: int, part_lifetime_in_sec: int
+    ) -> int:
+        now = time.time()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            self._sweep,
+            {
+                TEMP_SUFFIX: now - temp_lifetime_in_sec,
+                PART_SUFFIX: now - part_lifetime_in_sec,
+            },
+        )
+
+    def _erase(self, id: UUID) -> bool:
         path = self.generate_path(id)
 
         if not os.path.isfile(path):
@@ -85,6 +321,53 @@ class LocalFileStorage(AbstractFileStorage):
             logger.info(f"{path} - FAILED")
             return False
 
+    async def erase(
+        self,
+        id: UUID,
+    ) -> bool:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._erase, id)
+
+    async def erase_many(self, ids: list[UUID]) -> list[bool]:
+        #  Файлы удаляются в пуле потоков, одновременно не более
+        #  erase_concurrency штук
+        semaphore = asyncio.Semaphore(self._erase_concurrency)
+
+        async def erase(id: UUID) -> bool:
+            async with semaphore:
+                return await self.erase(id)
+
+        return await asyncio.gather(*[erase(x) for x in ids])
+
 
 async def get_local_file_storage() -> AbstractFileStorage:
-    return LocalFileStorage(settings.storage_path)
+    from .compressed import CompressedFileStorage
+    from .content_addressed import ContentAddressedFileStorage
+
+    storage_class = (
+        ContentAddressedFileStorage
+        if settings.storage_deduplication
+        else LocalFileStorage
+    )
+    storage = storage_class(
+        settings.storage_path,
+        sendfile=settings.storage_sendfile,
+        fsync=settings.storage_fsync,
+        chunk_size=settings.storage_chunk_size,
+        max_chunk_size=settings.storage_max_chunk_size,
+        hash_algorithm=settings.storage_hash_algorithm,
+        erase_concurrency=settings.storage_erase_concurrency,
+    )
+
+    if (
+        settings.storage_compression != IDENTITY
+        or settings.storage_compression_by_tag
+    ):
+        storage = CompressedFileStorage(
+            storage,
+            encoding=settings.storage_compression,
+            encodings_by_tag=settings.storage_compression_by_tag,
+            hash_algorithm=settings.storage_hash_algorithm,
+        )
+
+    return storage
@@ -26,7 +26,8 @@ class DatabaseLinkRepository(AbstractLinkRepository):
                             expired
                         )
                     VALUES
-                        ($1, $2, $3, $4, $5);
+                        ($1, $2, $3, $4, $5)
+                    RETURNING *;
                     """
 
     DELETE_BY_ID_QUERY = f"DELETE FROM {settings.links_table} WHERE id = $1;"
@@ -64,7 +65,7 @@ class DatabaseLinkRepository(AbstractLinkRepository):
                     """
         )
 
-        await self._conn.execute(
+        row = await self._conn.fetchrow(
             self.ADD_QUERY,
             link_id,
             file_id,
@@ -72,7 +73,7 @@ class DatabaseLinkRepository(AbstractLinkRepository):
             tz_now(),
             tz_now(expire_period_in_sec),
         )
-        return await self._get(link_id, link_type)
+        return self._convert_row_to_obj(row)
 
     async def add_download(
         self, file_id: UUID, expire_period_in_sec: int
@@ -0,0 +1,38 @@
+import logging
+from abc import ABC, abstractmethod
+from uuid import UUID
+
+from backend.domain.models import UploadSession, UploadSessionPart
+
+logger = logging.getLogger(__name__)
+
+
+class AbstractUploadSessionRepository(ABC):
+    def __init__(self, conn):
+        self._conn = conn
+
+    def _convert_row_to_obj(self, row) -> UploadSession:
+        return UploadSession(**dict(row.items()))
+
+    def _convert_part_row_to_obj(self, row) -> UploadSessionPart:
+        return UploadSessionPart(**dict(row.items()))
+
+    @abstractmethod
+    async def get(self, id: UUID, link_id: UUID) -> UploadSession:
+        pass
+
+    @abstractmethod
+    async def add(
+        self, link_id: UUID, file_id: UUID, name: str, size: int
+    ) -> UploadSession:
+        pass
+
+    @abstractmethod
+    async def get_parts(self, id: UUID) -> list[UploadSessionPart]:
+        pass
+
+    @abstractmethod
+    async def add_part(
+        self, id: UUID, number: int, offset: int, size: int
+    ) -> UploadSessionPart:
+        pass
@@ -0,0 +1,131 @@
+import logging
+from uuid import UUID, uuid4
+
+from backend.core import exceptions
+from backend.core.config import settings, tz_now
+from backend.domain.models import UploadSession, UploadSessionPart
+
+from .abstract import AbstractUploadSessionRepository
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseUploadSessionRepository(AbstractUploadSessionRepository):
+    GET_BY_ID_QUERY = f"""
+                    SELECT * FROM {settings.upload_sessions_table}
+                    WHERE id = $1 AND link_id = $2;
+                    """
+
+    GET_BY_LINK_ID_QUERY = f"""
+                    SELECT * FROM {settings.upload_sessions_table}
+                    WHERE link_id = $1;
+                    """
+
+    ADD_QUERY = f"""
+                    INSERT INTO {settings.upload_sessions_table}
+                        (
+                            id,
+                            link_id,
+                            file_id,
+                            name,
+                            size,
+                            created,
+                            updated
+                        )
+                    VALUES
+                        ($1, $2, $3, $4, $5, $6, $7)
+                    ON CONFLICT (link_id) DO NOTHING
+                    RETURNING *;
+                    """
+
+    GET_PARTS_QUERY = f"""
+                    SELECT * FROM {settings.upload_session_parts_table}
+                    WHERE session_id = $1
+                    ORDER BY "offset";
+                    """
+
+    ADD_PART_QUERY = f"""
+                    INSERT INTO {settings.upload_session_parts_table}
+                        (
+                            session_id,
+                            "number",
+                            "offset",
+                            size,
+                            created
+                        )
+                    VALUES
+                        ($1, $2, $3, $4, $5)
+                    ON CONFLICT (session_id, "number") DO UPDATE
+                    SET
+                        "offset" = EXCLUDED."offset",
+                        size = EXCLUDED.size,
+                        created = EXCLUDED.created
+                    RETURNING *;
+                    """
+
+    TOUCH_QUERY = f"""
+                    UPDATE {settings.upload_sessions_table}
+                    SET updated = $2 WHERE id = $1;
+                    """
+
+    async def _get(self, query: str, *args) -> UploadSession:
+        row = await self._conn.fetchrow(query, *args)
+        if not row:
+            raise exceptions.FileNotFound
+
+        return self._convert_row_to_obj(row)
+
+    async def get(self, id: UUID, link_id: UUID) -> UploadSession:
+        logger.debug(f"Get upload session with id {id} and link {link_id}.")
+        return await self._get(self.GET_BY_ID_QUERY, id, link_id)
+
+    async def add(
+        self, link_id: UUID, file_id: UUID, name: str, size: int
+    ) -> UploadSession:
+        id = uuid4()
+        logger.debug(
+            f"Add upload session with id {id}, link_id {link_id}, "
+            f"file_id {file_id}, name '{name}', size {size}"
+        )
+
+        #  На одну ссылку создается только одна сессия. Повторный запрос
+        #  возвращает уже существующую сессию, чтобы клиент мог продолжить
+        #  загрузку после обрыва связи
+        row = await self._conn.fetchrow(
+            self.ADD_QUERY,
+            id,
+            link_id,
+            file_id,
+            name,
+            size,
+            tz_now(),
+            tz_now(),
+        )
+        if not row:
+            return await self._get(self.GET_BY_LINK_ID_QUERY, link_id)
+
+        return self._convert_row_to_obj(row)
+
+    async def get_parts(self, id: UUID) -> list[UploadSessionPart]:
+        logger.debug(f"Get parts of upload session {id}.")
+        rows = await self._conn.fetch(self.GET_PARTS_QUERY, id)
+        return [self._convert_part_row_to_obj(x) for x in rows]
+
+    async def add_part(
+        self, id: UUID, number: int, offset: int, size: int
+    ) -> UploadSessionPart:
+        logger.debug(
+            f"Add part {number} with offset {offset}, size {size} "
+            f"to upload session {id}"
+        )
+        row = await self._conn.fetchrow(
+            self.ADD_PART_QUERY, id, number, offset, size, tz_now()
+        )
+        await self._conn.execute(self.TOUCH_QUERY, id, tz_now())
+        return self._convert_part_row_to_obj(row)
+
+
+async def get_db_upload_session_repository(
+    conn,
+) -> AbstractUploadSessionRepository:
+    return DatabaseUploadSessionRepository(conn)
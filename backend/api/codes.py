@@ -7,7 +7,11 @@ RESPONSE_CODES = {
     exceptions.TagNotFoundInAccount: (401, "Account.Error.Tag"),
     exceptions.NoSpaceInAccount: (507, "Account.Error.NoSpace"),
     exceptions.FileNotFound: (404, "File.Error.NotFound"),
+    exceptions.FilePartWrong: (400, "File.Error.PartWrong"),
+    exceptions.FileNotUploadedCompletely: (409, "File.Error.NotUploaded"),
     exceptions.RequestBodyNotJson: (400, "Request.Body.NotJson"),
     exceptions.ParameterBodyWrong: (400, "Parameter.Body.Wrong"),
     exceptions.ParameterPathWrong: (400, "Parameter.Path.Error"),
+    exceptions.ParameterQueryWrong: (400, "Parameter.Query.Error"),
+    exceptions.RangeNotSatisfiable: (416, "Range.Error.NotSatisfiable"),
 }
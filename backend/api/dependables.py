@@ -1,14 +1,29 @@
-from backend.service_layer.message_bus import get_message_bus
-
-
-async def get_bus():
-    return await get_message_bus(
-        [
-            "http",
-            "db",
-            "account_repository",
-            "file_repository",
-            "link_repository",
-            "broker_message_repository",
-        ]
-    )
+from aiohttp import web
+
+from backend.service_layer.message_bus import (MessageBus, get_message_bus,
+                                               get_message_bus_factory)
+
+BOOTSTRAP = [
+    "http",
+    "auth_cache",
+    "db",
+    "account_repository",
+    "file_repository",
+    "link_repository",
+    "broker_message_repository",
+    "upload_session_repository",
+]
+
+BUS_FACTORY_KEY = "bus_factory"
+
+
+async def init_bus_factory(app: web.Application):
+    app[BUS_FACTORY_KEY] = await get_message_bus_factory(BOOTSTRAP)
+
+
+async def get_bus(request: web.Request | None = None) -> MessageBus:
+    #  В приложении используется общая фабрика, созданная при запуске
+    if request is not None and BUS_FACTORY_KEY in request.app:
+        return request.app[BUS_FACTORY_KEY]()
+
+    return await get_message_bus(BOOTSTRAP)
@@ -10,6 +10,8 @@ from backend.api.dependables import get_bus
 from backend.api.transformers import transform_exception
 from backend.core import exceptions
 from backend.domain import commands
+from backend.tools.encodings import parse_accept_encoding_header
+from backend.tools.ranges import parse_range_header
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +37,7 @@ def verify_auth_token():
             except ValueError:
                 raise exceptions.AuthTokenFail
 
-            bus = await get_bus()
+            bus = await get_bus(request)
             cmd = commands.GetAccountNameByAuthToken(auth_token=auth_token)
             account_name = await bus.handle(cmd)
             if account_name is None:
@@ -68,6 +70,24 @@ def validate_path_parameters(model: Type[BaseModel]):
     return wrapper
 
 
+def validate_query_parameters(model: Type[BaseModel]):
+    def wrapper(f: Callable) -> Callable:
+        @wraps(f)
+        async def inner(request: web.Request, *args, **kwargs) -> Awaitable:
+            try:
+                params = model(**request.query)
+            except ValidationError:
+                raise exceptions.ParameterQueryWrong
+
+            return await f(
+                request, *args, _query_parameters=dict(params), **kwargs
+            )
+
+        return inner
+
+    return wrapper
+
+
 def validate_json_body(model: Type[BaseModel]):
     def wrapper(f: Callable) -> Callable:
         @wraps(f)
@@ -125,3 +145,39 @@ def validate_file_body():
         return inner
 
     return wrapper
+
+
+def validate_range_header():
+    def wrapper(f: Callable) -> Callable:
+        @wraps(f)
+        async def inner(request: web.Request, *args, **kwargs) -> Awaitable:
+            #  Некорректный заголовок Range игнорируется (RFC 9110)
+            return await f(
+                request,
+                *args,
+                _ranges=parse_range_header(request.headers.get("Range")),
+                _if_range=request.headers.get("If-Range"),
+                **kwargs
+            )
+
+        return inner
+
+    return wrapper
+
+
+def validate_accept_encoding_header():
+    def wrapper(f: Callable) -> Callable:
+        @wraps(f)
+        async def inner(request: web.Request, *args, **kwargs) -> Awaitable:
+            return await f(
+                request,
+                *args,
+                _accept_encoding=parse_accept_encoding_header(
+                    request.headers.get("Accept-Encoding")
+                ),
+                **kwargs
+            )
+
+        return inner
+
+    return wrapper
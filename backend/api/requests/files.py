@@ -1,4 +1,4 @@
-from pydantic import UUID4
+from pydantic import UUID4, NonNegativeInt
 
 from .abstract import Request
 
@@ -21,3 +21,21 @@ class DeleteRequestPath(Request):
 
 class PostRequestBody(Request):
     tag: str
+    size: NonNegativeInt = 0
+
+
+class UploadSessionRequestPath(UploadRequestPath):
+    session_id: UUID4
+
+
+class UploadPartRequestPath(UploadSessionRequestPath):
+    number: NonNegativeInt
+
+
+class UploadPartRequestQuery(Request):
+    offset: NonNegativeInt
+
+
+class UploadSessionRequestBody(Request):
+    name: str
+    size: NonNegativeInt
@@ -4,6 +4,7 @@ from .abstract import Response
 class AccountResponse(Response):
     name: str
     actual_size: int
+    reserved_size: int
     total_size: int
     is_active: bool
     tags: list[str]
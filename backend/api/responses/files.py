@@ -16,8 +16,23 @@ class FileResponse(Response):
     name: str
     size: int
     tag: str
+    checksum: str
     stored: datetime
 
 
 class FileResponseWithLink(FileResponse):
     link: str
+
+
+class UploadSessionResponse(Response):
+    id: UUID4
+    name: str
+    size: int
+    #  Уже полученные диапазоны байт [start, end] включительно
+    received: list[tuple[int, int]]
+
+
+class UploadPartResponse(Response):
+    number: int
+    offset: int
+    size: int
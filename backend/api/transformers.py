@@ -1,11 +1,17 @@
+import asyncio
 import logging
 import urllib.parse
 from typing import AsyncGenerator
+from uuid import uuid4
 
 from aiohttp import web
 
 from backend.api.codes import RESPONSE_CODES
 from backend.api.responses.abstract import Response
+from backend.core import exceptions
+from backend.domain.models import File
+from backend.tools import serialization
+from backend.tools.checksums import make_digest_header
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +22,12 @@ def transform_exception(err: Exception) -> web.Response:
 
     status, code = RESPONSE_CODES[err.__class__]
 
-    return web.Response(text=code, status=status)
+    headers = {}
+    if isinstance(err, exceptions.RangeNotSatisfiable):
+        #  RFC 9110: в ответе 416 указывается текущий размер файла
+        headers["Content-Range"] = f"bytes */{err.size}"
+
+    return web.Response(text=code, status=status, headers=headers)
 
 
 async def transform_json_response(
@@ -26,33 +37,151 @@ async def transform_json_response(
         headers={
             "Content-Type": "application/json; charset=utf-8",
         },
-        body=f"[{','.join([x.model_dump_json() for x in r])}]"
-        if type(r) is list
-        else r.model_dump_json(),
+        body=serialization.dump_models(r),
         status=status,
     )
     return response
 
 
+def _make_file_response(
+    file: File,
+    ranges: list[tuple[int, int]] | None,
+    encoding: str | None = None,
+) -> tuple[web.StreamResponse, list[tuple[bytes, int, int]], bytes]:
+    """
+    Формирует ответ с заголовками и разметку тела ответа:
+    список частей (префикс, смещение в файле, длина) и завершающие байты.
+
+    """
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept-Encoding",
+        "ETag": file.etag,
+        "Content-Disposition": f"attachment; filename*=utf-8''{urllib.parse.quote(file.name)}",
+    }
+
+    #  Сумма считалась по исходным данным, поэтому для сжатого ответа
+    #  не передается
+    digest = make_digest_header(file.checksum)
+    if digest is not None and encoding is None:
+        #  Сумма всего файла, в том числе для ответов с диапазонами
+        headers["Digest"] = digest
+        name, value = digest.split("=", 1)
+        headers["Repr-Digest"] = f"{name}=:{value}:"
+
+    if encoding is not None:
+        #  Файл отдается в том виде, в котором хранится. Размер сжатых данных
+        #  заранее неизвестен, поэтому ответ передается по частям
+        status = 200
+        headers["Content-Type"] = "application/octet-stream"
+        headers["Content-Encoding"] = encoding
+        headers["ETag"] = f'{file.etag[:-1]}-{encoding}"'
+        parts, epilogue = [(b"", 0, file.size)], b""
+
+    elif ranges is None:
+        status = 200
+        headers["Content-Type"] = "application/octet-stream"
+        headers["Content-Length"] = str(file.size)
+        parts, epilogue = [(b"", 0, file.size)], b""
+
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        status = 206
+        headers["Content-Type"] = "application/octet-stream"
+        headers["Content-Range"] = f"bytes {start}-{end}/{file.size}"
+        headers["Content-Length"] = str(end - start + 1)
+        parts, epilogue = [(b"", start, end - start + 1)], b""
+
+    else:
+        boundary = uuid4().hex
+        status = 206
+        headers["Content-Type"] = f"multipart/byteranges; boundary={boundary}"
+
+        parts = []
+        length = 0
+        for i, (start, end) in enumerate(ranges):
+            #  Каждая часть, кроме первой, отделяется от предыдущей CRLF
+            prefix = (
+                ("\r\n" if i else "")
+                + f"--{boundary}\r\n"
+                + "Content-Type: application/octet-stream\r\n"
+                + f"Content-Range: bytes {start}-{end}/{file.size}\r\n\r\n"
+            ).encode()
+            parts.append((prefix, start, end - start + 1))
+            length += len(prefix) + end - start + 1
+
+        epilogue = f"\r\n--{boundary}--\r\n".encode()
+        headers["Content-Length"] = str(length + len(epilogue))
+
+    return web.StreamResponse(status=status, headers=headers), parts, epilogue
+
+
 async def transform_file_response(
     request: web.Request,
-    filename: str,
-    size: int,
-    gen: AsyncGenerator[bytes, None],
+    file: File,
+    ranges: list[tuple[int, int]] | None,
+    gens: list[AsyncGenerator[bytes, None]],
+    encoding: str | None = None,
 ) -> web.StreamResponse:
-    response = web.StreamResponse(
-        headers={
-            "Content-Type": "application/octet-stream",
-            "Content-Length": str(size),
-            "Content-Disposition": f"attachment; filename*=utf-8''{urllib.parse.quote(filename)}",
-        }
-    )
+    response, parts, epilogue = _make_file_response(file, ranges, encoding)
+
+    for (prefix, _, _), gen in zip(parts, gens):
+        async for chunk in gen:
+            #  Ответ подготавливается при получении первого куска данных,
+            #  чтобы ошибка чтения файла вернулась как обычный ответ
+            if not response.prepared:
+                await response.prepare(request)
+
+            if prefix:
+                await response.write(prefix)
+                prefix = b""
+
+            #  Хранилище может переиспользовать буфер куска, а транспорт -
+            #  держать ссылку на переданные данные до их отправки
+            await response.write(bytes(chunk))
+
+    if not response.prepared:
+        await response.prepare(request)
+
+    if epilogue:
+        await response.write(epilogue)
+
+    await response.write_eof()
+    return response
+
+
+async def transform_sendfile_response(
+    request: web.Request,
+    file: File,
+    ranges: list[tuple[int, int]] | None,
+    path: str,
+) -> web.StreamResponse:
+    response, parts, epilogue = _make_file_response(file, ranges)
+    loop = asyncio.get_running_loop()
+
+    try:
+        f = await loop.run_in_executor(None, open, path, "rb")
+    except FileNotFoundError:
+        raise exceptions.FileNotFound
+
+    try:
+        await response.prepare(request)
+
+        for prefix, offset, count in parts:
+            if prefix:
+                await response.write(prefix)
+
+            #  Данные передаются ядром напрямую из файла в сокет (sendfile),
+            #  если это невозможно - asyncio читает файл самостоятельно
+            if count:
+                await loop.sendfile(request.transport, f, offset, count)
 
-    async for chunk in gen:
-        if not response.prepared:
-            await response.prepare(request)
+        if epilogue:
+            await response.write(epilogue)
 
-        await response.write(chunk)
+    finally:
+        await loop.run_in_executor(None, f.close)
 
     await response.write_eof()
     return response
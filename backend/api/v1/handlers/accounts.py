@@ -10,7 +10,7 @@ async def get(
     request: web.Request,
     bus: MessageBus | None = None,
 ) -> web.Response:
-    bus = bus or await get_bus()
+    bus = bus or await get_bus(request)
 
     cmd = commands.GetAccounts()
     return await transform_json_response(await bus.handle(cmd))
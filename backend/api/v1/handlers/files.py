@@ -7,9 +7,14 @@ from backend.api import middlewares
 from backend.api.dependables import get_bus
 from backend.api.requests.files import (DeleteRequestPath, DownloadRequestPath,
                                         GetRequestPath, PostRequestBody,
-                                        UploadRequestPath)
+                                        UploadPartRequestPath,
+                                        UploadPartRequestQuery,
+                                        UploadRequestPath,
+                                        UploadSessionRequestBody,
+                                        UploadSessionRequestPath)
 from backend.api.transformers import (transform_file_response,
-                                      transform_json_response)
+                                      transform_json_response,
+                                      transform_sendfile_response)
 from backend.domain import commands
 from backend.service_layer.message_bus import MessageBus
 
@@ -22,7 +27,7 @@ async def get(
     _path_parameters: dict,
     bus: MessageBus | None = None,
 ) -> web.Response:
-    bus = bus or await get_bus()
+    bus = bus or await get_bus(request)
     from ..routes import make_download_url
 
     cmd = commands.GetFile(
@@ -41,28 +46,47 @@ async def post(
     _body: PostRequestBody,
     bus: MessageBus | None = None,
 ) -> web.Response:
-    bus = bus or await get_bus()
+    bus = bus or await get_bus(request)
     from ..routes import make_upload_url
 
     cmd = commands.AddFile(
         account_name=_account_name,
         make_upload_url=make_upload_url,
         tag=_body.tag,
+        size=_body.size,
     )
     return await transform_json_response(await bus.handle(cmd))
 
 
 @middlewares.validate_path_parameters(DownloadRequestPath)
+@middlewares.validate_range_header()
+@middlewares.validate_accept_encoding_header()
 async def download(
     request: web.Request,
     _path_parameters: dict,
+    _ranges: list[tuple[int | None, int | None]] | None,
+    _if_range: str | None,
+    _accept_encoding: list[str],
     bus: MessageBus | None = None,
 ) -> web.StreamResponse:
-    bus = bus or await get_bus()
+    bus = bus or await get_bus(request)
 
-    cmd = commands.DownloadFile(link_id=_path_parameters["link_id"])
-    filename, size, gen = await bus.handle(cmd)
-    return await transform_file_response(request, filename, size, gen)
+    cmd = commands.DownloadFile(
+        link_id=_path_parameters["link_id"],
+        ranges=_ranges,
+        if_range=_if_range,
+        accept_encoding=_accept_encoding,
+    )
+    file_model, ranges, path, gens, encoding = await bus.handle(cmd)
+
+    if path is not None:
+        return await transform_sendfile_response(
+            request, file_model, ranges, path
+        )
+
+    return await transform_file_response(
+        request, file_model, ranges, gens, encoding
+    )
 
 
 @middlewares.validate_path_parameters(UploadRequestPath)
@@ -74,7 +98,7 @@ async def upload(
     _file: Callable[[int], Awaitable[bytearray]],
     bus: MessageBus | None = None,
 ) -> web.Response:
-    bus = bus or await get_bus()
+    bus = bus or await get_bus(request)
 
     cmd = commands.UploadFile(
         link_id=_path_parameters["link_id"],
@@ -84,6 +108,75 @@ async def upload(
     return await transform_json_response(await bus.handle(cmd))
 
 
+@middlewares.validate_path_parameters(UploadRequestPath)
+@middlewares.validate_json_body(UploadSessionRequestBody)
+async def add_upload_session(
+    request: web.Request,
+    _path_parameters: dict,
+    _body: UploadSessionRequestBody,
+    bus: MessageBus | None = None,
+) -> web.Response:
+    bus = bus or await get_bus(request)
+
+    cmd = commands.AddUploadSession(
+        link_id=_path_parameters["link_id"],
+        name=_body.name,
+        size=_body.size,
+    )
+    return await transform_json_response(await bus.handle(cmd))
+
+
+@middlewares.validate_path_parameters(UploadSessionRequestPath)
+async def get_upload_session(
+    request: web.Request,
+    _path_parameters: dict,
+    bus: MessageBus | None = None,
+) -> web.Response:
+    bus = bus or await get_bus(request)
+
+    cmd = commands.GetUploadSession(
+        link_id=_path_parameters["link_id"],
+        session_id=_path_parameters["session_id"],
+    )
+    return await transform_json_response(await bus.handle(cmd))
+
+
+@middlewares.validate_path_parameters(UploadPartRequestPath)
+@middlewares.validate_query_parameters(UploadPartRequestQuery)
+async def upload_part(
+    request: web.Request,
+    _path_parameters: dict,
+    _query_parameters: dict,
+    bus: MessageBus | None = None,
+) -> web.Response:
+    bus = bus or await get_bus(request)
+
+    #  Тело запроса - байты части файла без какой-либо обертки
+    cmd = commands.UploadFilePart(
+        link_id=_path_parameters["link_id"],
+        session_id=_path_parameters["session_id"],
+        number=_path_parameters["number"],
+        offset=_query_parameters["offset"],
+        get_coro_with_bytes_func=request.content.read,
+    )
+    return await transform_json_response(await bus.handle(cmd))
+
+
+@middlewares.validate_path_parameters(UploadSessionRequestPath)
+async def complete_upload_session(
+    request: web.Request,
+    _path_parameters: dict,
+    bus: MessageBus | None = None,
+) -> web.Response:
+    bus = bus or await get_bus(request)
+
+    cmd = commands.CompleteUploadSession(
+        link_id=_path_parameters["link_id"],
+        session_id=_path_parameters["session_id"],
+    )
+    return await transform_json_response(await bus.handle(cmd))
+
+
 @middlewares.verify_auth_token()
 @middlewares.validate_path_parameters(DeleteRequestPath)
 async def delete(
@@ -92,7 +185,7 @@ async def delete(
     _path_parameters: dict,
     bus: MessageBus | None = None,
 ) -> web.Response:
-    bus = bus or await get_bus()
+    bus = bus or await get_bus(request)
 
     cmd = commands.DeleteFile(
         account_name=_account_name, file_id=_path_parameters["file_id"]
@@ -16,6 +16,22 @@ ROUTES = [
 CORS_ROUTES = [
     ("GET", "/download/{link_id}/", files.download),
     ("POST", "/upload/{link_id}/", files.upload),
+    ("POST", "/upload/{link_id}/sessions/", files.add_upload_session),
+    (
+        "GET",
+        "/upload/{link_id}/sessions/{session_id}/",
+        files.get_upload_session,
+    ),
+    (
+        "PUT",
+        "/upload/{link_id}/sessions/{session_id}/parts/{number}/",
+        files.upload_part,
+    ),
+    (
+        "POST",
+        "/upload/{link_id}/sessions/{session_id}/complete/",
+        files.complete_upload_session,
+    ),
 ]
 
 
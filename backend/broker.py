@@ -8,9 +8,12 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(BASE_DIR)
 
 from backend.adapters.broker import RabbitConsumer
-from backend.core.config import broker_url, settings
+from backend.core.config import OUTGOING_MESSAGES_CHANNEL, broker_url, settings
 from backend.domain import commands
-from backend.service_layer.message_bus import get_message_bus
+from backend.service_layer.message_bus import (MessageBusFactory,
+                                               get_message_bus,
+                                               get_message_bus_factory)
+from backend.tools.delay import DelayCalculator
 from backend.tools.worker import AbstractWorker
 
 logger = logging.getLogger()
@@ -29,10 +32,13 @@ class MessagePublisher(AbstractWorker):
 
         self._delay_calculator.done()
 
-        for message in messages:
-            cmd = commands.PublishMessageToBroker(message)
-            is_ok = await self._bus.handle(cmd)
+        #  Сообщения отправляются окном, не дожидаясь подтверждения
+        #  каждого по отдельности
+        cmd = commands.PublishMessagesToBroker(messages)
+        async with self._keep_leased([x.id for x in messages]):
+            results = await self._bus.handle(cmd)
 
+        for message, is_ok in zip(messages, results):
             if is_ok:
                 logger.info(f"Send {message.id} - OK.")
                 ok_ids.append(message.id)
@@ -52,18 +58,23 @@ class MessagePublisher(AbstractWorker):
             messages = await self._bus.handle(cmd)
 
 
-def handler_for_new_broker_message(bus):
-    async def inner(
-        message_id: str, app_id: str, routing_key: str, body: dict
-    ) -> bool:
+def handler_for_new_broker_messages(bus_factory: MessageBusFactory):
+    async def inner(messages: list[tuple[str, str, str, dict]]) -> bool:
+        #  Пакеты обрабатываются параллельно, каждому своя транзакция
+        bus = bus_factory()
         try:
-            if app_id != settings.app_name:
-                return True
-
-            cmd = commands.AddIncomingBrokerMessage(
-                UUID(message_id), app_id, routing_key, body
+            cmd = commands.AddIncomingBrokerMessages(
+                [
+                    commands.AddIncomingBrokerMessage(
+                        UUID(message_id), app_id, routing_key, body
+                    )
+                    for message_id, app_id, routing_key, body in messages
+                    if app_id == settings.app_name
+                ]
             )
-            await bus.handle(cmd)
+            if cmd.messages:
+                await bus.handle(cmd)
+
             return True
 
         except Exception as e:
@@ -82,20 +93,26 @@ async def main():
                 "db",
                 "broker_message_repository",
             ]
-        )
+        ),
+        delay_calculator=DelayCalculator(limit=settings.worker_poll_interval),
+        channel=OUTGOING_MESSAGES_CHANNEL,
     )
     message_consumer = RabbitConsumer(
         broker_url,
         settings.broker.exchange,
         settings.broker.queue,
-        handler_for_new_broker_message(
-            await get_message_bus(
+        handler_for_new_broker_messages(
+            await get_message_bus_factory(
                 [
                     "db",
                     "broker_message_repository",
                 ]
             )
         ),
+        prefetch_count=settings.broker.consume_prefetch_count,
+        concurrency=settings.broker.consume_concurrency,
+        batch_size=settings.broker.consume_batch_size,
+        idempotency_window_size=settings.broker.consume_idempotency_window_size,
     )
 
     await asyncio.gather(
@@ -1,8 +1,9 @@
 import os
 from datetime import datetime, timedelta
 from logging import config as logging_config
+from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from backend.core.logger import LOGGING
@@ -19,6 +20,11 @@ class DatabaseSettings(BaseModel):
     user: str
     password: str
     dbname: str
+    #  Пул соединений
+    min_size: int = 10
+    max_size: int = 10
+    max_inactive_connection_lifetime: float = 300.0
+    statement_cache_size: int = 100
 
 
 class BrokerSettings(BaseSettings):
@@ -30,6 +36,12 @@ class BrokerSettings(BaseSettings):
     exchange: str
     queue: str
     publish_retry_count: int
+    publish_window_size: int = 100
+    publish_confirm_timeout: float = 30.0
+    consume_prefetch_count: int = 100
+    consume_concurrency: int = 4
+    consume_batch_size: int = 50
+    consume_idempotency_window_size: int = 100000
 
 
 class Settings(BaseSettings):
@@ -40,12 +52,52 @@ class Settings(BaseSettings):
     db: DatabaseSettings
     broker: BrokerSettings
     storage_path: str = Field("/storage")
+    storage_sendfile: bool = Field(True)
+    storage_fsync: Literal["none", "file", "file+dir"] = Field("file")
+    storage_hash_algorithm: Literal["sha256", "sha512", "blake2b"] = Field(
+        "sha256"
+    )
+    storage_time_for_temp_files: int = Field(86400)
+    storage_deduplication: bool = Field(False)
+    storage_compression: Literal["identity", "gzip", "zstd"] = Field(
+        "identity"
+    )
+    storage_compression_by_tag: dict[
+        str, Literal["identity", "gzip", "zstd"]
+    ] = Field({})
+    storage_chunk_size: int = Field(2**16)
+    #  Если больше storage_chunk_size, размер куска растет до этого значения
+    storage_max_chunk_size: int | None = Field(2**22)
     storage_time_for_links: int
+    auth_cache_size: int = Field(10000)
+    auth_cache_ttl: int = Field(60)
+    auth_cache_negative_ttl: int = Field(5)
+    #  Проверка подписки на изменения аккаунтов
+    auth_cache_check_interval: int = Field(10)
     storage_time_for_files: int
+    #  Стирание удаленных файлов: размер пачки и число одновременных
+    #  удалений с диска
+    storage_erase_chunk_size: int = Field(1000)
+    storage_erase_concurrency: int = Field(16)
     accounts_table: str = Field("accounts")
     files_table: str = Field("files")
     links_table: str = Field("links")
     broker_messages_table: str = Field("broker_messages")
+    blobs_table: str = Field("blobs")
+    #  Опрос очереди сообщений, если уведомление о новых сообщениях
+    #  не получено: повторные отправки и потеря подписки
+    worker_poll_interval: int = Field(10)
+    #  Параллельное выполнение входящих сообщений: число одновременно
+    #  выполняемых сообщений и суммарный размер скачиваемых файлов.
+    #  Каждое сообщение занимает соединение пула, поэтому число должно
+    #  быть меньше db.max_size
+    worker_concurrency: int = Field(8)
+    worker_max_in_flight_bytes: int = Field(2**30)
+    #  Время, на которое обработчик забирает сообщения очереди. Должно
+    #  превышать время обработки пачки
+    broker_messages_lease_time: int = Field(300)
+    upload_sessions_table: str = Field("upload_sessions")
+    upload_session_parts_table: str = Field("upload_session_parts")
 
     model_config = SettingsConfigDict(
         extra="allow",
@@ -57,9 +109,25 @@ class Settings(BaseSettings):
         env_nested_delimiter="__",
     )
 
+    @model_validator(mode="after")
+    def worker_concurrency_less_than_pool_size(self) -> "Settings":
+        if self.worker_concurrency >= self.db.max_size:
+            raise ValueError(
+                "worker_concurrency must be less than db.max_size"
+            )
+
+        return self
+
 
 settings = Settings()
 
+#  Каналы уведомлений (NOTIFY) заданы в триггерах миграций и должны
+#  совпадать с ними, поэтому не настраиваются через окружение
+ACCOUNTS_CHANNEL = "accounts_changed"  # 0008_accounts_notify
+#  0013_broker_messages_notify
+OUTGOING_MESSAGES_CHANNEL = "broker_messages_outgoing"
+INCOMING_MESSAGES_CHANNEL = "broker_messages_incoming"
+
 
 def tz_now(seconds: int = 0):
     # Moscow time on server
@@ -74,6 +142,15 @@ db_dsl = {
     "password": settings.db.password,
 }
 
+db_pool_options = {
+    "min_size": settings.db.min_size,
+    "max_size": settings.db.max_size,
+    "max_inactive_connection_lifetime": (
+        settings.db.max_inactive_connection_lifetime
+    ),
+    "statement_cache_size": settings.db.statement_cache_size,
+}
+
 broker_url = (
     f"amqp://{settings.broker.user}:"
     f"{settings.broker.password}@{settings.broker.host}:"
@@ -25,10 +25,20 @@ class ParameterBodyWrong(ApiException):
     pass
 
 
+class ParameterQueryWrong(ApiException):
+    pass
+
+
 class RequestBodyNotJson(ApiException):
     pass
 
 
+class RangeNotSatisfiable(ApiException):
+    def __init__(self, size: int):
+        super().__init__(size)
+        self.size = size
+
+
 ### SYNCRONIZATION
 
 
@@ -40,6 +50,10 @@ class FileSizeError(ApiException):
     pass
 
 
+class FileChecksumError(ApiException):
+    pass
+
+
 ### ACCOUNT
 
 
@@ -60,3 +74,11 @@ class NoSpaceInAccount(RepositoryException):
 
 class FileNotFound(RepositoryException):
     pass
+
+
+class FilePartWrong(RepositoryException):
+    pass
+
+
+class FileNotUploadedCompletely(RepositoryException):
+    pass
@@ -20,7 +20,9 @@ async def main():
     await startup()
 
     bus = await get_bus()
-    cmd = commands.EraseDeletedFiles(settings.storage_time_for_files)
+    cmd = commands.EraseDeletedFiles(
+        settings.storage_time_for_files, settings.storage_erase_chunk_size
+    )
     await bus.handle(cmd)
 
     await cleanup()
@@ -19,24 +19,24 @@ CHUNK_SIZE = 1000
 
 
 async def push(bus: MessageBus):
-    offset = 0
+    after = None
+    count = 0
 
     while True:
-        cmd = commands.GetStoredAndNotDeletedFiles(CHUNK_SIZE, offset)
+        cmd = commands.GetStoredAndNotDeletedFiles(CHUNK_SIZE, after)
         files = await bus.handle(cmd)
 
         if not files:
             break
 
-        for file in files:
-            message = messages.FileStored(file)
-            await bus.handle(commands.AddOutgoingBrokerMessage(message))
-
-        logger.info(
-            f"{len(files)} file with offset {offset} have been published"
+        cmd = commands.AddOutgoingBrokerMessages(
+            [messages.FileStored(x) for x in files]
         )
+        await bus.handle(cmd)
 
-        offset += len(files)
+        count += len(files)
+        after = files[-1].id
+        logger.info(f"{count} files have been published")
 
 
 async def main():
@@ -0,0 +1,26 @@
+import asyncio
+import logging
+import os
+import sys
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.append(BASE_DIR)
+
+from backend.service_layer.uow import sweep_file_storage
+
+logger = logging.getLogger()
+
+
+async def main():
+    #  Удаление временных файлов, оставшихся после прерванных загрузок.
+    #  Обходит все хранилище, поэтому выполняется по расписанию, а не при
+    #  запуске сервера
+    await sweep_file_storage()
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(main())
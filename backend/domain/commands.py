@@ -42,7 +42,8 @@ class GetFile(Command):
 @dataclass
 class GetStoredAndNotDeletedFiles(Command):
     chunk_size: int
-    offset: int
+    #  Файлы возвращаются по порядку id, начиная со следующего за after
+    after: UUID | None = None
 
 
 @dataclass
@@ -50,11 +51,16 @@ class AddFile(Command):
     account_name: str
     make_upload_url: Callable[[UUID], str]
     tag: str
+    #  Ожидаемый размер файла резервируется до окончания загрузки
+    size: int = 0
 
 
 @pydantic_dataclass
 class DownloadFile(Command):
     link_id: UUID
+    ranges: list[tuple[int | None, int | None]] | None = None
+    if_range: str | None = None
+    accept_encoding: list[str] | None = None
 
 
 @dataclass
@@ -64,6 +70,34 @@ class UploadFile(Command):
     get_coro_with_bytes_func: Callable[[int], Awaitable[bytearray]]
 
 
+@pydantic_dataclass
+class AddUploadSession(Command):
+    link_id: UUID
+    name: str
+    size: int
+
+
+@pydantic_dataclass
+class GetUploadSession(Command):
+    link_id: UUID
+    session_id: UUID
+
+
+@dataclass
+class UploadFilePart(Command):
+    link_id: UUID
+    session_id: UUID
+    number: int
+    offset: int
+    get_coro_with_bytes_func: Callable[[int], Awaitable[bytearray]]
+
+
+@pydantic_dataclass
+class CompleteUploadSession(Command):
+    link_id: UUID
+    session_id: UUID
+
+
 @pydantic_dataclass
 class DeleteFile(Command):
     account_name: str
@@ -77,6 +111,7 @@ class CloneFile(Command):
     name: str
     size: int
     tag: str
+    checksum: str = ""
 
 
 @pydantic_dataclass
@@ -87,6 +122,7 @@ class EraseFile(Command):
 @pydantic_dataclass
 class EraseDeletedFiles(Command):
     storage_time_in_sec: int
+    chunk_size: int
 
 
 # ***** LINK *****
@@ -118,6 +154,12 @@ class AddOutgoingBrokerMessage(Command):
     delay: int = 0
 
 
+@pydantic_dataclass
+class AddOutgoingBrokerMessages(Command):
+    messages: list[Message]
+    delay: int = 0
+
+
 @pydantic_dataclass
 class AddIncomingBrokerMessage(Command):
     id: UUID
@@ -126,6 +168,11 @@ class AddIncomingBrokerMessage(Command):
     body: dict
 
 
+@pydantic_dataclass
+class AddIncomingBrokerMessages(Command):
+    messages: list[AddIncomingBrokerMessage]
+
+
 @pydantic_dataclass
 class MarkBrokerMessageAsExecuted(Command):
     ids: list[UUID]
@@ -136,11 +183,21 @@ class ScheduleNextRetryForBrokerMessage(Command):
     ids: list[UUID]
 
 
+@pydantic_dataclass
+class RenewBrokerMessagesLease(Command):
+    ids: list[UUID]
+
+
 @pydantic_dataclass
 class PublishMessageToBroker(Command):
     message: BrokerMessage
 
 
+@pydantic_dataclass
+class PublishMessagesToBroker(Command):
+    messages: list[BrokerMessage]
+
+
 @pydantic_dataclass
 class ConsumeMessageFromBroker(Command):
     id: str
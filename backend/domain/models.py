@@ -5,6 +5,7 @@ from uuid import uuid4
 from pydantic import UUID4, BaseModel, Field, field_validator, model_serializer
 
 from backend.core.config import tz_now
+from backend.tools.checksums import split_checksum
 
 
 def convert_datetime_to_iso_8601_with_z_suffix(dt: datetime) -> str:
@@ -54,6 +55,7 @@ class Account(AbstractModel):
     total_size: int
     is_active: bool
     tags: list[str]
+    reserved_size: int = 0
 
     actual_size_greater_than_zero_or_equal = field_validator("actual_size")(
         greater_than_zero_or_equal
@@ -70,6 +72,8 @@ class File(AbstractModel, IdMixin, CreatedMixin):
     size: int
     tag: str
     account_name: str
+    checksum: str = ""
+    reserved_size: int = 0
     has_stored: bool = False
     stored: datetime | None = None
     has_deleted: bool = False
@@ -81,6 +85,13 @@ class File(AbstractModel, IdMixin, CreatedMixin):
         greater_than_zero_or_equal
     )
 
+    @property
+    def etag(self) -> str:
+        if self.checksum:
+            return f'"{split_checksum(self.checksum)[1]}"'
+
+        return f'"{self.stored_id.hex}-{self.size}"'
+
     def to_broker(self) -> dict[str, Any]:
         return {
             "id": self.id,
@@ -88,6 +99,7 @@ class File(AbstractModel, IdMixin, CreatedMixin):
             "name": self.name,
             "size": self.size,
             "tag": self.tag,
+            "checksum": self.checksum,
             "stored": self.stored,
             "deleted": self.deleted,
         }
@@ -99,6 +111,37 @@ class Link(AbstractModel, IdMixin, CreatedMixin):
     expired: datetime
 
 
+class UploadSession(AbstractModel, IdMixin, CreatedMixin):
+    link_id: UUID4
+    file_id: UUID4
+    name: str
+    size: int
+    updated: datetime = Field(default_factory=tz_now)
+
+    size_greater_than_zero_or_equal = field_validator("size")(
+        greater_than_zero_or_equal
+    )
+
+
+class UploadSessionPart(AbstractModel, CreatedMixin):
+    session_id: UUID4
+    number: int
+    offset: int
+    size: int
+
+    number_greater_than_zero_or_equal = field_validator("number")(
+        greater_than_zero_or_equal
+    )
+
+    offset_greater_than_zero_or_equal = field_validator("offset")(
+        greater_than_zero_or_equal
+    )
+
+    size_greater_than_zero_or_equal = field_validator("size")(
+        greater_than_zero_or_equal
+    )
+
+
 class BrokerMessage(AbstractModel, IdMixin, CreatedMixin):
     app: str
     key: str
@@ -110,6 +153,8 @@ class BrokerMessage(AbstractModel, IdMixin, CreatedMixin):
     count_of_retries: int = 0
     next_retry_at: datetime
     seconds_to_next_retry: int = 1
+    leased_until: datetime | None = None
+    leased_by: str | None = None
 
     count_of_retries_greater_than_zero_or_equal = field_validator(
         "count_of_retries"
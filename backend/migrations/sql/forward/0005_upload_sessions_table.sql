@@ -0,0 +1,22 @@
+CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+
+CREATE TABLE upload_sessions
+(
+    id UUID PRIMARY KEY,
+    link_id UUID NOT NULL UNIQUE REFERENCES links (id) ON DELETE CASCADE,
+    file_id UUID NOT NULL REFERENCES files (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    size BIGINT NOT NULL CHECK (size >= 0),
+    created TIMESTAMPTZ NOT NULL,
+    updated TIMESTAMPTZ NOT NULL
+);
+
+CREATE TABLE upload_session_parts
+(
+    session_id UUID NOT NULL REFERENCES upload_sessions (id) ON DELETE CASCADE,
+    "number" INTEGER NOT NULL CHECK ("number" >= 0),
+    "offset" BIGINT NOT NULL CHECK ("offset" >= 0),
+    size BIGINT NOT NULL CHECK (size >= 0),
+    created TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (session_id, "number")
+);
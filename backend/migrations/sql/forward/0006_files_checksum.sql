@@ -0,0 +1 @@
+ALTER TABLE files ADD COLUMN checksum TEXT NOT NULL DEFAULT '';
@@ -0,0 +1,16 @@
+CREATE TABLE blobs
+(
+    id UUID PRIMARY KEY,
+    checksum TEXT NOT NULL,
+    size BIGINT NOT NULL CHECK (size >= 0),
+    refs INT NOT NULL CHECK (refs >= 0),
+    created TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX blobs_checksum_idx ON blobs (checksum) WHERE checksum <> '';
+
+INSERT INTO blobs (id, checksum, size, refs, created)
+SELECT stored_id, MAX(checksum), MAX(size), COUNT(*), NOW()
+FROM files
+WHERE has_stored = TRUE AND has_erased = FALSE
+GROUP BY stored_id;
@@ -0,0 +1,29 @@
+--  Канал accounts_changed должен совпадать с ACCOUNTS_CHANNEL
+--  в backend/core/config.py
+CREATE OR REPLACE FUNCTION notify_accounts_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_LEVEL = 'STATEMENT' THEN
+        --  Пустое сообщение - изменились все записи
+        PERFORM pg_notify('accounts_changed', '');
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM pg_notify('accounts_changed', OLD.auth_token::text);
+    END IF;
+
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM pg_notify('accounts_changed', NEW.auth_token::text);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER accounts_changed
+AFTER INSERT OR DELETE OR UPDATE OF name, auth_token, is_active ON accounts
+FOR EACH ROW EXECUTE FUNCTION notify_accounts_changed();
+
+CREATE TRIGGER accounts_truncated
+AFTER TRUNCATE ON accounts
+FOR EACH STATEMENT EXECUTE FUNCTION notify_accounts_changed();
@@ -0,0 +1,29 @@
+--  files: сохраненные и не удаленные файлы по порядку id
+CREATE INDEX files_stored_not_deleted_idx ON files (id)
+WHERE has_stored = TRUE AND has_deleted = FALSE;
+
+--  files: удаленные, но не стертые файлы
+CREATE INDEX files_deleted_not_erased_idx ON files (deleted)
+WHERE has_deleted = TRUE AND has_erased = FALSE;
+
+--  files: занятое место по аккаунтам
+CREATE INDEX files_account_name_stored_idx ON files (account_name) INCLUDE (size)
+WHERE has_stored = TRUE AND has_erased = FALSE;
+
+--  links: удаление по файлу и удаление просроченных ссылок
+CREATE INDEX links_file_id_idx ON links (file_id);
+CREATE INDEX links_expired_idx ON links (expired);
+
+--  broker_messages: очередь сообщений на выполнение
+DROP INDEX broker_messages_has_executed;
+DROP INDEX broker_messages_has_execution_stopped;
+
+CREATE INDEX broker_messages_not_executed_idx
+ON broker_messages (direction, next_retry_at)
+WHERE has_executed = FALSE AND has_execution_stopped = FALSE;
+
+CREATE INDEX broker_messages_executed_idx ON broker_messages ((1))
+WHERE has_executed = TRUE;
+
+--  upload_sessions: каскадное удаление вместе с файлом
+CREATE INDEX upload_sessions_file_id_idx ON upload_sessions (file_id);
@@ -0,0 +1,63 @@
+--  Занятое аккаунтом место: сумма размеров сохраненных и не стертых файлов.
+--  Изменения считаются один раз на запрос, а не на каждую строку
+CREATE OR REPLACE FUNCTION update_accounts_actual_size() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        WITH delta AS (
+            SELECT account_name, SUM(size) AS size FROM new_files
+            WHERE has_stored = TRUE AND has_erased = FALSE
+            GROUP BY account_name
+        )
+        UPDATE accounts SET actual_size = actual_size + delta.size
+        FROM delta
+        WHERE name = delta.account_name AND delta.size <> 0;
+
+    ELSIF TG_OP = 'DELETE' THEN
+        WITH delta AS (
+            SELECT account_name, SUM(size) AS size FROM old_files
+            WHERE has_stored = TRUE AND has_erased = FALSE
+            GROUP BY account_name
+        )
+        UPDATE accounts SET actual_size = GREATEST(actual_size - delta.size, 0)
+        FROM delta
+        WHERE name = delta.account_name AND delta.size <> 0;
+
+    ELSE
+        WITH changes AS (
+            SELECT account_name, size FROM new_files
+            WHERE has_stored = TRUE AND has_erased = FALSE
+            UNION ALL
+            SELECT account_name, -size FROM old_files
+            WHERE has_stored = TRUE AND has_erased = FALSE
+        ), delta AS (
+            SELECT account_name, SUM(size) AS size FROM changes
+            GROUP BY account_name
+        )
+        UPDATE accounts SET actual_size = GREATEST(actual_size + delta.size, 0)
+        FROM delta
+        WHERE name = delta.account_name AND delta.size <> 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER files_actual_size_inserted
+AFTER INSERT ON files
+REFERENCING NEW TABLE AS new_files
+FOR EACH STATEMENT EXECUTE FUNCTION update_accounts_actual_size();
+
+CREATE TRIGGER files_actual_size_updated
+AFTER UPDATE ON files
+REFERENCING OLD TABLE AS old_files NEW TABLE AS new_files
+FOR EACH STATEMENT EXECUTE FUNCTION update_accounts_actual_size();
+
+CREATE TRIGGER files_actual_size_deleted
+AFTER DELETE ON files
+REFERENCING OLD TABLE AS old_files
+FOR EACH STATEMENT EXECUTE FUNCTION update_accounts_actual_size();
+
+UPDATE accounts SET actual_size = COALESCE((
+    SELECT SUM(size) FROM files
+    WHERE account_name = accounts.name AND has_stored = TRUE AND has_erased = FALSE
+), 0);
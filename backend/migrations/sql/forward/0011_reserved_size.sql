@@ -0,0 +1,8 @@
+--  Место, зарезервированное под еще не загруженные файлы
+ALTER TABLE accounts
+ADD COLUMN reserved_size BIGINT NOT NULL DEFAULT 0 CHECK (reserved_size >= 0);
+
+ALTER TABLE files
+ADD COLUMN reserved_size BIGINT NOT NULL DEFAULT 0 CHECK (reserved_size >= 0);
+
+CREATE INDEX files_reserved_idx ON files (id) WHERE reserved_size > 0;
@@ -0,0 +1,5 @@
+--  Стирание удаленных файлов идет пачками по порядку (deleted, id)
+DROP INDEX files_deleted_not_erased_idx;
+
+CREATE INDEX files_deleted_not_erased_idx ON files (deleted, id)
+WHERE has_deleted = TRUE AND has_erased = FALSE;
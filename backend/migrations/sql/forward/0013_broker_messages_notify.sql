@@ -0,0 +1,22 @@
+--  Уведомление обработчиков очереди о новых сообщениях. Уведомления
+--  отправляются при фиксации транзакции, одинаковые объединяются.
+--  Каналы должны совпадать с OUTGOING_MESSAGES_CHANNEL и
+--  INCOMING_MESSAGES_CHANNEL в backend/core/config.py
+CREATE OR REPLACE FUNCTION notify_broker_messages_added() RETURNS trigger AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM new_messages WHERE direction = 'O') THEN
+        PERFORM pg_notify('broker_messages_outgoing', '');
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM new_messages WHERE direction = 'I') THEN
+        PERFORM pg_notify('broker_messages_incoming', '');
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER broker_messages_added
+AFTER INSERT ON broker_messages
+REFERENCING NEW TABLE AS new_messages
+FOR EACH STATEMENT EXECUTE FUNCTION notify_broker_messages_added();
@@ -0,0 +1,4 @@
+--  Аренда сообщения обработчиком: пока срок не истек, другие
+--  обработчики сообщение не выбирают
+ALTER TABLE broker_messages ADD COLUMN leased_until TIMESTAMPTZ NULL;
+ALTER TABLE broker_messages ADD COLUMN leased_by TEXT NULL;
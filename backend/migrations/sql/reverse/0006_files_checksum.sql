@@ -0,0 +1 @@
+ALTER TABLE files DROP COLUMN IF EXISTS checksum;
@@ -0,0 +1,3 @@
+DROP TRIGGER accounts_truncated ON accounts;
+DROP TRIGGER accounts_changed ON accounts;
+DROP FUNCTION notify_accounts_changed;
@@ -0,0 +1,14 @@
+DROP INDEX upload_sessions_file_id_idx;
+
+DROP INDEX broker_messages_executed_idx;
+DROP INDEX broker_messages_not_executed_idx;
+
+CREATE INDEX broker_messages_has_executed ON broker_messages ((1)) WHERE has_executed = FALSE;
+CREATE INDEX broker_messages_has_execution_stopped ON broker_messages ((1)) WHERE has_execution_stopped = FALSE;
+
+DROP INDEX links_expired_idx;
+DROP INDEX links_file_id_idx;
+
+DROP INDEX files_account_name_stored_idx;
+DROP INDEX files_deleted_not_erased_idx;
+DROP INDEX files_stored_not_deleted_idx;
@@ -0,0 +1,4 @@
+DROP TRIGGER files_actual_size_deleted ON files;
+DROP TRIGGER files_actual_size_updated ON files;
+DROP TRIGGER files_actual_size_inserted ON files;
+DROP FUNCTION update_accounts_actual_size;
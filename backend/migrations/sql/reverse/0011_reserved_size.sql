@@ -0,0 +1,3 @@
+DROP INDEX files_reserved_idx;
+ALTER TABLE files DROP COLUMN reserved_size;
+ALTER TABLE accounts DROP COLUMN reserved_size;
@@ -0,0 +1,4 @@
+DROP INDEX files_deleted_not_erased_idx;
+
+CREATE INDEX files_deleted_not_erased_idx ON files (deleted)
+WHERE has_deleted = TRUE AND has_erased = FALSE;
@@ -0,0 +1,2 @@
+DROP TRIGGER broker_messages_added ON broker_messages;
+DROP FUNCTION notify_broker_messages_added;
@@ -0,0 +1,2 @@
+ALTER TABLE broker_messages DROP COLUMN leased_by;
+ALTER TABLE broker_messages DROP COLUMN leased_until;
@@ -8,18 +8,23 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(BASE_DIR)
 
 from backend.api import middlewares
+from backend.api.dependables import init_bus_factory
 from backend.api.v1.routes import CORS_ROUTES, ROUTES
 from backend.core.config import settings
-from backend.service_layer.uow import (close_db_pool, close_http_session,
+from backend.service_layer.uow import (close_auth_cache, close_db_pool,
+                                       close_http_session, init_auth_cache,
                                        init_db_pool, init_http_session)
 
 
 async def startup(app):
     await init_db_pool()
     await init_http_session()
+    await init_auth_cache()
+    await init_bus_factory(app)
 
 
 async def cleanup(app):
+    await close_auth_cache()
     await close_db_pool()
     await close_http_session()
 
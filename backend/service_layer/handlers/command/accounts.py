@@ -1,8 +1,10 @@
 import logging
 from uuid import UUID
 
+from backend.adapters.cache import MISSING
 from backend.api.responses.accounts import AccountResponse
 from backend.core import exceptions
+from backend.core.config import settings
 from backend.domain import commands
 from backend.service_layer.uow import AbstractUnitOfWork
 
@@ -23,12 +25,33 @@ async def get_account_name_by_auth_token(
     cmd: commands.GetAccountNameByAuthToken,
     uow: AbstractUnitOfWork,
 ) -> UUID | None:
+    cache = uow.auth_cache
+
+    if cache is not None:
+        account_name = cache.get(cmd.auth_token)
+        if account_name is not MISSING:
+            return account_name
+
+        generation = cache.generation
+
     async with uow:
         try:
             model = await uow.account_repository.get_by_token(cmd.auth_token)
-            return model.name if model.is_active is True else None
+            account_name = model.name if model.is_active is True else None
         except exceptions.AccountNotFound:
-            return None
+            account_name = None
+
+    #  Неизвестные и неактивные токены тоже кэшируются, но на меньшее время.
+    #  Если во время чтения пришло уведомление об изменении аккаунтов,
+    #  прочитанное значение может быть устаревшим и не кэшируется
+    if cache is not None and cache.generation == generation:
+        cache.set(
+            cmd.auth_token,
+            account_name,
+            None if account_name else settings.auth_cache_negative_ttl,
+        )
+
+    return account_name
 
 
 async def update_accounts_actual_sizes(
@@ -36,15 +59,8 @@ async def update_accounts_actual_sizes(
     uow: AbstractUnitOfWork,
 ):
     async with uow:
-        arr: list[
-            tuple[str, int]
-        ] = await uow.file_repository.get_actual_account_sizes()
-        for account_name, size in arr:
-            await uow.account_repository.update_actual_size(account_name, size)
-
-        account_names = [x[0] for x in arr]
-        await uow.account_repository.set_actual_size_for_excluded(
-            account_names
-        )
-
+        names = await uow.account_repository.reconcile_actual_sizes()
         await uow.commit()
+
+    if names:
+        logger.warning(f"Actual size has been corrected for accounts {names}")
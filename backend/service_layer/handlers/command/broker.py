@@ -12,9 +12,13 @@ async def get_not_executed_outgoing(
     uow: AbstractUnitOfWork,
 ) -> list[models.BrokerMessage]:
     async with uow:
-        return await uow.broker_message_repository.get_not_executed_outgoing(
-            cmd.chunk_size
+        messages = (
+            await uow.broker_message_repository.get_not_executed_outgoing(
+                cmd.chunk_size
+            )
         )
+        await uow.commit()
+        return messages
 
 
 async def get_not_executed_incoming(
@@ -22,9 +26,13 @@ async def get_not_executed_incoming(
     uow: AbstractUnitOfWork,
 ) -> list[models.BrokerMessage]:
     async with uow:
-        return await uow.broker_message_repository.get_not_executed_incoming(
-            cmd.chunk_size
+        messages = (
+            await uow.broker_message_repository.get_not_executed_incoming(
+                cmd.chunk_size
+            )
         )
+        await uow.commit()
+        return messages
 
 
 async def add_outgoing(
@@ -38,6 +46,17 @@ async def add_outgoing(
         await uow.commit()
 
 
+async def add_outgoing_many(
+    cmd: commands.AddOutgoingBrokerMessages,
+    uow: AbstractUnitOfWork,
+) -> None:
+    async with uow:
+        await uow.broker_message_repository.add_outgoing_many(
+            [(x.key, x.to_broker) for x in cmd.messages], cmd.delay
+        )
+        await uow.commit()
+
+
 async def add_incoming(
     cmd: commands.AddIncomingBrokerMessage,
     uow: AbstractUnitOfWork,
@@ -49,6 +68,17 @@ async def add_incoming(
         await uow.commit()
 
 
+async def add_incoming_many(
+    cmd: commands.AddIncomingBrokerMessages,
+    uow: AbstractUnitOfWork,
+) -> None:
+    async with uow:
+        await uow.broker_message_repository.add_incoming_many(
+            [(x.id, x.app, x.key, x.body) for x in cmd.messages]
+        )
+        await uow.commit()
+
+
 async def mark_as_executed(
     cmd: commands.MarkBrokerMessageAsExecuted,
     uow: AbstractUnitOfWork,
@@ -58,6 +88,15 @@ async def mark_as_executed(
         await uow.commit()
 
 
+async def renew_lease(
+    cmd: commands.RenewBrokerMessagesLease,
+    uow: AbstractUnitOfWork,
+):
+    async with uow:
+        await uow.broker_message_repository.renew_lease(cmd.ids)
+        await uow.commit()
+
+
 async def schedule_next_retry(
     cmd: commands.ScheduleNextRetryForBrokerMessage,
     uow: AbstractUnitOfWork,
@@ -76,6 +115,15 @@ async def publish(
     )
 
 
+async def publish_many(
+    cmd: commands.PublishMessagesToBroker,
+    uow: AbstractUnitOfWork,
+) -> list[bool]:
+    return await uow.broker_publisher.push_messages(
+        [(x.app, x.key, x.body, x.id) for x in cmd.messages]
+    )
+
+
 async def execute(
     cmd: commands.ExecuteBrokerMessage,
     uow: AbstractUnitOfWork,
@@ -112,6 +160,8 @@ async def file_stored_handler(uow: AbstractUnitOfWork, data: dict):
             data["name"],
             data["size"],
             data["tag"],
+            #  Серверы предыдущих версий не передают контрольную сумму
+            data.get("checksum", ""),
         )
     )
 
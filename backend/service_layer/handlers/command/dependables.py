@@ -1,6 +1,6 @@
 from backend.domain import commands
 from backend.service_layer.handlers.command import (accounts, broker, files,
-                                                    links)
+                                                    links, uploads)
 
 COMMAND_HANDLERS = {
     # ACCOUNT
@@ -17,6 +17,11 @@ COMMAND_HANDLERS = {
     commands.EraseFile: files.erase,
     commands.CloneFile: files.clone,
     commands.EraseDeletedFiles: files.erase_deleted,
+    # UPLOAD SESSION
+    commands.AddUploadSession: uploads.add_session,
+    commands.GetUploadSession: uploads.get_session,
+    commands.UploadFilePart: uploads.upload_part,
+    commands.CompleteUploadSession: uploads.complete_session,
     # LINK
     commands.DeleteExpiredLinks: links.delete_expired,
     # BROKER
@@ -24,9 +29,13 @@ COMMAND_HANDLERS = {
     commands.GetMessagesReceivedFromBroker: broker.get_not_executed_incoming,
     commands.DeleteExecutedBrokerMessages: broker.delete_executed,
     commands.AddIncomingBrokerMessage: broker.add_incoming,
+    commands.AddIncomingBrokerMessages: broker.add_incoming_many,
     commands.AddOutgoingBrokerMessage: broker.add_outgoing,
+    commands.AddOutgoingBrokerMessages: broker.add_outgoing_many,
     commands.ExecuteBrokerMessage: broker.execute,
     commands.MarkBrokerMessageAsExecuted: broker.mark_as_executed,
     commands.ScheduleNextRetryForBrokerMessage: broker.schedule_next_retry,
+    commands.RenewBrokerMessagesLease: broker.renew_lease,
     commands.PublishMessageToBroker: broker.publish,
+    commands.PublishMessagesToBroker: broker.publish_many,
 }
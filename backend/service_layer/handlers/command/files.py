@@ -1,10 +1,13 @@
 import asyncio
 import logging
-from typing import AsyncGenerator, Awaitable
-from uuid import UUID
+import time
+from contextlib import AsyncExitStack
+from typing import AsyncGenerator
+from uuid import UUID, uuid4
 
 import aiohttp
 
+from backend.adapters.file_storage.abstract import SavedFile
 from backend.api.responses.abstract import EmptyResponse
 from backend.api.responses.files import (FileResponse, FileResponseWithLink,
                                          NotStoredFileResponse)
@@ -12,6 +15,9 @@ from backend.core import exceptions
 from backend.core.config import settings
 from backend.domain import commands, events, models
 from backend.service_layer.uow import AbstractUnitOfWork
+from backend.tools.checksums import split_checksum
+from backend.tools.limits import limit_bytes
+from backend.tools.ranges import resolve_ranges
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +48,7 @@ async def get_stored_and_not_deleted(
 ) -> list[models.File]:
     async with uow:
         return await uow.file_repository.get_stored_and_not_deleted(
-            cmd.chunk_size, cmd.offset
+            cmd.chunk_size, cmd.after
         )
 
 
@@ -52,9 +58,11 @@ async def add(
 ) -> NotStoredFileResponse:
     async with uow:
         await uow.account_repository.verify_ready_to_add(
-            cmd.account_name, cmd.tag
+            cmd.account_name, cmd.tag, cmd.size
+        )
+        file_model = await uow.file_repository.add(
+            cmd.account_name, cmd.tag, reserved_size=cmd.size
         )
-        file_model = await uow.file_repository.add(cmd.account_name, cmd.tag)
         link_model = await uow.link_repository.add_upload(
             file_model.id, settings.storage_time_for_links
         )
@@ -68,13 +76,53 @@ async def add(
 async def download(
     cmd: commands.DownloadFile,
     uow: AbstractUnitOfWork,
-) -> tuple[str, int, Awaitable[AsyncGenerator[bytes, None]]]:
+) -> tuple[
+    models.File,
+    list[tuple[int, int]] | None,
+    str | None,
+    list[AsyncGenerator[bytes, None]],
+    str | None,
+]:
     async with uow:
         link_model = await uow.link_repository.get_download(cmd.link_id)
         file_model = await uow.file_repository.get(link_model.file_id)
-        gen = await uow.file_repository.take(file_model.id)
 
-        return file_model.name, file_model.size, gen
+        #  If-Range: диапазоны учитываются, только если файл не изменился,
+        #  иначе отдаем файл целиком
+        ranges = (
+            resolve_ranges(cmd.ranges, file_model.size)
+            if cmd.ranges
+            and (cmd.if_range is None or cmd.if_range == file_model.etag)
+            else None
+        )
+
+        #  Если клиент принимает кодирование, в котором файл хранится,
+        #  файл отдается без распаковки
+        if ranges is None and cmd.accept_encoding:
+            encoded = await uow.file_repository.take_encoded(
+                file_model.id, cmd.accept_encoding
+            )
+            if encoded is not None:
+                encoding, gen = encoded
+                return file_model, None, None, [gen], encoding
+
+        #  Если файл доступен локально, он будет отдан через sendfile,
+        #  иначе - потоком из хранилища
+        path = await uow.file_repository.take_path(file_model.id)
+
+        if path is not None:
+            gens = []
+        elif ranges is None:
+            gens = [await uow.file_repository.take(file_model.id)]
+        else:
+            gens = [
+                await uow.file_repository.take(
+                    file_model.id, start, end - start + 1
+                )
+                for start, end in ranges
+            ]
+
+        return file_model, ranges, path, gens, None
 
 
 async def upload(
@@ -86,13 +134,24 @@ async def upload(
         file_model = await uow.file_repository.get_not_stored(
             link_model.file_id
         )
-        size = await uow.file_repository.store(
-            file_model.id, cmd.get_coro_with_bytes_func
-        )
+
+        #  Файл не должен превышать зарезервированное место, иначе
+        #  параллельные загрузки превысят квоту
+        get_bytes = cmd.get_coro_with_bytes_func
+        if file_model.reserved_size:
+            get_bytes = limit_bytes(
+                get_bytes,
+                file_model.reserved_size,
+                exceptions.NoSpaceInAccount,
+            )
+
+        saved = await uow.file_repository.store(file_model.id, get_bytes)
 
         model = await uow.file_repository.mark_as_stored(
-            file_model.id, cmd.filename, size
+            file_model.id, cmd.filename, saved.size, saved.checksum
         )
+        #  Вместо резерва учитывается фактический размер файла
+        await uow.file_repository.release_reserved(file_model.id)
         await uow.link_repository.delete(cmd.link_id)
         await uow.commit()
 
@@ -125,29 +184,64 @@ async def erase(
     uow: AbstractUnitOfWork,
 ) -> EmptyResponse:
     async with uow:
-        await uow.file_repository.erase(cmd.file_id)
+        unreferenced = await uow.file_repository.erase(cmd.file_id)
         await uow.commit()
-        return EmptyResponse()
+
+    await erase_contents(uow, unreferenced)
+    return EmptyResponse()
+
+
+async def erase_contents(uow: AbstractUnitOfWork, ids: list[UUID]) -> int:
+    """
+    Удаление из хранилища содержимого, на которое больше нет ссылок.
+    Вызывается после фиксации транзакции. Не удаленное содержимое остается
+    в хранилище без ссылок и на файлы не влияет. Возвращает количество
+    не удаленных.
+
+    """
+
+    results = await uow.file_storage.erase_many(ids)
+    failed = [x for x, is_erased in zip(ids, results) if not is_erased]
+    if failed:
+        logger.warning(f"Contents {failed} have not been erased from storage")
+
+    return len(failed)
 
 
 async def erase_deleted(
     cmd: commands.EraseDeletedFiles,
     uow: AbstractUnitOfWork,
 ):
-    async with uow:
-        files_to_be_erased = (
-            await uow.file_repository.get_deleted_and_not_erased(
-                cmd.storage_time_in_sec
+    logger.warning("Start to erase files.")
+    started = time.monotonic()
+    after, erased_count, failed_count = None, 0, 0
+
+    #  Файлы обрабатываются пачками, каждая в своей транзакции
+    while True:
+        async with uow:
+            files = await uow.file_repository.get_deleted_and_not_erased(
+                cmd.storage_time_in_sec, cmd.chunk_size, after
             )
-        )
+            if not files:
+                break
 
-        logger.warning("Start to erase files.")
+            erased, unreferenced = await uow.file_repository.erase_many(
+                [x.id for x in files]
+            )
+            await uow.commit()
 
-        for file in files_to_be_erased:
-            uow.push_message(commands.EraseFile(file.id))
-            logger.warning(f"{file.id} has been erased")
+        after = files[-1]
+        erased_count += len(erased)
+        failed_count += await erase_contents(uow, unreferenced)
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"Erased {erased_count} files, failed {failed_count}, "
+            f"{erased_count / elapsed:.1f} files/sec"
+        )
 
-        logger.warning(f"Count of erased files: {len(files_to_be_erased)}")
+    logger.warning(
+        f"Count of erased files: {erased_count}, failed: {failed_count}"
+    )
 
 
 async def clone(
@@ -179,6 +273,31 @@ async def clone(
         ):
             return
 
+    #  Если хранилище объединяет одинаковое содержимое и такое содержимое
+    #  уже хранится, файл добавляется без скачивания
+    if cmd.checksum and uow.file_storage.deduplicates:
+        async with uow:
+            model = await uow.file_repository.add(
+                cmd.account_name, cmd.tag, cmd.file_id
+            )
+            saved = await uow.file_repository.store_by_checksum(
+                model.id, cmd.checksum
+            )
+
+            if saved is not None:
+                if saved.size != cmd.size:
+                    raise exceptions.FileSizeError
+
+                model = await uow.file_repository.mark_as_stored(
+                    model.id, cmd.name, saved.size, saved.checksum
+                )
+                await uow.commit()
+
+        if model.has_stored:
+            logger.info(f"File {model.id} cloned without downloading")
+            uow.push_message(events.FileStored(model))
+            return
+
     #  Если нужен, обращаемся ко всем хранилищам,
     #  чтобы получить ссылку для скачивания
 
@@ -226,20 +345,35 @@ async def clone(
     response = await session.get(download_link)
     assert response.status == 200
 
-    async with uow:
-        model = await uow.file_repository.add(
-            cmd.account_name, cmd.tag, cmd.file_id
-        )
+    #  Файл скачивается вне транзакции, чтобы не занимать соединение пула
+    #  на время передачи. Транзакция открывается, когда файл получен
+    #  целиком, перед тем как поместить его в хранилище
+    async with AsyncExitStack() as stack:
+
+        async def claim(saved: SavedFile):
+            if saved.size != cmd.size:
+                raise exceptions.FileSizeError
+
+            #  Суммы сравниваются, только если посчитаны одним алгоритмом
+            algorithm, _ = split_checksum(cmd.checksum)
+            if (
+                algorithm == split_checksum(saved.checksum)[0]
+                and cmd.checksum != saved.checksum
+            ):
+                raise exceptions.FileChecksumError
+
+            await stack.enter_async_context(uow)
+            model = await uow.file_repository.add(
+                cmd.account_name, cmd.tag, cmd.file_id
+            )
+            await uow.file_repository.claim(model.id, saved)
 
-        size = await uow.file_repository.store(
-            model.id, response.content.iter_chunked
+        saved = await uow.file_storage.save(
+            uuid4(), response.content.iter_chunked, claim, cmd.tag
         )
 
-        if size != cmd.size:
-            raise exceptions.FileSizeError
-
         model = await uow.file_repository.mark_as_stored(
-            model.id, cmd.name, size
+            cmd.file_id, cmd.name, saved.size, saved.checksum
         )
 
         await uow.commit()
@@ -11,5 +11,7 @@ async def delete_expired(
     uow: AbstractUnitOfWork,
 ):
     async with uow:
+        #  Резерв файлов, которые так и не были загружены
+        await uow.file_repository.release_expired_reserved()
         await uow.link_repository.delete_expired()
         await uow.commit()
@@ -0,0 +1,128 @@
+import logging
+
+from backend.api.responses.files import (FileResponse, UploadPartResponse,
+                                         UploadSessionResponse)
+from backend.core import exceptions
+from backend.domain import commands, events, models
+from backend.service_layer.uow import AbstractUnitOfWork
+from backend.tools.limits import limit_bytes
+from backend.tools.ranges import merge_ranges
+
+logger = logging.getLogger(__name__)
+
+
+def _get_received_ranges(
+    parts: list[models.UploadSessionPart],
+) -> list[tuple[int, int]]:
+    return merge_ranges(
+        [(x.offset, x.offset + x.size - 1) for x in parts if x.size > 0]
+    )
+
+
+def _make_session_response(
+    session: models.UploadSession, parts: list[models.UploadSessionPart]
+) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        id=session.id,
+        name=session.name,
+        size=session.size,
+        received=_get_received_ranges(parts),
+    )
+
+
+async def add_session(
+    cmd: commands.AddUploadSession,
+    uow: AbstractUnitOfWork,
+) -> UploadSessionResponse:
+    async with uow:
+        link_model = await uow.link_repository.get_upload(cmd.link_id)
+        file_model = await uow.file_repository.get_not_stored(
+            link_model.file_id
+        )
+
+        #  Размер файла не должен превышать зарезервированное место
+        if file_model.reserved_size and cmd.size > file_model.reserved_size:
+            raise exceptions.NoSpaceInAccount
+
+        session = await uow.upload_session_repository.add(
+            link_model.id, file_model.id, cmd.name, cmd.size
+        )
+        parts = await uow.upload_session_repository.get_parts(session.id)
+        await uow.commit()
+
+    return _make_session_response(session, parts)
+
+
+async def get_session(
+    cmd: commands.GetUploadSession,
+    uow: AbstractUnitOfWork,
+) -> UploadSessionResponse:
+    async with uow:
+        link_model = await uow.link_repository.get_upload(cmd.link_id)
+        session = await uow.upload_session_repository.get(
+            cmd.session_id, link_model.id
+        )
+        parts = await uow.upload_session_repository.get_parts(session.id)
+
+    return _make_session_response(session, parts)
+
+
+async def upload_part(
+    cmd: commands.UploadFilePart,
+    uow: AbstractUnitOfWork,
+) -> UploadPartResponse:
+    async with uow:
+        link_model = await uow.link_repository.get_upload(cmd.link_id)
+        session = await uow.upload_session_repository.get(
+            cmd.session_id, link_model.id
+        )
+        if cmd.offset > session.size:
+            raise exceptions.FilePartWrong
+
+        #  Часть не должна выходить за объявленный размер файла
+        size = await uow.file_repository.store_part(
+            session.file_id,
+            cmd.offset,
+            limit_bytes(
+                cmd.get_coro_with_bytes_func,
+                session.size - cmd.offset,
+                exceptions.FilePartWrong,
+            ),
+        )
+        part = await uow.upload_session_repository.add_part(
+            session.id, cmd.number, cmd.offset, size
+        )
+        await uow.commit()
+
+    return UploadPartResponse(**dict(part))
+
+
+async def complete_session(
+    cmd: commands.CompleteUploadSession,
+    uow: AbstractUnitOfWork,
+) -> FileResponse:
+    async with uow:
+        link_model = await uow.link_repository.get_upload(cmd.link_id)
+        session = await uow.upload_session_repository.get(
+            cmd.session_id, link_model.id
+        )
+        parts = await uow.upload_session_repository.get_parts(session.id)
+
+        expected = [(0, session.size - 1)] if session.size > 0 else []
+        if _get_received_ranges(parts) != expected:
+            raise exceptions.FileNotUploadedCompletely
+
+        saved = await uow.file_repository.commit_parts(
+            session.file_id, session.size
+        )
+        model = await uow.file_repository.mark_as_stored(
+            session.file_id, session.name, saved.size, saved.checksum
+        )
+        await uow.file_repository.release_reserved(session.file_id)
+
+        #  Сессия и ее части удаляются каскадно вместе со ссылкой
+        await uow.link_repository.delete(cmd.link_id)
+        await uow.commit()
+
+    uow.push_message(events.FileStored(model))
+    return FileResponse(**dict(model))
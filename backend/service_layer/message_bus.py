@@ -73,6 +73,44 @@ class MessageBus:
             raise e
 
 
+class MessageBusFactory:
+    """
+    Создает MessageBus на каждый запрос. Общие ресурсы UnitOfWork
+    подготавливаются один раз при создании фабрики.
+
+    """
+
+    def __init__(
+        self,
+        uow: UnitOfWork,
+        event_handlers: dict[Type[events.Event], list[Callable]],
+        command_handlers: dict[Type[commands.Command], Callable],
+    ):
+        self._uow = uow
+        self._event_handlers = event_handlers
+        self._command_handlers = command_handlers
+
+    def __call__(self) -> MessageBus:
+        return MessageBus(
+            self._uow.fork(), self._event_handlers, self._command_handlers
+        )
+
+
+async def get_message_bus_factory(
+    bootstrap: list[str],
+    event_handlers: dict[
+        Type[events.Event],
+        list[Callable],
+    ] = EVENT_HANDLERS,
+    command_handlers: dict[
+        Type[commands.Command], Callable
+    ] = COMMAND_HANDLERS,
+) -> MessageBusFactory:
+    uow = UnitOfWork(bootstrap)
+    await uow.startup()
+    return MessageBusFactory(uow, event_handlers, command_handlers)
+
+
 async def get_message_bus(
     bootstrap: list[str],
     uow: AbstractUnitOfWork | None = None,
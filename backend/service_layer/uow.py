@@ -1,3 +1,4 @@
+import copy
 import logging
 from abc import ABC, abstractmethod
 from typing import Awaitable, Callable
@@ -10,6 +11,9 @@ from backend.adapters.broker_message_repository.abstract import \
     AbstractBrokerMessageRepository
 from backend.adapters.broker_message_repository.db import \
     get_db_broker_message_repository
+from backend.adapters.cache import (TTLCache, close_auth_token_cache,
+                                    get_auth_token_cache,
+                                    init_auth_token_cache)
 from backend.adapters.db import close_db, get_db_conn, init_db, release_db_conn
 from backend.adapters.file_repository.abstract import AbstractFileRepository
 from backend.adapters.file_repository.db import get_db_file_repository
@@ -18,7 +22,12 @@ from backend.adapters.file_storage.local import get_local_file_storage
 from backend.adapters.http import close_http, get_http, init_http
 from backend.adapters.link_repository.abstract import AbstractLinkRepository
 from backend.adapters.link_repository.db import get_db_link_repository
-from backend.core.config import broker_url, db_dsl, settings
+from backend.adapters.upload_session_repository.abstract import \
+    AbstractUploadSessionRepository
+from backend.adapters.upload_session_repository.db import \
+    get_db_upload_session_repository
+from backend.core.config import (ACCOUNTS_CHANNEL, broker_url, db_dsl,
+                                 db_pool_options, settings)
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +45,7 @@ def get_http_session():
 
 
 async def init_db_pool():
-    await init_db(**db_dsl)
+    await init_db(**db_dsl, **db_pool_options)
 
 
 async def close_db_pool():
@@ -44,15 +53,42 @@ async def close_db_pool():
 
 
 def get_db_connection():
-    return get_db_conn(**db_dsl)
+    return get_db_conn(**db_dsl, **db_pool_options)
 
 
 def release_db_connection(conn):
     return release_db_conn(conn)
 
 
+async def sweep_file_storage():
+    storage = await get_local_file_storage()
+    await storage.sweep(
+        settings.storage_time_for_temp_files,
+        settings.storage_time_for_links,
+    )
+
+
+async def init_auth_cache():
+    await init_auth_token_cache(
+        settings.auth_cache_size,
+        settings.auth_cache_ttl,
+        ACCOUNTS_CHANNEL,
+        settings.auth_cache_check_interval,
+        **db_dsl,
+    )
+
+
+async def close_auth_cache():
+    await close_auth_token_cache()
+
+
 def get_broker_publisher():
-    return init_publisher(broker_url, settings.broker.exchange)
+    return init_publisher(
+        broker_url,
+        settings.broker.exchange,
+        window_size=settings.broker.publish_window_size,
+        confirm_timeout=settings.broker.publish_confirm_timeout,
+    )
 
 
 class AbstractUnitOfWork(ABC):
@@ -100,10 +136,16 @@ class UnitOfWork(AbstractUnitOfWork):
             ..., Awaitable[AbstractBrokerMessageRepository]
         ]
         | None = None,
+        get_upload_session_repository: Callable[
+            ..., Awaitable[AbstractUploadSessionRepository]
+        ]
+        | None = None,
         get_db_conn: Callable[..., Awaitable] | None = None,
         release_db_conn: Callable[..., Awaitable] | None = None,
         get_session: Callable[..., Awaitable] | None = None,
         get_publisher: Callable[..., Awaitable] | None = None,
+        get_auth_cache: Callable[..., Awaitable[TTLCache | None]]
+        | None = None,
     ):
         super().__init__()
         self._bootstrap = bootstrap
@@ -121,14 +163,31 @@ class UnitOfWork(AbstractUnitOfWork):
         self._get_broker_message_repository = (
             get_broker_message_repository or get_db_broker_message_repository
         )
+        self._get_upload_session_repository = (
+            get_upload_session_repository or get_db_upload_session_repository
+        )
         self._get_http_session = get_session or get_http_session
         self._get_db_conn = get_db_conn or get_db_connection
         self._release_db_conn = release_db_conn or release_db_connection
         self._get_broker_publisher = get_publisher or get_broker_publisher
+        self._get_auth_cache = get_auth_cache or get_auth_token_cache
+
+    def fork(self) -> "UnitOfWork":
+        """
+        Новый UnitOfWork с уже подготовленными в startup ресурсами
+        (хранилище, HTTP сессия и т.д.). Состояние транзакции и сообщения
+        у каждого свои.
+
+        """
+
+        uow = copy.copy(self)
+        uow._messages = []
+        uow._conn = None
+        return uow
 
     async def startup(self):
         if "file_repository" in self._bootstrap:
-            self._file_storage = await self._get_file_storage()
+            self.file_storage = await self._get_file_storage()
 
         if "broker_publisher" in self._bootstrap:
             self.broker_publisher = await self._get_broker_publisher()
@@ -136,6 +195,9 @@ class UnitOfWork(AbstractUnitOfWork):
         if "http" in self._bootstrap:
             self.session = await self._get_http_session()
 
+        if "auth_cache" in self._bootstrap:
+            self.auth_cache = await self._get_auth_cache()
+
     async def __aenter__(self):
         if "db" in self._bootstrap:
             self._is_done = False
@@ -150,7 +212,7 @@ class UnitOfWork(AbstractUnitOfWork):
 
             if "file_repository" in self._bootstrap:
                 self.file_repository = await self._get_file_repository(
-                    self._file_storage, self._conn
+                    self.file_storage, self._conn
                 )
 
             if "link_repository" in self._bootstrap:
@@ -163,6 +225,11 @@ class UnitOfWork(AbstractUnitOfWork):
                     await self._get_broker_message_repository(self._conn)
                 )
 
+            if "upload_session_repository" in self._bootstrap:
+                self.upload_session_repository = (
+                    await self._get_upload_session_repository(self._conn)
+                )
+
         return self
 
     async def __aexit__(self, *args):
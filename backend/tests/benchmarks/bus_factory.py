@@ -0,0 +1,39 @@
+"""
+Накладные расходы на создание MessageBus для одного запроса:
+get_message_bus (как раньше, на каждый запрос) и фабрика приложения.
+
+Запуск:
+    python -m backend.tests.benchmarks.bus_factory [count]
+
+"""
+
+import asyncio
+import sys
+import time
+
+from backend.api.dependables import BOOTSTRAP
+from backend.service_layer.message_bus import (get_message_bus,
+                                               get_message_bus_factory)
+from backend.service_layer.uow import close_http_session
+
+
+async def main(count: int):
+    start = time.perf_counter()
+    for _ in range(count):
+        await get_message_bus(BOOTSTRAP)
+    per_request = (time.perf_counter() - start) / count
+
+    factory = await get_message_bus_factory(BOOTSTRAP)
+    start = time.perf_counter()
+    for _ in range(count):
+        factory()
+    per_fork = (time.perf_counter() - start) / count
+
+    print(f"get_message_bus: {per_request * 1e6:>8.1f} us per request")
+    print(f"factory:         {per_fork * 1e6:>8.1f} us per request")
+
+    await close_http_session()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000))
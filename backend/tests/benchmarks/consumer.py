@@ -0,0 +1,83 @@
+"""
+Обработка входящих сообщений брокера: по одному (как раньше) и
+параллельными пакетами с подтверждением ack multiple. Транзакция
+имитируется задержкой.
+
+Запуск:
+    python -m backend.tests.benchmarks.consumer [count] [transaction_ms]
+
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+from backend.adapters.broker import RabbitConsumer
+
+
+class FakeChannel:
+    def __init__(self):
+        self.acked = 0
+        self.nacked = set()
+
+    async def basic_client_ack(self, delivery_tag, multiple=False):
+        assert delivery_tag > self.acked
+        self.acked = delivery_tag
+
+    async def basic_client_nack(self, delivery_tag, requeue=True):
+        self.nacked.add(delivery_tag)
+
+
+async def run(count: int, transaction_delay: float, **kwargs) -> float:
+    async def callback(messages):
+        await asyncio.sleep(transaction_delay)
+        return all(x[3]["ok"] for x in messages)
+
+    consumer = RabbitConsumer(
+        "amqp://", "exchange", "queue", callback, **kwargs
+    )
+    consumer._channel = channel = FakeChannel()
+    consumer._start_workers()
+
+    start = time.perf_counter()
+    for tag in range(1, count + 1):
+        await consumer._on_message(
+            channel,
+            f'{{"ok": {"false" if tag % 100 == 0 else "true"}}}'.encode(),
+            SimpleNamespace(delivery_tag=tag, routing_key="KEY"),
+            SimpleNamespace(app_id="app", message_id=str(uuid4())),
+        )
+
+    while consumer._unsettled:
+        await asyncio.sleep(0.001)
+
+    elapsed = time.perf_counter() - start
+    consumer._stop_workers()
+
+    assert channel.nacked == set(range(100, count + 1, 100))
+    assert channel.acked in (count, count - 1)
+
+    return count / elapsed
+
+
+async def main(count: int, transaction_delay: float):
+    one_by_one = await run(
+        count, transaction_delay, concurrency=1, batch_size=1
+    )
+    batched = await run(count, transaction_delay)
+
+    print(f"one by one: {one_by_one:>10.0f} messages/sec")
+    print(f"batched:    {batched:>10.0f} messages/sec")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+            (float(sys.argv[2]) if len(sys.argv) > 2 else 2) / 1000,
+        )
+    )
@@ -0,0 +1,76 @@
+"""
+Отправка сообщений брокеру: по одному (push_message) и окном
+(push_messages). Подтверждение от брокера имитируется задержкой.
+
+Запуск:
+    python -m backend.tests.benchmarks.publisher [count] [confirm_ms]
+
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+from backend.adapters.broker import RabbitPublisher
+
+
+class FakeChannel:
+    """
+    Подтверждает опубликованные сообщения через confirm_delay одним
+    ack с флагом multiple, как это делает брокер.
+
+    """
+
+    is_open = True
+
+    def __init__(self, confirm_delay: float):
+        self._confirm_delay = confirm_delay
+        self._published = 0
+        self._confirm_task = None
+
+    async def confirm_select(self):
+        pass
+
+    async def publish(self, payload, exchange_name, routing_key, properties):
+        self._published += 1
+        if self._confirm_task is None:
+            self._confirm_task = asyncio.create_task(self._confirm())
+
+    async def _confirm(self):
+        await asyncio.sleep(self._confirm_delay)
+        self._confirm_task = None
+        await self.basic_server_ack(
+            SimpleNamespace(delivery_tag=self._published, multiple=True)
+        )
+
+
+async def main(count: int, confirm_delay: float):
+    publisher = RabbitPublisher("amqp://", "exchange")
+    publisher._channel = FakeChannel(confirm_delay)
+    await publisher._start_publishing()
+    messages = [("app", "KEY", {"id": i}, uuid4()) for i in range(count)]
+
+    start = time.perf_counter()
+    for message in messages:
+        await publisher.push_message(*message)
+    one_by_one = count / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await publisher.push_messages(messages)
+    pipelined = count / (time.perf_counter() - start)
+
+    print(f"push_message:  {one_by_one:>10.0f} messages/sec")
+    print(f"push_messages: {pipelined:>10.0f} messages/sec")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+            (float(sys.argv[2]) if len(sys.argv) > 2 else 2) / 1000,
+        )
+    )
@@ -0,0 +1,71 @@
+"""
+Стоимость сериализации сообщения брокера и JSON ответа API:
+стандартная библиотека и backend.tools.serialization.
+
+Запуск:
+    python -m backend.tests.benchmarks.serialization [count]
+
+"""
+
+import json
+import sys
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from backend.api.responses.files import FileResponse
+from backend.domain.models import File
+from backend.tools import serialization
+
+RESPONSE_LIST_SIZE = 100
+
+
+def measure(func, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count
+
+
+def main(count: int):
+    now = datetime.now()
+    file = File(
+        id=uuid4(),
+        stored_id=uuid4(),
+        account_name="account",
+        name="file.txt",
+        size=100,
+        tag="tag",
+        checksum=f"sha256:{'0' * 64}",
+        created=now,
+        stored=now,
+    )
+    message = file.to_broker()
+    body = json.dumps(message, default=str).encode()
+    responses = [
+        FileResponse(**file.model_dump()) for _ in range(RESPONSE_LIST_SIZE)
+    ]
+
+    cases = [
+        (
+            "message (stdlib)",
+            lambda: json.loads(json.dumps(message, default=str).encode()),
+        ),
+        (
+            "message",
+            lambda: serialization.loads(serialization.dumps(message)),
+        ),
+        (
+            "response (model_dump_json)",
+            lambda: f"[{','.join([x.model_dump_json() for x in responses])}]".encode(),
+        ),
+        ("response", lambda: serialization.dump_models(responses)),
+    ]
+
+    print(f"orjson: {serialization.orjson is not None}, body: {len(body)} B")
+    for name, func in cases:
+        print(f"{name:<28} {measure(func, count) * 1e6:>8.1f} us")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,82 @@
+"""
+Пропускная способность LocalFileStorage в зависимости от размера куска.
+
+Запуск:
+    python -m backend.tests.benchmarks.storage_chunk_size [path] [size_in_mb]
+
+Для CIFS в качестве path нужно указать директорию в смонтированном хранилище.
+
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from uuid import uuid4
+
+from backend.adapters.file_storage.local import LocalFileStorage
+
+MB = 2**20
+
+CASES = [
+    (2**16, None),
+    (2**18, None),
+    (2**20, None),
+    (2**22, None),
+    (2**16, 2**22),
+]
+
+
+def _get_coro_with_bytes(size: int, chunk: bytes):
+    left = size
+
+    async def get_chunk(n: int) -> bytes:
+        nonlocal left
+        n = min(n, left, len(chunk))
+        left -= n
+        return chunk[:n]
+
+    return get_chunk
+
+
+async def _measure(path: str, size: int, chunk_size: int, max_chunk_size):
+    storage = LocalFileStorage(
+        path, chunk_size=chunk_size, max_chunk_size=max_chunk_size
+    )
+    id = uuid4()
+    chunk = os.urandom(max(chunk_size, max_chunk_size or 0))
+
+    start = time.perf_counter()
+    await storage.save(id, _get_coro_with_bytes(size, chunk))
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    async for _ in storage.get(id):
+        pass
+    read_time = time.perf_counter() - start
+
+    await storage.erase(id)
+    return size / MB / write_time, size / MB / read_time
+
+
+async def main(path: str, size: int):
+    print(
+        f"{'chunk':>10} {'max chunk':>10} {'write MB/s':>12} {'read MB/s':>12}"
+    )
+    for chunk_size, max_chunk_size in CASES:
+        write, read = await _measure(path, size, chunk_size, max_chunk_size)
+        print(
+            f"{chunk_size:>10} {str(max_chunk_size):>10} "
+            f"{write:>12.1f} {read:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[2]) * MB if len(sys.argv) > 2 else 256 * MB
+
+    if len(sys.argv) > 1 and sys.argv[1]:
+        asyncio.run(main(sys.argv[1], size))
+    else:
+        with tempfile.TemporaryDirectory() as path:
+            asyncio.run(main(path, size))
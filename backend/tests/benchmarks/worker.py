@@ -0,0 +1,98 @@
+"""
+Выполнение входящих сообщений брокера: по одному (как раньше) и
+параллельно. Скачивание файла имитируется задержкой.
+
+Запуск:
+    python -m backend.tests.benchmarks.worker [count] [clone_ms]
+
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from uuid import uuid4
+
+from backend.core.config import settings, tz_now
+from backend.domain import commands
+from backend.domain.models import BrokerMessage
+from backend.worker import Worker
+
+FILE_SIZE = 2**20
+
+
+class FakeBus:
+    def __init__(self, messages, clone_delay):
+        self._messages = messages
+        self._clone_delay = clone_delay
+        self.executed = []
+        self.in_flight_bytes = 0
+        self.max_in_flight_bytes = 0
+
+    def __call__(self):
+        return self
+
+    async def handle(self, cmd):
+        if isinstance(cmd, commands.GetMessagesReceivedFromBroker):
+            return self._messages
+
+        if isinstance(cmd, commands.ExecuteBrokerMessage):
+            size = cmd.message.body["size"]
+            self.in_flight_bytes += size
+            self.max_in_flight_bytes = max(
+                self.max_in_flight_bytes, self.in_flight_bytes
+            )
+            await asyncio.sleep(self._clone_delay)
+            self.in_flight_bytes -= size
+            self.executed.append(cmd.message.id)
+
+
+async def run(count: int, clone_delay: float, **kwargs) -> float:
+    #  По два сообщения о каждом файле
+    file_ids = [uuid4() for _ in range(count // 2)]
+    messages = [
+        BrokerMessage(
+            app=settings.app_name,
+            key="FILE.STORED",
+            body={"id": str(x), "size": FILE_SIZE},
+            direction="I",
+            next_retry_at=tz_now(),
+        )
+        for x in file_ids * 2
+    ]
+    bus = FakeBus(messages, clone_delay)
+    worker = Worker(bus, **kwargs)
+
+    start = time.perf_counter()
+    await worker._do()
+    elapsed = time.perf_counter() - start
+
+    order = {x: i for i, x in enumerate(bus.executed)}
+    assert len(order) == len(messages)
+    for first, second in zip(messages, messages[len(file_ids) :]):
+        assert order[first.id] < order[second.id]
+
+    if "max_in_flight_bytes" in kwargs:
+        assert bus.max_in_flight_bytes <= kwargs["max_in_flight_bytes"]
+
+    return count / elapsed
+
+
+async def main(count: int, clone_delay: float):
+    one_by_one = await run(count, clone_delay, concurrency=1)
+    parallel = await run(count, clone_delay)
+    limited = await run(count, clone_delay, max_in_flight_bytes=4 * FILE_SIZE)
+
+    print(f"one by one:        {one_by_one:>10.0f} messages/sec")
+    print(f"parallel:          {parallel:>10.0f} messages/sec")
+    print(f"parallel, 4 files: {limited:>10.0f} messages/sec")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+            (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000,
+        )
+    )
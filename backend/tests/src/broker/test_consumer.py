@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+
+from backend.adapters.broker import RabbitConsumer
+from backend.tools import serialization
+
+logger = logging.getLogger()
+
+
+class FakeChannel:
+    def __init__(self):
+        self.acked = []
+        self.nacked = []
+
+    async def basic_client_ack(self, delivery_tag: int, multiple=False):
+        self.acked.append((delivery_tag, multiple))
+
+    async def basic_client_nack(
+        self, delivery_tag: int, multiple=False, requeue=True
+    ):
+        self.nacked.append((delivery_tag, requeue))
+
+
+class TestRabbitConsumer:
+    @pytest_asyncio.fixture(autouse=True)
+    async def setup(self):
+        self._calls = []
+        self._consumer = RabbitConsumer(
+            "amqp://",
+            "exchange",
+            "queue",
+            self._callback,
+            concurrency=1,
+            batch_size=10,
+        )
+        self._consumer._channel = self._channel = FakeChannel()
+        yield
+        self._consumer._stop_workers()
+
+    async def _callback(self, messages) -> bool:
+        self._calls.append([x[3]["i"] for x in messages])
+        return all(x[3]["ok"] for x in messages)
+
+    def _make_delivery(self, tag: int, body: bytes | None = None):
+        if body is None:
+            body = serialization.dumps({"i": tag, "ok": tag != 2})
+
+        return (
+            SimpleNamespace(delivery_tag=tag, routing_key="KEY"),
+            SimpleNamespace(app_id="APP", message_id=str(uuid4())),
+            body,
+        )
+
+    async def _receive(self, *deliveries):
+        for envelope, properties, body in deliveries:
+            await self._consumer._on_message(
+                self._channel, body, envelope, properties
+            )
+
+    async def _wait_until_settled(self):
+        async def wait():
+            while self._consumer._unsettled:
+                await asyncio.sleep(0.001)
+
+        await asyncio.wait_for(wait(), 1)
+
+    @pytest.mark.asyncio
+    async def test_consume_batch(self):
+        self._consumer._start_workers()
+        await self._receive(self._make_delivery(1), self._make_delivery(3))
+        await self._wait_until_settled()
+
+        #  Сообщения, полученные одновременно, обрабатываются одним пакетом
+        assert self._calls == [[1, 3]]
+        assert self._channel.acked == [(3, True)]
+        assert self._channel.nacked == []
+
+    @pytest.mark.asyncio
+    async def test_settle_in_order(self):
+        #  Пакеты обрабатываются вручную, без обработчиков очереди
+        self._consumer._deliveries = asyncio.Queue()
+        deliveries = [self._make_delivery(x) for x in (1, 3, 4)]
+        await self._receive(*deliveries)
+
+        #  Пока первое сообщение обрабатывается, ack не отправляется
+        await self._consumer._process_batch(self._channel, deliveries[1:2])
+        assert self._channel.acked == []
+
+        #  Один ack подтверждает все сообщения до первого необработанного
+        await self._consumer._process_batch(self._channel, deliveries[:1])
+        assert self._channel.acked == [(3, True)]
+
+        await self._consumer._process_batch(self._channel, deliveries[2:])
+        assert self._channel.acked == [(3, True), (4, True)]
+        assert not self._consumer._unsettled
+
+    @pytest.mark.asyncio
+    async def test_retry_one_by_one_after_failed_batch(self):
+        self._consumer._start_workers()
+        await self._receive(*[self._make_delivery(x) for x in (1, 2, 3)])
+        await self._wait_until_settled()
+
+        #  После ошибки пакета сообщения повторяются по одному, и в
+        #  Dead Letter Exchange попадает только ошибочное
+        assert self._calls == [[1, 2, 3], [1], [2], [3]]
+        assert self._channel.nacked == [(2, False)]
+        assert self._channel.acked == [(3, True)]
+
+    @pytest.mark.asyncio
+    async def test_nack_undecodable_body(self):
+        self._consumer._start_workers()
+        await self._receive(
+            self._make_delivery(1), self._make_delivery(3, b"{not json")
+        )
+        await self._wait_until_settled()
+
+        assert self._calls == [[1]]
+        assert self._channel.nacked == [(3, False)]
+        assert self._channel.acked == [(1, True)]
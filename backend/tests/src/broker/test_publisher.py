@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+
+from backend.adapters.broker import RabbitPublisher
+
+logger = logging.getLogger()
+
+
+class FakeChannel:
+    is_open = True
+
+    def __init__(self):
+        self.publisher_confirms = False
+        self.published = []
+
+    async def confirm_select(self):
+        self.publisher_confirms = True
+
+    async def publish(self, payload, exchange_name, routing_key, properties):
+        self.published.append(properties["message_id"])
+
+    async def ack(self, delivery_tag: int, multiple: bool = False):
+        await self.basic_server_ack(
+            SimpleNamespace(delivery_tag=delivery_tag, multiple=multiple)
+        )
+
+    async def nack(self, delivery_tag: int, multiple: bool = False):
+        await self.basic_server_nack(
+            SimpleNamespace(delivery_tag=delivery_tag, multiple=multiple)
+        )
+
+
+class TestRabbitPublisher:
+    @pytest_asyncio.fixture(autouse=True)
+    async def setup(self):
+        self._publisher = RabbitPublisher(
+            "amqp://", "exchange", window_size=10, confirm_timeout=1
+        )
+        self._publisher._channel = self._channel = FakeChannel()
+        await self._publisher._start_publishing()
+        self._messages = [("APP", "KEY", {"i": i}, uuid4()) for i in range(5)]
+
+    async def _push_messages(self) -> asyncio.Task:
+        task = asyncio.create_task(
+            self._publisher.push_messages(self._messages)
+        )
+        while len(self._channel.published) < len(self._messages):
+            await asyncio.sleep(0)
+
+        return task
+
+    @pytest.mark.asyncio
+    async def test_confirm_multiple(self):
+        assert self._channel.publisher_confirms is False
+
+        task = await self._push_messages()
+        assert self._channel.published == [str(x[3]) for x in self._messages]
+
+        #  Один ack подтверждает сообщения 1-4, nack отклоняет 5
+        await self._channel.ack(4, multiple=True)
+        await self._channel.nack(5)
+
+        assert await asyncio.wait_for(task, 0.5) == [True] * 4 + [False]
+
+    @pytest.mark.asyncio
+    async def test_confirm_after_timeout(self):
+        self._publisher._confirm_timeout = 0.01
+
+        task = await self._push_messages()
+        assert await task == [False] * len(self._messages)
+
+        #  Опоздавшее подтверждение не приводит к ошибке
+        await self._channel.ack(len(self._messages), multiple=True)
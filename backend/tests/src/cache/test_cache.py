@@ -0,0 +1,149 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from asyncpg import Connection
+
+from backend.adapters import cache as cache_module
+from backend.adapters.cache import (MISSING, TTLCache, close_auth_token_cache,
+                                    init_auth_token_cache)
+from backend.core.config import db_dsl
+
+
+class TestTTLCache:
+    def test_get(self):
+        cache = TTLCache(10, 60)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is MISSING
+        assert cache.get("b", None) is None
+
+    def test_lru_eviction(self):
+        cache = TTLCache(2, 60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        #  "a" использовался последним, поэтому вытесняется "b"
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert len(cache) == 2
+        assert cache.get("a") == 1
+        assert cache.get("b") is MISSING
+        assert cache.get("c") == 3
+
+    def test_ttl(self, monkeypatch):
+        now = 1000.0
+        monkeypatch.setattr(
+            "backend.adapters.cache.time.monotonic", lambda: now
+        )
+
+        cache = TTLCache(10, 60)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=5)
+
+        now += 10
+        assert cache.get("a") == 1
+        assert cache.get("b") is MISSING
+
+        now += 60
+        assert cache.get("a") is MISSING
+        assert len(cache) == 0
+
+    def test_generation(self):
+        cache = TTLCache(10, 60)
+        generation = cache.generation
+
+        cache.set("a", 1)
+        assert cache.generation == generation
+
+        cache.delete("a")
+        assert cache.generation == generation + 1
+
+        cache.clear()
+        assert cache.generation == generation + 2
+
+    def test_disable(self):
+        cache = TTLCache(10, 60)
+        cache.set("a", 1)
+        generation = cache.generation
+
+        cache.disable()
+        cache.set("b", 2)
+        assert cache.get("a") is MISSING
+        assert len(cache) == 0
+
+        cache.enable()
+        assert cache.generation > generation
+        cache.set("b", 2)
+        assert cache.get("b") == 2
+
+
+class TestAuthTokenCache:
+    CHANNEL = "test_accounts_changed"
+
+    async def _wait_for(self, predicate, timeout: float = 2):
+        async def wait():
+            while not predicate():
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(wait(), timeout)
+
+    @pytest.mark.asyncio
+    async def test_listener_restored(self, pg):
+        cache = await init_auth_token_cache(
+            10, 60, self.CHANNEL, 0.05, **db_dsl
+        )
+        try:
+            token = uuid4()
+            cache.set(token, "ACCOUNT")
+
+            #  Без подписки кэш не используется
+            cache_module.listener.terminate()
+            await self._wait_for(lambda: cache.get(token) is MISSING)
+            cache.set(token, "ACCOUNT")
+            assert cache.get(token) is MISSING
+
+            #  Подписка восстанавливается, и уведомления снова приходят
+            await self._wait_for(
+                lambda: cache_module.listener is not None
+                and not cache_module.listener.is_closed()
+            )
+            cache.set(token, "ACCOUNT")
+            assert cache.get(token) == "ACCOUNT"
+
+            await pg.execute(
+                "SELECT pg_notify($1, $2);", self.CHANNEL, str(token)
+            )
+            await self._wait_for(lambda: cache.get(token) is MISSING)
+
+        finally:
+            await close_auth_token_cache()
+
+        assert cache_module.listener_task is None
+        assert cache_module.listener is None
+
+    @pytest.mark.asyncio
+    async def test_listener_not_responding(self, monkeypatch):
+        await init_auth_token_cache(10, 60, self.CHANNEL, 0.05, **db_dsl)
+        try:
+            listener = cache_module.listener
+            original_fetchval = Connection.fetchval
+
+            #  Соединение не разорвано, но не отвечает
+            async def fetchval(conn, *args):
+                if conn is listener:
+                    await asyncio.sleep(10)
+
+                return await original_fetchval(conn, *args)
+
+            monkeypatch.setattr(Connection, "fetchval", fetchval)
+
+            await self._wait_for(
+                lambda: cache_module.listener not in (None, listener)
+            )
+            assert listener.is_closed()
+
+        finally:
+            await close_auth_token_cache()
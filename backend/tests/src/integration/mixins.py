@@ -7,5 +7,6 @@ class CleanDatabaseMixin:
                                 TRUNCATE files CASCADE;
                                 TRUNCATE accounts CASCADE;
                                 TRUNCATE broker_messages CASCADE;
+                                TRUNCATE blobs CASCADE;
                                """
             )
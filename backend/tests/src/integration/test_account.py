@@ -1,5 +1,7 @@
+import asyncio
 import logging
 from contextlib import nullcontext as no_exception
+from uuid import uuid4
 
 import pytest
 import pytest_asyncio
@@ -36,3 +38,31 @@ class TestAccountEndpoints(CleanDatabaseMixin, AccountMixin):
                     AccountResponse(**x)
 
         await self.clean_db()
+
+    @pytest.mark.asyncio
+    async def test_auth_token_cache_invalidation(self, session):
+        name, auth_token = await self._create_default_account(self._conn)
+        headers = {"Authorization": str(auth_token)}
+        url = f"{self._base_url}/files/{uuid4()}/"
+
+        async with session.get(url, headers=headers) as r:
+            assert r.status == 404
+
+        await self._conn.execute(
+            f"UPDATE {settings.accounts_table} "
+            "SET is_active = FALSE WHERE name = $1;",
+            name,
+        )
+
+        #  Кэш сбрасывается уведомлением из БД, а не по истечении ttl
+        for _ in range(20):
+            async with session.get(url, headers=headers) as r:
+                status = r.status
+
+            if status == 401:
+                break
+
+            await asyncio.sleep(0.1)
+
+        assert status == 401
+        await self.clean_db()
@@ -1,3 +1,5 @@
+import base64
+import hashlib
 import io
 import json
 import logging
@@ -37,6 +39,22 @@ class TestFileEndpoints(CleanDatabaseMixin, FileOperationMixin, AccountMixin):
                 model.id, self.DEFAULT_FILENAME, self.DEFAULT_FILESIZE
             )
 
+    async def _upload_and_get_download_link(self, session, data: bytes) -> str:
+        async with session.post(
+            self._files_url(), headers=self._headers, json=self._tag_dict
+        ) as r:
+            response_model = NotStoredFileResponse(**await r.json())
+
+        form = FormData()
+        form.add_field("file", data, filename=self.DEFAULT_FILENAME)
+        async with session.post(response_model.link, data=form) as r:
+            assert r.status == 200
+
+        async with session.get(
+            self._files_item_url(response_model.id), headers=self._headers
+        ) as r:
+            return FileResponseWithLink(**await r.json()).link
+
     @pytest_asyncio.fixture(autouse=True)
     async def setup(self, pg):
         self._conn = pg
@@ -138,6 +156,8 @@ class TestFileEndpoints(CleanDatabaseMixin, FileOperationMixin, AccountMixin):
         #  DOWNLOADING
         async with session.get(download_link) as r:
             assert r.status == 200
+            digest = base64.b64encode(hashlib.sha256(data).digest()).decode()
+            assert r.headers["Digest"] == f"sha-256={digest}"
             content_length = int(r.headers["Content-Length"])
 
             f = io.BytesIO()
@@ -146,6 +166,119 @@ class TestFileEndpoints(CleanDatabaseMixin, FileOperationMixin, AccountMixin):
 
         await self.clean_db()
 
+    @pytest.mark.asyncio
+    async def test_download_range(self, session):
+        data = b"1234567890"
+        download_link = await self._upload_and_get_download_link(session, data)
+
+        async with session.get(
+            download_link, headers={"Range": "bytes=2-5"}
+        ) as r:
+            assert r.status == 206
+            assert r.headers["Content-Range"] == f"bytes 2-5/{len(data)}"
+            assert await r.read() == data[2:6]
+            etag = r.headers["ETag"]
+
+        async with session.get(
+            download_link, headers={"Range": "bytes=-3", "If-Range": etag}
+        ) as r:
+            assert r.status == 206
+            assert await r.read() == data[-3:]
+
+        async with session.get(
+            download_link, headers={"Range": "bytes=-3", "If-Range": '"x"'}
+        ) as r:
+            assert r.status == 200
+            assert await r.read() == data
+
+        async with session.get(
+            download_link, headers={"Range": "bytes=100-"}
+        ) as r:
+            assert r.status == 416
+            assert r.headers["Content-Range"] == f"bytes */{len(data)}"
+
+        await self.clean_db()
+
+    @pytest.mark.asyncio
+    async def test_download_multiple_ranges(self, session):
+        data = b"1234567890"
+        download_link = await self._upload_and_get_download_link(session, data)
+
+        async with session.get(
+            download_link, headers={"Range": "bytes=0-1,7-"}
+        ) as r:
+            assert r.status == 206
+            assert r.content_type == "multipart/byteranges"
+
+            body = await r.read()
+            assert len(body) == int(r.headers["Content-Length"])
+            assert b"Content-Range: bytes 0-1/10\r\n\r\n12\r\n" in body
+            assert b"Content-Range: bytes 7-9/10\r\n\r\n890\r\n" in body
+
+        await self.clean_db()
+
+    @pytest.mark.asyncio
+    async def test_upload_by_parts(self, session):
+        data = b"1234567890"
+        async with session.post(
+            self._files_url(), headers=self._headers, json=self._tag_dict
+        ) as r:
+            response_model = NotStoredFileResponse(**await r.json())
+            upload_link = response_model.link
+            file_id = response_model.id
+
+        session_body = {"name": self.DEFAULT_FILENAME, "size": len(data)}
+        async with session.post(
+            f"{upload_link}sessions/", json=session_body
+        ) as r:
+            assert r.status == 200
+            upload_session = await r.json()
+            assert upload_session["received"] == []
+
+        session_url = f"{upload_link}sessions/{upload_session['id']}/"
+
+        #  Повторное создание возвращает ту же сессию
+        async with session.post(
+            f"{upload_link}sessions/", json=session_body
+        ) as r:
+            assert (await r.json())["id"] == upload_session["id"]
+
+        async with session.put(
+            f"{session_url}parts/1/?offset=6", data=data[6:]
+        ) as r:
+            assert r.status == 200
+
+        async with session.post(f"{session_url}complete/") as r:
+            assert r.status == 409
+
+        async with session.put(
+            f"{session_url}parts/2/?offset=8", data=data
+        ) as r:
+            assert r.status == 400
+
+        async with session.put(
+            f"{session_url}parts/0/?offset=0", data=data[:6]
+        ) as r:
+            assert r.status == 200
+
+        async with session.get(session_url) as r:
+            assert (await r.json())["received"] == [[0, len(data) - 1]]
+
+        async with session.post(f"{session_url}complete/") as r:
+            assert r.status == 200
+            response_model = FileResponse(**await r.json())
+            assert response_model.size == len(data)
+
+        async with session.get(
+            self._files_item_url(file_id), headers=self._headers
+        ) as r:
+            download_link = FileResponseWithLink(**await r.json()).link
+
+        async with session.get(download_link) as r:
+            assert await r.read() == data
+
+        await self.clean_db()
+
     @pytest.mark.asyncio
     async def test_post_without_tag(self, session):
         async with session.post(
@@ -176,3 +309,45 @@ class TestFileEndpoints(CleanDatabaseMixin, FileOperationMixin, AccountMixin):
             assert r.status == 507
 
         await self.clean_db()
+
+    @pytest.mark.asyncio
+    async def test_post_with_size_over_quota(self, session):
+        body = {**self._tag_dict, "size": 600}
+        async with session.post(
+            self._files_url(), headers=self._headers, json=body
+        ) as r:
+            assert r.status == 200
+
+        async with session.post(
+            self._files_url(), headers=self._headers, json=body
+        ) as r:
+            assert r.status == 507
+
+        await self.clean_db()
+
+    @pytest.mark.asyncio
+    async def test_upload_over_reserved_size(self, session):
+        data = b"1234567890"
+        body = {**self._tag_dict, "size": len(data) - 1}
+        async with session.post(
+            self._files_url(), headers=self._headers, json=body
+        ) as r:
+            upload_link = NotStoredFileResponse(**await r.json()).link
+
+        form = FormData()
+        form.add_field("file", data, filename=self.DEFAULT_FILENAME)
+        async with session.post(upload_link, data=form) as r:
+            assert r.status == 507
+
+        session_body = {"name": self.DEFAULT_FILENAME, "size": len(data)}
+        async with session.post(
+            f"{upload_link}sessions/", json=session_body
+        ) as r:
+            assert r.status == 507
+
+        form = FormData()
+        form.add_field("file", data[1:], filename=self.DEFAULT_FILENAME)
+        async with session.post(upload_link, data=form) as r:
+            assert r.status == 200
+
+        await self.clean_db()
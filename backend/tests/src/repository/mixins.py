@@ -29,6 +29,7 @@ class AccountMixin:
             ("total_size", 1000),
             ("is_active", True),
             ("tags", ["default_tag"]),
+            ("reserved_size", 0),
         ]
     )
 
@@ -40,10 +41,11 @@ class AccountMixin:
                             actual_size,
                             total_size,
                             is_active,
-                            tags
+                            tags,
+                            reserved_size
                         )
                     VALUES
-                        ($1, $2, $3, $4, $5, $6::jsonb);
+                        ($1, $2, $3, $4, $5, $6::jsonb, $7);
                     """
 
     @classmethod
@@ -56,6 +58,7 @@ class AccountMixin:
         total_size: int,
         is_active: bool,
         tags: list[str],
+        reserved_size: int,
     ) -> tuple[UUID, UUID]:
         await conn.execute(
             cls.ACCOUNT_ADD_QUERY,
@@ -65,6 +68,7 @@ class AccountMixin:
             total_size,
             is_active,
             tags,
+            reserved_size,
         )
         return name, auth_token
 
@@ -365,3 +369,14 @@ class BrokerMessageMixin:
         return await cls._create_broker_message(
             conn, *cls.DEFAULT_IN_BROKER_MESSAGE_PARAMETERS.values()
         )
+
+    @classmethod
+    async def _lease_broker_messages(
+        cls, conn, ids: list[UUID], owner: str, seconds: int = 60
+    ):
+        query = f"""
+                UPDATE {settings.broker_messages_table}
+                SET leased_by = $2, leased_until = $3
+                WHERE id = ANY($1::uuid[]);
+                """
+        await conn.execute(query, ids, owner, tz_now(seconds))
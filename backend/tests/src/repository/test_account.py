@@ -1,10 +1,14 @@
+import asyncio
 import logging
 from uuid import uuid4
 
 import pytest
 import pytest_asyncio
 
+from backend.adapters.account_repository.db import DatabaseAccountRepository
+from backend.adapters.file_repository.db import DatabaseFileRepository
 from backend.core import exceptions
+from backend.core.config import settings
 from backend.tests.src.repository.mixins import AccountMixin
 
 logger = logging.getLogger()
@@ -26,3 +30,102 @@ class TestAccountRepository(AccountMixin):
     async def test_get_if_not_exist(self, rollback_account_repository):
         with pytest.raises(exceptions.AccountNotFound):
             await rollback_account_repository.get_by_token(uuid4())
+
+    @pytest.mark.asyncio
+    async def test_reconcile_actual_sizes(self, rollback_account_repository):
+        name = self.DEFAULT_ACCOUNT_PARAMETERS["name"]
+        query = f"""
+                UPDATE {settings.accounts_table}
+                SET actual_size = 999 WHERE name = $1
+                """
+        await rollback_account_repository._conn.execute(query, name)
+
+        assert (
+            name in await rollback_account_repository.reconcile_actual_sizes()
+        )
+        model = await rollback_account_repository.get_by_name(name)
+        assert model.actual_size == 0
+
+        assert name not in (
+            await rollback_account_repository.reconcile_actual_sizes()
+        )
+
+    @pytest.mark.asyncio
+    async def test_reconcile_actual_sizes_concurrently(
+        self, pg_pool, file_storage
+    ):
+        name, tag = f"TEST ACCOUNT {uuid4()}", "default_tag"
+        activity_query = """
+                SELECT wait_event_type FROM pg_stat_activity WHERE pid = $1
+                """
+        async with pg_pool.acquire() as conn:
+            await self._create_account(
+                conn, name, uuid4(), 999, 1000, True, [tag], 0
+            )
+
+        store_conn = await pg_pool.acquire()
+        reconcile_conn = await pg_pool.acquire()
+        try:
+            #  Файл сохраняется, пока идет пересчет
+            store_tr = store_conn.transaction()
+            await store_tr.start()
+            repository = DatabaseFileRepository(file_storage, store_conn)
+            model = await repository.add(name, tag)
+            await repository.mark_as_stored(model.id, "TEST NAME", 10)
+
+            async def reconcile():
+                async with reconcile_conn.transaction():
+                    await DatabaseAccountRepository(
+                        reconcile_conn
+                    ).reconcile_actual_sizes()
+
+            task = asyncio.create_task(reconcile())
+            pid = reconcile_conn.get_server_pid()
+            while await store_conn.fetchval(activity_query, pid) != "Lock":
+                await asyncio.sleep(0.01)
+
+            await store_tr.commit()
+            await task
+
+            #  Размер сохраненного файла не потерян
+            model = await DatabaseAccountRepository(
+                reconcile_conn
+            ).get_by_name(name)
+            assert model.actual_size == 10
+
+        finally:
+            await pg_pool.release(store_conn)
+            await pg_pool.release(reconcile_conn)
+
+            async with pg_pool.acquire() as conn:
+                await conn.execute(
+                    f"DELETE FROM {settings.files_table} "
+                    "WHERE account_name = $1",
+                    name,
+                )
+                await conn.execute(
+                    f"DELETE FROM {settings.accounts_table} WHERE name = $1",
+                    name,
+                )
+
+    @pytest.mark.asyncio
+    async def test_verify_ready_to_add_reserves_size(
+        self, rollback_account_repository
+    ):
+        name = self.DEFAULT_ACCOUNT_PARAMETERS["name"]
+        tag = self.DEFAULT_ACCOUNT_PARAMETERS["tags"][0]
+        total_size = self.DEFAULT_ACCOUNT_PARAMETERS["total_size"]
+
+        await rollback_account_repository.verify_ready_to_add(
+            name, tag, total_size - 1
+        )
+        model = await rollback_account_repository.get_by_name(name)
+        assert model.reserved_size == total_size - 1
+
+        with pytest.raises(exceptions.NoSpaceInAccount):
+            await rollback_account_repository.verify_ready_to_add(name, tag, 2)
+
+        await rollback_account_repository.verify_ready_to_add(name, tag, 1)
+
+        with pytest.raises(exceptions.NoSpaceInAccount):
+            await rollback_account_repository.verify_ready_to_add(name, tag)
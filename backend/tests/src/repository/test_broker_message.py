@@ -88,6 +88,72 @@ class TestBrokerMessageRepository(
         assert len(models) == 1
         assert models[0].id == id
 
+    @pytest.mark.asyncio
+    async def test_claim_not_executed(
+        self, rollback_broker_message_repository
+    ):
+        id = await self._create_default_out_broker_message(self._conn)
+
+        models = (
+            await rollback_broker_message_repository.get_not_executed_outgoing(
+                10
+            )
+        )
+        assert [x.id for x in models] == [id]
+        assert models[0].leased_by == (
+            rollback_broker_message_repository.LEASE_OWNER
+        )
+        assert models[0].leased_until > models[0].next_retry_at
+
+        #  Пока аренда не истекла, сообщение не выбирается повторно
+        assert (
+            await rollback_broker_message_repository.get_not_executed_outgoing(
+                10
+            )
+            == []
+        )
+
+        query = f"""
+                UPDATE {settings.broker_messages_table}
+                SET leased_until = $2 WHERE id = $1;
+                """
+        await self._conn.execute(query, id, tz_now(-1))
+
+        models = (
+            await rollback_broker_message_repository.get_not_executed_outgoing(
+                10
+            )
+        )
+        assert [x.id for x in models] == [id]
+
+        await rollback_broker_message_repository.mark_as_executed([id])
+        model = await rollback_broker_message_repository.get_by_id(id)
+        assert model.leased_until is None
+        assert model.leased_by is None
+
+    @pytest.mark.asyncio
+    async def test_claim_not_executed_order(
+        self, rollback_broker_message_repository
+    ):
+        ids = await rollback_broker_message_repository.add_outgoing_many(
+            [("KEY", {"key": i}) for i in range(5)]
+        )
+
+        #  Сообщения, добавленные позже, выполняются раньше
+        query = f"""
+                UPDATE {settings.broker_messages_table}
+                SET next_retry_at = $2 WHERE id = $1;
+                """
+        for i, id in enumerate(ids):
+            await self._conn.execute(query, id, tz_now(-10 - i))
+
+        models = (
+            await rollback_broker_message_repository.get_not_executed_outgoing(
+                10
+            )
+        )
+        assert [x.id for x in models] == ids[::-1]
+
     @pytest.mark.asyncio
     async def test_get_not_executed_in(
         self, rollback_broker_message_repository
@@ -179,6 +245,23 @@ class TestBrokerMessageRepository(
             == delay_in_seconds
         )
 
+    @pytest.mark.asyncio
+    async def test_add_outgoing_many(self, rollback_broker_message_repository):
+        messages = [("KEY", {"key": i}) for i in range(3)]
+
+        ids = await rollback_broker_message_repository.add_outgoing_many(
+            messages, 100
+        )
+        assert len(ids) == len(messages)
+
+        for id, (key, body) in zip(ids, messages):
+            model = await rollback_broker_message_repository.get_by_id(id, "O")
+            assert model.app == settings.app_name
+            assert model.key == key
+            assert model.body == body
+            assert model.has_executed == False
+            assert int((model.next_retry_at - model.created).seconds) == 100
+
     @pytest.mark.asyncio
     async def test_add_incoming(self, rollback_broker_message_repository):
         id = uuid4()
@@ -208,6 +291,7 @@ class TestBrokerMessageRepository(
         )
 
         assert row is not None
+        assert row["id"] == id
         assert row["app"] == app
         assert row["key"] == key
         assert row["body"] == body
@@ -219,9 +303,42 @@ class TestBrokerMessageRepository(
             int((row["next_retry_at"] - row["created"]).total_seconds()) == 0
         )
 
+    @pytest.mark.asyncio
+    async def test_add_incoming_duplicate(
+        self, rollback_broker_message_repository
+    ):
+        id = uuid4()
+        model = await rollback_broker_message_repository.add_incoming(
+            id, "APP", "KEY", {"key": "value"}
+        )
+        assert model.id == id
+
+        assert (
+            await rollback_broker_message_repository.add_incoming(
+                id, "APP", "KEY", {"key": "value"}
+            )
+            is None
+        )
+
+        new_id = uuid4()
+        ids = await rollback_broker_message_repository.add_incoming_many(
+            [
+                (id, "APP", "KEY", {"key": "value"}),
+                (new_id, "APP", "KEY", {"key": "value"}),
+                (new_id, "APP", "KEY", {"key": "value"}),
+            ]
+        )
+        assert ids == [new_id]
+
+        model = await rollback_broker_message_repository.get_by_id(new_id, "I")
+        assert model.body == {"key": "value"}
+
     @pytest.mark.asyncio
     async def test_mark_as_executed(self, rollback_broker_message_repository):
         id = await self._create_default_out_broker_message(self._conn)
+        await self._lease_broker_messages(
+            self._conn, [id], rollback_broker_message_repository.LEASE_OWNER
+        )
         await rollback_broker_message_repository.mark_as_executed([id])
         query = f"""
                 SELECT * FROM {settings.broker_messages_table}
@@ -236,6 +353,42 @@ class TestBrokerMessageRepository(
 
         assert row is not None
 
+    @pytest.mark.asyncio
+    async def test_lease_of_other_owner(
+        self, rollback_broker_message_repository
+    ):
+        id = await self._create_default_out_broker_message(self._conn)
+
+        #  Аренда истекла и перешла к другому обработчику
+        await self._lease_broker_messages(self._conn, [id], "OTHER")
+
+        await rollback_broker_message_repository.renew_lease([id])
+        await rollback_broker_message_repository.schedule_next_retry([id])
+        await rollback_broker_message_repository.mark_as_executed([id])
+
+        model = await rollback_broker_message_repository.get_by_id(id)
+        assert model.leased_by == "OTHER"
+        assert model.has_executed is False
+        assert model.count_of_retries == 0
+
+    @pytest.mark.asyncio
+    async def test_renew_lease(self, rollback_broker_message_repository):
+        id = await self._create_default_out_broker_message(self._conn)
+        await self._lease_broker_messages(
+            self._conn,
+            [id],
+            rollback_broker_message_repository.LEASE_OWNER,
+            seconds=1,
+        )
+        before = await rollback_broker_message_repository.get_by_id(id)
+
+        await rollback_broker_message_repository.renew_lease([id])
+
+        model = await rollback_broker_message_repository.get_by_id(id)
+        assert (model.leased_until - before.leased_until).total_seconds() > (
+            settings.broker_messages_lease_time - 10
+        )
+
     @pytest.mark.asyncio
     async def test_schedule_next_retry(
         self, rollback_broker_message_repository
@@ -245,6 +398,11 @@ class TestBrokerMessageRepository(
         seconds_to_next_retry = 1
 
         async def schedule_next():
+            await self._lease_broker_messages(
+                self._conn,
+                [id],
+                rollback_broker_message_repository.LEASE_OWNER,
+            )
             await rollback_broker_message_repository.schedule_next_retry([id])
 
             nonlocal count_of_retries
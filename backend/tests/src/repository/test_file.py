@@ -6,6 +6,9 @@ from uuid import uuid4
 import pytest
 import pytest_asyncio
 
+from backend.adapters.file_repository.db import DatabaseFileRepository
+from backend.adapters.file_storage.content_addressed import \
+    ContentAddressedFileStorage
 from backend.core import exceptions
 from backend.core.config import settings
 from backend.tests.src.repository import mixins
@@ -171,22 +174,89 @@ class TestFileRepository(
         )
         path = file_storage.generate_path(model.stored_id)
 
-        size = await rollback_file_repository.store(
+        saved = await rollback_file_repository.store(
             model.id, self._get_coro_with_bytes(data)
         )
         assert True == Path(path).is_file()
 
         model = await rollback_file_repository.mark_as_stored(
-            model.id, name, size
+            model.id, name, saved.size
         )
         await rollback_file_repository.delete(self._account_name, model.id)
 
-        await rollback_file_repository.erase(model.id)
+        #  Содержимое удаляется из хранилища после фиксации транзакции
+        unreferenced = await rollback_file_repository.erase(model.id)
+        assert unreferenced == [model.stored_id]
+        assert True == Path(path).is_file()
+
+        await file_storage.erase_many(unreferenced)
         assert False == Path(path).is_file()
 
-        row = await self._conn.fetchrow(query, model.id, name, size)
+        row = await self._conn.fetchrow(query, model.id, name, saved.size)
         assert row is not None
 
+    @pytest.mark.asyncio
+    async def test_actual_size(self, rollback_file_repository):
+        data = b"1234567890"
+        query = f"""
+                SELECT actual_size FROM {settings.accounts_table}
+                WHERE name = $1
+                """
+        actual_size = await self._conn.fetchval(query, self._account_name)
+
+        model = await rollback_file_repository.add(
+            self._account_name, self._tag
+        )
+        saved = await rollback_file_repository.store(
+            model.id, self._get_coro_with_bytes(data)
+        )
+        await rollback_file_repository.mark_as_stored(
+            model.id, "TEST NAME", saved.size
+        )
+        assert actual_size + saved.size == await self._conn.fetchval(
+            query, self._account_name
+        )
+
+        #  Удаленный файл занимает место, пока не стерт
+        await rollback_file_repository.delete(self._account_name, model.id)
+        assert actual_size + saved.size == await self._conn.fetchval(
+            query, self._account_name
+        )
+
+        await rollback_file_repository.erase(model.id)
+        assert actual_size == await self._conn.fetchval(
+            query, self._account_name
+        )
+
+    @pytest.mark.asyncio
+    async def test_release_reserved(self, rollback_file_repository):
+        query = f"""
+                SELECT reserved_size FROM {settings.accounts_table}
+                WHERE name = $1
+                """
+        reserve_query = f"""
+                UPDATE {settings.accounts_table}
+                SET reserved_size = reserved_size + $2 WHERE name = $1
+                """
+        await self._conn.execute(reserve_query, self._account_name, 30)
+        stored = await rollback_file_repository.add(
+            self._account_name, self._tag, reserved_size=10
+        )
+        expired = await rollback_file_repository.add(
+            self._account_name, self._tag, reserved_size=20
+        )
+
+        await rollback_file_repository.release_reserved(stored.id)
+        await rollback_file_repository.release_reserved(stored.id)
+        assert 20 == await self._conn.fetchval(query, self._account_name)
+
+        #  У файла нет действующей ссылки на загрузку
+        await rollback_file_repository.release_expired_reserved()
+        assert 0 == await self._conn.fetchval(query, self._account_name)
+
+        model = await rollback_file_repository.get_not_stored(expired.id)
+        assert model.reserved_size == 0
+
     @pytest.mark.asyncio
     async def test_take(self, rollback_file_repository, file_storage):
         name = "TEST NAME"
@@ -197,17 +267,128 @@ class TestFileRepository(
         )
         path = file_storage.generate_path(model.stored_id)
 
-        size = await rollback_file_repository.store(
+        saved = await rollback_file_repository.store(
             model.id, self._get_coro_with_bytes(data)
         )
         assert True == Path(path).is_file()
 
         model = await rollback_file_repository.mark_as_stored(
-            model.id, name, size
+            model.id, name, saved.size, saved.checksum
         )
+        assert model.checksum == saved.checksum
         gen = await rollback_file_repository.take(model.id)
         f = io.BytesIO()
         async for chunk in gen:
             f.write(chunk)
 
         assert data == f.getvalue()
+
+    @pytest.mark.asyncio
+    async def test_erase_shared_content(self, rollback_pg, tmp_path):
+        data = b"1234567890"
+        repository = DatabaseFileRepository(
+            ContentAddressedFileStorage(str(tmp_path)), rollback_pg
+        )
+
+        models = []
+        for _ in range(2):
+            model = await repository.add(self._account_name, self._tag)
+            saved = await repository.store(
+                model.id, self._get_coro_with_bytes(data)
+            )
+            model = await repository.mark_as_stored(
+                model.id, "TEST NAME", saved.size, saved.checksum
+            )
+            await repository.delete(self._account_name, model.id)
+            models.append(model)
+
+        assert models[0].stored_id == models[1].stored_id
+        path = repository._storage.generate_path(models[0].stored_id)
+
+        assert await repository.erase(models[0].id) == []
+        assert await repository.erase(models[1].id) == [models[0].stored_id]
+        assert True == Path(path).is_file()
+
+    @pytest.mark.asyncio
+    async def test_erase_many(self, rollback_pg, tmp_path):
+        repository = DatabaseFileRepository(
+            ContentAddressedFileStorage(str(tmp_path)), rollback_pg
+        )
+
+        models = []
+        for data in (b"1234567890", b"1234567890", b"0987654321"):
+            model = await repository.add(self._account_name, self._tag)
+            saved = await repository.store(
+                model.id, self._get_coro_with_bytes(data)
+            )
+            model = await repository.mark_as_stored(
+                model.id, "TEST NAME", saved.size, saved.checksum
+            )
+            await repository.delete(self._account_name, model.id)
+            models.append(model)
+
+        paths = [
+            repository._storage.generate_path(x.stored_id) for x in models
+        ]
+
+        #  Не удаленный файл не стирается
+        ids = [x.id for x in models] + [self._file_id]
+        erased, unreferenced = await repository.erase_many(ids)
+        assert set(erased) == set(ids[:3])
+        assert set(unreferenced) == {x.stored_id for x in models}
+        assert all(Path(x).is_file() for x in paths)
+
+        assert await repository.erase_many(ids) == ([], [])
+
+    @pytest.mark.asyncio
+    async def test_store_by_checksum(self, rollback_file_repository):
+        data = b"1234567890"
+        model = await rollback_file_repository.add(
+            self._account_name, self._tag
+        )
+        saved = await rollback_file_repository.store(
+            model.id, self._get_coro_with_bytes(data)
+        )
+
+        model = await rollback_file_repository.add(
+            self._account_name, self._tag
+        )
+        linked = await rollback_file_repository.store_by_checksum(
+            model.id, saved.checksum
+        )
+        assert linked.checksum == saved.checksum
+        assert linked.size == saved.size
+        assert (
+            await rollback_file_repository.store_by_checksum(
+                model.id, "sha256:0"
+            )
+            is None
+        )
+
+        model = await rollback_file_repository.get_not_stored(model.id)
+        assert model.stored_id == linked.stored_id
+
+    @pytest.mark.asyncio
+    async def test_get_stored_and_not_deleted(self, rollback_file_repository):
+        repository = rollback_file_repository
+        for _ in range(5):
+            model = await repository.add(self._account_name, self._tag)
+            await repository.mark_as_stored(model.id, "", 0)
+
+        files = [x async for x in repository.iterate_stored_and_not_deleted(2)]
+        ids = [x.id for x in files]
+        assert ids == sorted(ids)
+        assert self._file_id in ids
+        assert self._deleted_file_id not in ids
+        assert self._not_stored_file_id not in ids
+
+        paged, after = [], None
+        while True:
+            page = await repository.get_stored_and_not_deleted(2, after)
+            if not page:
+                break
+
+            paged.extend(x.id for x in page)
+            after = page[-1].id
+
+        assert paged == ids
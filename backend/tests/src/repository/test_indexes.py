@@ -0,0 +1,211 @@
+import json
+import logging
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+
+from backend.adapters.broker_message_repository.db import \
+    DatabaseBrokerMessageRepository
+from backend.adapters.file_repository.db import DatabaseFileRepository
+from backend.adapters.link_repository.db import DatabaseLinkRepository
+from backend.core.config import settings, tz_now
+from backend.tests.src.repository import mixins
+
+logger = logging.getLogger()
+
+ROWS_COUNT = 20000
+
+SEEDED_TABLES = {
+    settings.files_table,
+    settings.links_table,
+    settings.broker_messages_table,
+    settings.blobs_table,
+}
+
+#  Запросы, которым последовательное чтение таблицы необходимо
+SKIPPED_QUERIES = {
+    #  Выборка для чтения всей таблицы курсором
+    (DatabaseFileRepository, "GET_ALL_STORED_AND_NOT_DELETED_QUERY"),
+}
+
+
+class TestIndexes(mixins.AccountMixin):
+    @pytest_asyncio.fixture(autouse=True)
+    async def setup(self, rollback_pg):
+        self._conn = rollback_pg
+        self._account_name, _ = await self._create_default_account(rollback_pg)
+
+        #  Большинство файлов сохранены, часть удалена, часть стерта
+        await self._conn.execute(
+            f"""
+            INSERT INTO {settings.files_table}
+                (id, stored_id, name, size, tag, created, has_stored, stored,
+                has_deleted, deleted, has_erased, erased, account_name)
+            SELECT
+                gen_random_uuid(), gen_random_uuid(), 'FILE', i, 'tag',
+                now(), i % 100 <> 0, now(),
+                i % 50 = 0, now() - INTERVAL '1 second' * i,
+                i % 200 = 0, now(), $2
+            FROM generate_series(1, $1) AS i;
+            """,
+            ROWS_COUNT,
+            self._account_name,
+        )
+        await self._conn.execute(
+            f"""
+            INSERT INTO {settings.blobs_table}
+                (id, checksum, size, refs, created)
+            SELECT stored_id, 'sha256:' || id, size, 1, now()
+            FROM {settings.files_table};
+            """
+        )
+        #  Просроченных ссылок немного, они удаляются по расписанию
+        await self._conn.execute(
+            f"""
+            INSERT INTO {settings.links_table}
+                (id, file_id, type, created, expired)
+            SELECT
+                gen_random_uuid(), id, 'D', now(),
+                now() + INTERVAL '1 hour' * (row_number() OVER () - 100)
+            FROM {settings.files_table};
+            """
+        )
+        #  Выполненных сообщений немного, они удаляются по расписанию.
+        #  Большинство ожидает повторной отправки
+        await self._conn.execute(
+            f"""
+            INSERT INTO {settings.broker_messages_table}
+                (id, direction, app, "key", body, has_executed, created,
+                updated, has_execution_stopped, count_of_retries,
+                next_retry_at, seconds_to_next_retry)
+            SELECT
+                gen_random_uuid(), CASE WHEN i % 2 = 0 THEN 'O' ELSE 'I' END,
+                'app', 'key', $2::jsonb, i % 100 = 0, now(),
+                now(), i % 100 = 1, 0,
+                now() + INTERVAL '1 second' * (i - 100), 1
+            FROM generate_series(1, $1) AS i;
+            """,
+            ROWS_COUNT,
+            {"key": "value"},
+        )
+
+        for table in SEEDED_TABLES:
+            await self._conn.execute(f"ANALYZE {table};")
+
+    def _get_cases(self) -> dict[tuple[type, str], tuple]:
+        id, ids, now = uuid4(), [uuid4(), uuid4()], tz_now()
+        file_rep = DatabaseFileRepository
+        link_rep = DatabaseLinkRepository
+        message_rep = DatabaseBrokerMessageRepository
+
+        return {
+            (file_rep, "GET_BY_ID_QUERY"): (id,),
+            (file_rep, "GET_STORED_BY_ID_QUERY"): (id,),
+            (file_rep, "GET_STORED_AND_NOT_DELETED_AFTER_QUERY"): (100, id),
+            (file_rep, "GET_DELETED_BY_ID_QUERY"): (id,),
+            (file_rep, "GET_DELETED_AND_NOT_ERASED_AFTER_QUERY"): (
+                tz_now(),
+                tz_now(-ROWS_COUNT + 100),
+                id,
+                100,
+            ),
+            (file_rep, "LOCK_DELETED_QUERY"): (ids,),
+            (file_rep, "ADD_QUERY"): (
+                self._account_name,
+                id,
+                id,
+                "",
+                0,
+                "tag",
+                now,
+                0,
+            ),
+            (file_rep, "STORE_QUERY"): (id, "", 0, "", now),
+            (file_rep, "DELETE_QUERY"): (self._account_name, id, now),
+            (file_rep, "ERASE_QUERY"): (ids, now),
+            (file_rep, "RELEASE_RESERVED_QUERY"): (id,),
+            (file_rep, "RELEASE_EXPIRED_RESERVED_QUERY"): (),
+            (file_rep, "SET_STORED_ID_QUERY"): (id, id),
+            (file_rep, "ACQUIRE_BLOB_QUERY"): (id, "sha256:0", 0, now),
+            (file_rep, "ACQUIRE_BLOB_BY_CHECKSUM_QUERY"): ("sha256:0",),
+            (file_rep, "GET_BLOBS_REFS_FOR_UPDATE_QUERY"): (ids,),
+            (file_rep, "RELEASE_BLOBS_QUERY"): (ids, [1, 1]),
+            (file_rep, "DELETE_BLOBS_QUERY"): (ids,),
+            (link_rep, "GET_BY_ID_QUERY"): (id, "D"),
+            (link_rep, "ADD_QUERY"): (id, id, "D", now, now),
+            (link_rep, "DELETE_BY_ID_QUERY"): (id,),
+            (link_rep, "DELETE_BY_FILE_ID_QUERY"): (id,),
+            (link_rep, "DELETE_EXPIRED_QUERY"): (),
+            (message_rep, "GET_BY_ID_QUERY"): (id,),
+            (message_rep, "GET_DIRECTIONAL_BY_ID_QUERY"): (id, "I"),
+            (message_rep, "CLAIM_NOT_EXECUTED_MESSAGES_QUERY"): (
+                "O",
+                now,
+                100,
+                "owner",
+                300,
+            ),
+            (message_rep, "ADD_QUERY"): (
+                id,
+                "O",
+                "app",
+                "key",
+                {},
+                False,
+                now,
+                now,
+                False,
+                0,
+                now,
+                1,
+            ),
+            (message_rep, "ADD_INCOMING_QUERY"): (
+                ids,
+                ["app", "app"],
+                ["key", "key"],
+                [{}, {}],
+                now,
+            ),
+            (message_rep, "MARK_AS_EXECUTED_QUERY"): (ids, now, "owner"),
+            (message_rep, "RENEW_LEASE_QUERY"): (ids, now, "owner", 300),
+            (message_rep, "SCHEDULE_NEXT_RETRY_QUERY"): (ids, now, "owner"),
+            (message_rep, "MARK_AS_FAILED_QUERY"): (ids, 1),
+            (message_rep, "DELETE_EXECUTED_QUERY"): (),
+        }
+
+    def _find_seq_scans(self, plan: dict) -> list[str]:
+        tables = []
+        if (
+            plan["Node Type"] == "Seq Scan"
+            and plan["Relation Name"] in SEEDED_TABLES
+        ):
+            tables.append(plan["Relation Name"])
+
+        for x in plan.get("Plans", []):
+            tables.extend(self._find_seq_scans(x))
+
+        return tables
+
+    @pytest.mark.asyncio
+    async def test_all_queries_are_checked(self):
+        cases = self._get_cases()
+        for repository in {x for x, _ in cases}:
+            for name in dir(repository):
+                if name.endswith("_QUERY"):
+                    key = (repository, name)
+                    assert key in cases or key in SKIPPED_QUERIES, key
+
+    @pytest.mark.asyncio
+    async def test_no_seq_scan(self):
+        failed = []
+        for (repository, name), args in self._get_cases().items():
+            query = getattr(repository, name)
+            plan = await self._conn.fetchval(
+                f"EXPLAIN (FORMAT JSON) {query}", *args
+            )
+            tables = self._find_seq_scans(json.loads(plan)[0]["Plan"])
+            if tables:
+                failed.append((repository.__name__, name, tables))
+
+        assert failed == []
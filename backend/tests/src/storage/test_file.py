@@ -1,11 +1,19 @@
+import hashlib
 import io
 import logging
+import os
 from pathlib import Path
 from uuid import uuid4
 
 import pytest
 import pytest_asyncio
 
+from backend.adapters.file_storage.compressed import (MAGIC,
+                                                      CompressedFileStorage)
+from backend.adapters.file_storage.content_addressed import \
+    ContentAddressedFileStorage
+from backend.adapters.file_storage.local import (FSYNC_FILE_AND_DIR,
+                                                 LocalFileStorage)
 from backend.tests.src.storage import mixins
 
 logger = logging.getLogger()
@@ -29,16 +37,215 @@ class TestFileStorage(mixins.FileOperationMixin):
 
         assert self._data == f.getvalue()
 
+    @pytest.mark.asyncio
+    async def test_get_range(self, file_storage):
+        id = uuid4()
+        path = file_storage.generate_path(id)
+        self._save(path, self._data)
+
+        gen = file_storage.get(id, 3, 4)
+        f = io.BytesIO()
+        async for chunk in gen:
+            f.write(chunk)
+
+        assert self._data[3:7] == f.getvalue()
+
+    @pytest.mark.asyncio
+    async def test_get_with_adaptive_chunk_size(self, tmp_path):
+        storage = LocalFileStorage(
+            str(tmp_path), chunk_size=2, max_chunk_size=4
+        )
+        id = uuid4()
+        self._save(storage.generate_path(id), self._data)
+
+        chunks = [bytes(x) async for x in storage.get(id)]
+        assert [2, 4, 4] == [len(x) for x in chunks]
+        assert self._data == b"".join(chunks)
+
+        chunks = [bytes(x) async for x in storage.get(id, 1, 5)]
+        assert [2, 3] == [len(x) for x in chunks]
+        assert self._data[1:6] == b"".join(chunks)
+
+    @pytest.mark.asyncio
+    async def test_get_path(self, file_storage, tmp_path):
+        id = uuid4()
+        path = file_storage.generate_path(id)
+        self._save(path, self._data)
+
+        assert await file_storage.get_path(id) is None
+
+        storage = LocalFileStorage(str(tmp_path), sendfile=True)
+        assert await storage.get_path(id) == path
+
+        #  Отсутствие файла обнаруживается при его открытии
+        missing_id = uuid4()
+        assert await storage.get_path(missing_id) == storage.generate_path(
+            missing_id
+        )
+
     @pytest.mark.asyncio
     async def test_save(self, file_storage):
         id = uuid4()
         path = file_storage.generate_path(id)
-        await file_storage.save(id, self._get_coro_with_bytes(self._data))
+        saved = await file_storage.save(
+            id, self._get_coro_with_bytes(self._data)
+        )
+
+        with open(path, mode="rb") as f:
+            stored_data = f.read()
+
+        assert stored_data == self._data
+        assert saved.size == len(self._data)
+        assert (
+            saved.checksum
+            == f"sha256:{hashlib.sha256(self._data).hexdigest()}"
+        )
+
+    @pytest.mark.asyncio
+    async def test_save_is_atomic(self, file_storage):
+        id = uuid4()
+        path = file_storage.generate_path(id)
+
+        async def get_broken_chunk(size: int) -> bytearray:
+            assert False == Path(path).is_file()
+            raise ConnectionResetError
+
+        with pytest.raises(ConnectionResetError):
+            await file_storage.save(id, get_broken_chunk)
+
+        assert [] == os.listdir(os.path.dirname(path))
+
+    @pytest.mark.asyncio
+    async def test_save_with_fsync(self, tmp_path):
+        storage = LocalFileStorage(str(tmp_path), fsync=FSYNC_FILE_AND_DIR)
+        id = uuid4()
+        path = storage.generate_path(id)
+        await storage.save(id, self._get_coro_with_bytes(self._data))
+
+        with open(path, mode="rb") as f:
+            assert f.read() == self._data
+
+        assert [str(id)] == os.listdir(os.path.dirname(path))
+
+    @pytest.mark.asyncio
+    async def test_save_deduplicated(self, tmp_path):
+        storage = ContentAddressedFileStorage(str(tmp_path))
+        claimed = []
+
+        async def claim(saved):
+            claimed.append(saved)
+
+        first = await storage.save(
+            uuid4(), self._get_coro_with_bytes(self._data), claim
+        )
+        second = await storage.save(
+            uuid4(), self._get_coro_with_bytes(self._data), claim
+        )
+
+        assert first == second
+        assert claimed == [first, second]
+        assert first.stored_id == storage.make_stored_id(first.checksum)
+
+        path = storage.generate_path(first.stored_id)
+        assert [os.path.basename(path)] == os.listdir(os.path.dirname(path))
+        with open(path, mode="rb") as f:
+            assert f.read() == self._data
+
+    def test_deduplicates(self, file_storage, tmp_path):
+        storage = ContentAddressedFileStorage(str(tmp_path))
+
+        assert not file_storage.deduplicates
+        assert storage.deduplicates
+        assert not CompressedFileStorage(file_storage).deduplicates
+        assert CompressedFileStorage(storage).deduplicates
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+    async def test_save_compressed(self, file_storage, encoding):
+        if encoding == "zstd":
+            pytest.importorskip("zstandard")
+
+        storage = CompressedFileStorage(file_storage, encoding=encoding)
+        data = self._data * 1000
+        id = uuid4()
+        saved = await storage.save(id, self._get_coro_with_bytes(data))
+
+        assert saved.size == len(data)
+        assert saved.checksum == f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+        with open(file_storage.generate_path(id), mode="rb") as f:
+            stored_data = f.read()
+
+        assert stored_data.startswith(MAGIC)
+        assert len(stored_data) < len(data)
+
+        assert data == b"".join([bytes(x) async for x in storage.get(id)])
+        assert data[5:5005] == b"".join(
+            [bytes(x) async for x in storage.get(id, 5, 5000)]
+        )
+        assert encoding == await storage.get_encoding(id)
+        assert await storage.get_path(id) is None
+
+    @pytest.mark.asyncio
+    async def test_save_incompressible(self, tmp_path):
+        file_storage = LocalFileStorage(str(tmp_path), sendfile=True)
+        storage = CompressedFileStorage(file_storage)
+        data = os.urandom(1000)
+        id = uuid4()
+        await storage.save(id, self._get_coro_with_bytes(data))
+
+        path = file_storage.generate_path(id)
+        with open(path, mode="rb") as f:
+            assert f.read() == data
+
+        assert "identity" == await storage.get_encoding(id)
+        assert path == await storage.get_path(id)
+
+    @pytest.mark.asyncio
+    async def test_sweep(self, file_storage):
+        id = uuid4()
+        path = file_storage.generate_path(id)
+        temp_path = file_storage.generate_temp_path(id)
+        part_path = file_storage.generate_part_path(id)
+        for x in (path, temp_path, part_path):
+            self._save(x, self._data)
+
+        assert 0 == await file_storage.sweep(3600, 3600)
+
+        old = os.path.getmtime(temp_path) - 7200
+        os.utime(temp_path, (old, old))
+        assert 1 == await file_storage.sweep(3600, 3600)
+        assert False == Path(temp_path).is_file()
+
+        os.utime(part_path, (old, old))
+        assert 1 == await file_storage.sweep(3600, 3600)
+        assert False == Path(part_path).is_file()
+        assert True == Path(path).is_file()
+
+    @pytest.mark.asyncio
+    async def test_save_parts(self, file_storage):
+        id = uuid4()
+        path = file_storage.generate_path(id)
+
+        await file_storage.save_part(
+            id, 6, self._get_coro_with_bytes(self._data[6:])
+        )
+        await file_storage.save_part(
+            id, 0, self._get_coro_with_bytes(self._data[:6])
+        )
+        assert False == Path(path).is_file()
+
+        saved = await file_storage.commit_parts(id, len(self._data))
+        assert (
+            saved.checksum
+            == f"sha256:{hashlib.sha256(self._data).hexdigest()}"
+        )
 
         with open(path, mode="rb") as f:
             stored_data = f.read()
 
         assert stored_data == self._data
+        assert False == Path(file_storage.generate_part_path(id)).is_file()
 
     @pytest.mark.asyncio
     async def test_erase(self, file_storage):
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from backend.tools.limits import ByteBudget
+
+
+class TestByteBudget:
+    async def _hold(self, budget: ByteBudget, size: int, events: list):
+        async with budget.reserve(size):
+            events.append(("start", size))
+            await asyncio.sleep(0.01)
+            events.append(("end", size))
+
+    @pytest.mark.asyncio
+    async def test_reserve_within_limit(self):
+        budget = ByteBudget(100)
+        events = []
+
+        await asyncio.gather(
+            self._hold(budget, 40, events), self._hold(budget, 60, events)
+        )
+
+        #  Обе операции помещаются в лимит и выполняются одновременно
+        assert events[:2] == [("start", 40), ("start", 60)]
+
+    @pytest.mark.asyncio
+    async def test_reserve_over_limit(self):
+        budget = ByteBudget(100)
+        events = []
+
+        await asyncio.gather(
+            self._hold(budget, 60, events), self._hold(budget, 50, events)
+        )
+
+        #  Вторая операция ждет освобождения лимита
+        assert events == [
+            ("start", 60),
+            ("end", 60),
+            ("start", 50),
+            ("end", 50),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_reserve_greater_than_limit(self):
+        budget = ByteBudget(100)
+        events = []
+
+        await asyncio.wait_for(
+            asyncio.gather(
+                self._hold(budget, 10, events),
+                self._hold(budget, 1000, events),
+                self._hold(budget, 10, events),
+            ),
+            1,
+        )
+
+        #  Операция больше лимита выполняется, когда других операций нет
+        start = events.index(("start", 1000))
+        assert events[start + 1] == ("end", 1000)
+        assert events[start - 1][0] == "end"
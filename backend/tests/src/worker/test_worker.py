@@ -0,0 +1,104 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from backend.core.config import settings, tz_now
+from backend.domain import commands
+from backend.domain.models import BrokerMessage
+from backend.worker import Worker
+
+
+class FakeBus:
+    def __init__(self, messages: list[BrokerMessage] | None = None):
+        self.messages = messages or []
+        self.executed = []
+        self.failed = set()
+        self.ok_ids = []
+        self.retry_ids = []
+
+    def __call__(self):
+        return self
+
+    async def handle(self, cmd):
+        if isinstance(cmd, commands.GetMessagesReceivedFromBroker):
+            return self.messages
+
+        if isinstance(cmd, commands.MarkBrokerMessageAsExecuted):
+            self.ok_ids.extend(cmd.ids)
+
+        if isinstance(cmd, commands.ScheduleNextRetryForBrokerMessage):
+            self.retry_ids.extend(cmd.ids)
+
+        if isinstance(cmd, commands.ExecuteBrokerMessage):
+            #  Переключение задач между сообщениями
+            await asyncio.sleep(0)
+            if cmd.message.id in self.failed:
+                raise Exception("Execution failed")
+
+            self.executed.append(cmd.message.id)
+
+
+def make_message(file_id, size: int = 0, key: str = "FILE.STORED"):
+    return BrokerMessage(
+        app=settings.app_name,
+        key=key,
+        body={"id": str(file_id), "size": size},
+        direction="I",
+        next_retry_at=tz_now(),
+    )
+
+
+class TestWorker:
+    @pytest.mark.asyncio
+    async def test_execute_group_order(self):
+        bus = FakeBus()
+        worker = Worker(bus)
+        file_id = uuid4()
+        messages = [make_message(file_id) for _ in range(3)]
+
+        assert await worker._execute_group(messages) == [True] * 3
+        assert bus.executed == [x.id for x in messages]
+
+    @pytest.mark.asyncio
+    async def test_execute_group_after_failure(self):
+        bus = FakeBus()
+        worker = Worker(bus)
+        file_id = uuid4()
+        messages = [make_message(file_id) for _ in range(3)]
+        bus.failed.add(messages[1].id)
+
+        #  Сообщения после ошибочного не выполняются, чтобы сохранить
+        #  порядок
+        assert await worker._execute_group(messages) == [True, False, False]
+        assert bus.executed == [messages[0].id]
+
+    @pytest.mark.asyncio
+    async def test_do(self):
+        first_file_id, second_file_id = uuid4(), uuid4()
+        messages = [
+            make_message(first_file_id),
+            make_message(second_file_id),
+            make_message(first_file_id),
+            make_message(second_file_id),
+        ]
+        bus = FakeBus(messages)
+        bus.failed.add(messages[1].id)
+        worker = Worker(bus)
+
+        await worker._do()
+
+        #  Сообщения о разных файлах выполняются независимо
+        assert bus.executed == [messages[0].id, messages[2].id]
+        assert bus.ok_ids == [messages[0].id, messages[2].id]
+        assert bus.retry_ids == [messages[1].id, messages[3].id]
+
+    @pytest.mark.asyncio
+    async def test_download_size(self):
+        assert Worker._download_size(make_message(uuid4(), 10)) == 10
+        assert (
+            Worker._download_size(
+                make_message(uuid4(), 10, key="FILE.DELETED")
+            )
+            == 0
+        )
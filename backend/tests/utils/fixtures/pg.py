@@ -1,4 +1,3 @@
-import json
 import logging
 
 import asyncpg
@@ -7,6 +6,7 @@ import pytest_asyncio
 from backend.adapters.account_repository.db import DatabaseAccountRepository
 from backend.adapters.broker_message_repository.db import \
     DatabaseBrokerMessageRepository
+from backend.adapters.db import init_connection
 from backend.adapters.file_repository.db import DatabaseFileRepository
 from backend.adapters.link_repository.db import DatabaseLinkRepository
 from backend.core.config import db_dsl
@@ -18,7 +18,7 @@ logger = logging.Logger(__name__)
 @backoff()
 @pytest_asyncio.fixture(scope="session")
 async def pg_pool():
-    pool = await asyncpg.create_pool(**db_dsl)
+    pool = await asyncpg.create_pool(init=init_connection, **db_dsl)
     yield pool
 
     if pool:
@@ -29,13 +29,6 @@ async def pg_pool():
 async def rollback_pg(pg_pool):
     conn = await pg_pool.acquire()
 
-    await conn.set_type_codec(
-        "jsonb",
-        encoder=lambda x: json.dumps(x, default=str),
-        decoder=json.loads,
-        schema="pg_catalog",
-    )
-
     tr = conn.transaction()
     await tr.start()
 
@@ -49,13 +42,6 @@ async def rollback_pg(pg_pool):
 async def pg(pg_pool):
     conn = await pg_pool.acquire()
 
-    await conn.set_type_codec(
-        "jsonb",
-        encoder=lambda x: json.dumps(x, default=str),
-        decoder=json.loads,
-        schema="pg_catalog",
-    )
-
     yield conn
 
     await pg_pool.release(conn)
@@ -0,0 +1,43 @@
+import base64
+import hashlib
+
+#  Имена алгоритмов для заголовков Digest (RFC 3230) и Repr-Digest (RFC 9530)
+DIGEST_ALGORITHMS = {
+    "sha256": "sha-256",
+    "sha512": "sha-512",
+}
+
+
+def make_hasher(algorithm: str):
+    return hashlib.new(algorithm)
+
+
+def make_checksum(hasher) -> str:
+    """
+    Контрольная сумма хранится вместе с алгоритмом: "sha256:<hex>",
+    чтобы ее можно было сравнить с суммой, посчитанной на другом сервере.
+
+    """
+
+    return f"{hasher.name}:{hasher.hexdigest()}"
+
+
+def split_checksum(checksum: str) -> tuple[str, str]:
+    algorithm, _, hexdigest = checksum.partition(":")
+    return algorithm, hexdigest
+
+
+def make_digest_header(checksum: str) -> str | None:
+    """
+    Значение заголовка Digest вида "sha-256=<base64>" или None, если
+    контрольной суммы нет или алгоритм не зарегистрирован для заголовка.
+
+    """
+
+    algorithm, hexdigest = split_checksum(checksum)
+    name = DIGEST_ALGORITHMS.get(algorithm)
+    if name is None or not hexdigest:
+        return None
+
+    value = base64.b64encode(bytes.fromhex(hexdigest)).decode()
+    return f"{name}={value}"
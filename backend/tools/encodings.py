@@ -0,0 +1,33 @@
+def parse_accept_encoding_header(value: str | None) -> list[str]:
+    """
+    Разбор заголовка Accept-Encoding (RFC 9110).
+
+    Возвращает список кодирований, которые клиент принимает (q > 0),
+    без identity и "*".
+
+    """
+
+    if not value:
+        return []
+
+    encodings = []
+    for item in value.split(","):
+        name, *params = [x.strip() for x in item.split(";")]
+        name = name.lower()
+
+        if not name or name in ("identity", "*"):
+            continue
+
+        quality = 1.0
+        for param in params:
+            key, _, param_value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(param_value)
+                except ValueError:
+                    quality = 0.0
+
+        if quality > 0:
+            encodings.append(name)
+
+    return encodings
@@ -0,0 +1,59 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
+
+
+class ByteBudget:
+    """
+    Ограничение суммарного размера одновременно выполняемых операций.
+    Операция больше лимита выполняется, когда других операций нет.
+
+    """
+
+    def __init__(self, limit: int):
+        self._limit = limit
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def reserve(self, size: int):
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self._in_flight == 0
+                or self._in_flight + size <= self._limit
+            )
+            self._in_flight += size
+
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._in_flight -= size
+                self._condition.notify_all()
+
+
+def limit_bytes(
+    get_bytes: Callable[[int], Awaitable[bytearray]],
+    limit: int,
+    error: type[Exception],
+) -> Callable[[int], Awaitable[bytearray]]:
+    """
+    Ограничение количества байт, читаемых через get_bytes. Проверка
+    выполняется до записи очередного куска в хранилище, при превышении
+    выбрасывается error.
+
+    """
+
+    async def inner(size: int) -> bytearray:
+        nonlocal limit
+        chunk = await get_bytes(min(size, limit + 1))
+        if not chunk:
+            return chunk
+
+        if len(chunk) > limit:
+            raise error
+
+        limit -= len(chunk)
+        return chunk
+
+    return inner
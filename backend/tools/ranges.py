@@ -0,0 +1,95 @@
+import re
+
+from backend.core import exceptions
+
+MAX_RANGES_COUNT = 16
+
+_BYTES_UNIT = "bytes="
+_RANGE_SPEC = re.compile(r"^(\d*)-(\d*)$")
+
+
+def parse_range_header(
+    value: str | None,
+) -> list[tuple[int | None, int | None]] | None:
+    """
+    Разбор заголовка Range (RFC 9110).
+
+    Возвращает список пар (start, end), где любое значение может быть None:
+        "500-999" -> (500, 999)
+        "500-"    -> (500, None)
+        "-500"    -> (None, 500), т.е. последние 500 байт
+
+    Если заголовок отсутствует, синтаксически неверен или содержит
+    слишком много диапазонов, возвращает None - в этом случае заголовок
+    игнорируется и отдается файл целиком.
+
+    """
+
+    if not value or not value.startswith(_BYTES_UNIT):
+        return None
+
+    ranges = []
+    for spec in value[len(_BYTES_UNIT) :].split(","):
+        match = _RANGE_SPEC.match(spec.strip())
+        if not match or match.group(0) == "-":
+            return None
+
+        start, end = (int(x) if x else None for x in match.groups())
+        if start is not None and end is not None and start > end:
+            return None
+
+        ranges.append((start, end))
+
+    if len(ranges) > MAX_RANGES_COUNT:
+        return None
+
+    return ranges
+
+
+def resolve_ranges(
+    ranges: list[tuple[int | None, int | None]], size: int
+) -> list[tuple[int, int]]:
+    """
+    Приведение диапазонов к абсолютным границам [start, end] для файла
+    заданного размера. Пересекающиеся и смежные диапазоны объединяются.
+
+    Если ни один диапазон не попадает в файл, выбрасывает
+    RangeNotSatisfiable.
+
+    """
+
+    resolved = []
+    for start, end in ranges:
+        if start is None:
+            #  Суффикс: последние end байт
+            if end == 0:
+                continue
+            start, end = max(size - end, 0), size - 1
+        elif start >= size:
+            continue
+        else:
+            end = size - 1 if end is None else min(end, size - 1)
+
+        resolved.append((start, end))
+
+    if not resolved:
+        raise exceptions.RangeNotSatisfiable(size)
+
+    return merge_ranges(resolved)
+
+
+def merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    Объединение пересекающихся и смежных диапазонов [start, end].
+    Возвращает отсортированный список.
+
+    """
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return merged
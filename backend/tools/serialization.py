@@ -0,0 +1,72 @@
+import json
+from typing import Any
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+#  orjson.JSONDecodeError наследуется от json.JSONDecodeError
+DecodeError = json.JSONDecodeError
+
+#  datetime передается в default=str, как и в стандартной библиотеке,
+#  чтобы формат сообщений не зависел от наличия orjson
+_ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    if orjson is not None
+    else 0
+)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Сериализация в JSON. Типы, не поддерживаемые JSON (UUID, datetime),
+    приводятся к строке.
+
+    """
+
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=_ORJSON_OPTIONS)
+
+    return json.dumps(
+        obj, default=str, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def dumps_str(obj: Any) -> str:
+    return dumps(obj).decode()
+
+
+def loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+
+    return json.loads(data)
+
+
+def dump_models(models: BaseModel | list[BaseModel]) -> bytes:
+    """
+    Сериализация pydantic моделей в JSON в том же виде,
+    что и model_dump_json. Наследники UUID (например, из asyncpg)
+    orjson не поддерживает, они приводятся к строке.
+
+    """
+
+    if orjson is not None:
+        if isinstance(models, list):
+            return orjson.dumps(
+                [x.model_dump() for x in models],
+                default=str,
+                option=orjson.OPT_UTC_Z,
+            )
+
+        return orjson.dumps(
+            models.model_dump(), default=str, option=orjson.OPT_UTC_Z
+        )
+
+    if isinstance(models, list):
+        return f"[{','.join([x.model_dump_json() for x in models])}]".encode()
+
+    return models.model_dump_json().encode()
@@ -1,8 +1,14 @@
 import asyncio
 import logging
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager, suppress
+from uuid import UUID
 
-from backend.service_layer.message_bus import MessageBus
+from backend.adapters.db import connect, listen, unlisten
+from backend.core.config import db_dsl, settings
+from backend.domain import commands
+from backend.service_layer.message_bus import MessageBus, get_message_bus
+from backend.service_layer.uow import UnitOfWork
 from backend.tools.delay import DelayCalculator
 
 logger = logging.getLogger()
@@ -14,22 +20,153 @@ class AbstractWorker(ABC):
         bus: MessageBus,
         delay_calculator=DelayCalculator(limit=1),
         chunk_size: int = 1000,
+        channel: str | None = None,
     ):
+        """
+        Если задан channel, между проходами worker ждет уведомления
+        (LISTEN) о новой работе, а delay_calculator задает интервал
+        резервного опроса.
+
+        """
+
         self._bus = bus
         self._delay_calculator = delay_calculator
         self._chunk_size = chunk_size
+        self._channel = channel
+        self._wakeup = asyncio.Event()
+        self._listener = None
+        self._listen_task = None
+        self._stopped = False
+        self._lease_conn = None
 
     async def run(self, name: str):
+        if self._channel:
+            await self._listen()
+
+        try:
+            while True:
+                #  Уведомление, полученное во время прохода, не теряется
+                self._wakeup.clear()
+
+                try:
+                    await self._do()
+                except Exception as e:
+                    logger.error(f"Error in {name} during running")
+                    logger.info(e)
+
+                sleep_time = self._delay_calculator.get()
+                logger.info(f"{name} sleeping {sleep_time} seconds.")
+                await self._sleep(sleep_time)
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        #  Закрытие подписки вызывает _on_listener_lost
+        self._stopped = True
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._listen_task
+            self._listen_task = None
+
+        if self._listener is not None:
+            await unlisten(self._listener)
+            self._listener = None
+
+        if self._lease_conn is not None:
+            await self._lease_conn.close()
+            self._lease_conn = None
+
+    async def _sleep(self, seconds: float):
+        if self._listener is None:
+            await asyncio.sleep(seconds)
+            return
+
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _listen(self):
+        self._listener = await listen(
+            self._channel,
+            lambda payload: self._wakeup.set(),
+            on_lost=self._on_listener_lost,
+            **db_dsl,
+        )
+
+    def _on_listener_lost(self):
+        if self._stopped:
+            return
+
+        #  До восстановления подписки работаем опросом
+        self._listener = None
+        self._wakeup.set()
+        if self._listen_task is None or self._listen_task.done():
+            self._listen_task = asyncio.create_task(self._relisten())
+
+    async def _relisten(self):
         while True:
             try:
-                await self._do()
+                await self._listen()
+                return
             except Exception as e:
-                logger.error(f"Error in {name} during running")
+                logger.error(f"Error during listening channel {self._channel}")
                 logger.info(e)
 
-            sleep_time = self._delay_calculator.get()
-            logger.info(f"{name} sleeping {sleep_time} seconds.")
-            await asyncio.sleep(sleep_time)
+            await asyncio.sleep(settings.worker_poll_interval)
+
+    @asynccontextmanager
+    async def _keep_leased(self, ids: list[UUID]):
+        """
+        Продление аренды сообщений очереди, пока выполняется блок.
+        Иначе пачку, выполняемую дольше срока аренды, заберет другой
+        обработчик.
+
+        """
+
+        task = asyncio.create_task(self._renew_lease(ids))
+        try:
+            yield
+        finally:
+            #  Продление использует тот же bus, поэтому дожидаемся его
+            #  завершения
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+    async def _renew_lease(self, ids: list[UUID]):
+        while True:
+            await asyncio.sleep(settings.broker_messages_lease_time / 3)
+            try:
+                bus = await self._get_lease_bus()
+                await bus.handle(commands.RenewBrokerMessagesLease(ids))
+            except Exception as e:
+                logger.error("Error during renewing lease of messages")
+                logger.info(e)
+
+    async def _get_lease_bus(self) -> MessageBus:
+        """
+        Аренда продлевается через отдельное соединение: соединения пула
+        могут быть заняты выполнением сообщений дольше срока аренды.
+
+        """
+
+        if self._lease_conn is None or self._lease_conn.is_closed():
+            self._lease_conn = await connect(**db_dsl)
+
+        async def get_db_conn():
+            return self._lease_conn
+
+        async def release_db_conn(conn):
+            pass
+
+        uow = UnitOfWork(
+            ["db", "broker_message_repository"],
+            get_db_conn=get_db_conn,
+            release_db_conn=release_db_conn,
+        )
+        return await get_message_bus([], uow)
 
     @abstractmethod
     async def _do(self):
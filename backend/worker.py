@@ -2,18 +2,37 @@ import asyncio
 import logging
 import os
 import sys
+from collections import defaultdict
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(BASE_DIR)
 
-from backend.api.dependables import get_bus
+from backend.api.dependables import BOOTSTRAP
+from backend.core.config import INCOMING_MESSAGES_CHANNEL, settings
 from backend.domain import commands
+from backend.domain.models import BrokerMessage
+from backend.service_layer.message_bus import (MessageBusFactory,
+                                               get_message_bus_factory)
+from backend.tools.delay import DelayCalculator
+from backend.tools.limits import ByteBudget
 from backend.tools.worker import AbstractWorker
 
 logger = logging.getLogger()
 
 
 class Worker(AbstractWorker):
+    def __init__(
+        self,
+        bus_factory: MessageBusFactory,
+        concurrency: int = 8,
+        max_in_flight_bytes: int = 2**30,
+        **kwargs,
+    ):
+        super().__init__(bus_factory(), **kwargs)
+        self._bus_factory = bus_factory
+        self._concurrency = asyncio.Semaphore(concurrency)
+        self._budget = ByteBudget(max_in_flight_bytes)
+
     async def _do(self):
         ok_ids = []
         future_publish_ids = []
@@ -26,24 +45,26 @@ class Worker(AbstractWorker):
 
         self._delay_calculator.done()
 
+        #  Сообщения об одном файле выполняются по порядку,
+        #  о разных файлах - параллельно
+        groups = defaultdict(list)
         for message in messages:
-            try:
-                cmd = commands.ExecuteBrokerMessage(message)
-                await self._bus.handle(cmd)
-                is_ok = True
+            groups[message.body.get("id", message.id)].append(message)
 
-            except Exception as e:
-                logger.error("Error during executing incoming message.")
-                logger.info(e)
-                is_ok = False
+        async with self._keep_leased([x.id for x in messages]):
+            results = await asyncio.gather(
+                *(self._execute_group(x) for x in groups.values())
+            )
 
-            if is_ok:
-                logger.info(f"Send {message.id} - OK.")
-                ok_ids.append(message.id)
-                continue
+        for group, group_results in zip(groups.values(), results):
+            for message, is_ok in zip(group, group_results):
+                if is_ok:
+                    logger.info(f"Send {message.id} - OK.")
+                    ok_ids.append(message.id)
+                    continue
 
-            logger.warning(f"Send {message.id} - RESCHEDULED.")
-            future_publish_ids.append(message.id)
+                logger.warning(f"Send {message.id} - RESCHEDULED.")
+                future_publish_ids.append(message.id)
 
         if ok_ids:
             cmd = commands.MarkBrokerMessageAsExecuted(ok_ids)
@@ -55,9 +76,50 @@ class Worker(AbstractWorker):
             )
             messages = await self._bus.handle(cmd)
 
+    async def _execute_group(
+        self, messages: list[BrokerMessage]
+    ) -> list[bool]:
+        results = []
+        async with self._concurrency:
+            for message in messages:
+                #  После ошибки остальные сообщения о файле откладываются,
+                #  чтобы сохранить порядок выполнения
+                is_ok = all(results) and await self._execute(message)
+                results.append(is_ok)
+
+        return results
+
+    async def _execute(self, message: BrokerMessage) -> bool:
+        async with self._budget.reserve(self._download_size(message)):
+            try:
+                cmd = commands.ExecuteBrokerMessage(message)
+                await self._bus_factory().handle(cmd)
+                return True
+
+            except Exception as e:
+                logger.error("Error during executing incoming message.")
+                logger.info(e)
+                return False
+
+    @staticmethod
+    def _download_size(message: BrokerMessage) -> int:
+        #  Файл скачивается только при выполнении FILE.STORED (CloneFile),
+        #  остальные сообщения бюджет не занимают
+        if message.app != settings.app_name or message.key != "FILE.STORED":
+            return 0
+
+        #  Размер скачиваемого файла, если он известен
+        return message.body.get("size") or 0
+
 
 async def main():
-    worker = Worker(await get_bus())
+    worker = Worker(
+        await get_message_bus_factory(BOOTSTRAP),
+        concurrency=settings.worker_concurrency,
+        max_in_flight_bytes=settings.worker_max_in_flight_bytes,
+        delay_calculator=DelayCalculator(limit=settings.worker_poll_interval),
+        channel=INCOMING_MESSAGES_CHANNEL,
+    )
 
     await asyncio.gather(
         worker.run("Worker"),